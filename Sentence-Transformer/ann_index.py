@@ -0,0 +1,168 @@
+# ann_index.py
+#
+# Approximate nearest neighbor search for catalogs too large to scan on every
+# query. IVFIndex is a pure NumPy inverted-file index:
+#
+#   * build: spherical k-means on a sample of the unit embeddings gives
+#     n_lists centroids; every row is assigned to its closest centroid.
+#   * search: score the query against the centroids, scan only the rows of
+#     the nprobe best lists, and take the top-k of those candidates.
+#
+# IVFIndex implements the same SearchBackend interface as the exact
+# ScoringEngine, so app.py can swap one for the other. recall_at_k() measures
+# the tradeoff against the exact path.
+#
+# Build and evaluate (from the repo root):
+#     python Sentence-Transformer/ann_index.py --store Sentence-Transformer/movie_store --n-lists 128 --nprobe 8
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from embedding_store import check_fingerprint
+from scoring import ScoringEngine, SearchBackend, select_top_k
+
+INDEX_VERSION = 1
+INDEX_FILE = "ivf_index.npz"
+
+
+def _assign(vectors, centroids, chunk_size=65536):
+    """Index of the closest (highest dot product) centroid for every row."""
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_size):
+        block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        assign[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def spherical_kmeans(sample, n_lists, n_iter=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = np.bincount(assign, minlength=n_lists) == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]  # reseed
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFIndex(SearchBackend):
+    def __init__(self, embeddings, centroids, list_ids, offsets, nprobe=8):
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.list_ids = list_ids  # row IDs grouped by list
+        self.offsets = offsets  # list i holds list_ids[offsets[i]:offsets[i + 1]]
+        self.nprobe = nprobe
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, embeddings, n_lists=None, n_iter=10, sample_size=100_000, nprobe=8, seed=0):
+        n_rows = embeddings.shape[0]
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(n_rows)))
+        rng = np.random.default_rng(seed)
+        sample_ids = np.sort(rng.choice(n_rows, min(sample_size, n_rows), replace=False))
+        sample = np.asarray(embeddings[sample_ids], dtype=np.float32)
+        centroids = spherical_kmeans(sample, min(n_lists, len(sample)), n_iter=n_iter, seed=seed)
+
+        assign = _assign(embeddings, centroids)
+        list_ids = np.argsort(assign, kind="stable").astype(np.int32)
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=len(centroids)), out=offsets[1:])
+        return cls(embeddings, centroids, list_ids, offsets, nprobe=nprobe)
+
+    def save(self, path, fingerprint=None):
+        """Write the index; `fingerprint` is the store's, checked again on load."""
+        np.savez(
+            path,
+            version=INDEX_VERSION,
+            centroids=self.centroids,
+            list_ids=self.list_ids,
+            offsets=self.offsets,
+            nprobe=self.nprobe,
+            store_fingerprint=fingerprint or "",
+        )
+
+    @classmethod
+    def load(cls, path, embeddings, fingerprint=None):
+        with np.load(path) as data:
+            if int(data["version"]) != INDEX_VERSION:
+                raise ValueError(f"IVF index version {int(data['version'])} is not supported (expected {INDEX_VERSION})")
+            if int(data["offsets"][-1]) != embeddings.shape[0]:
+                raise ValueError("IVF index was built for a different embedding matrix")
+            built_from = str(data["store_fingerprint"]) if "store_fingerprint" in data.files else None
+            check_fingerprint("IVF index", built_from, fingerprint)
+            return cls(embeddings, data["centroids"], data["list_ids"], data["offsets"], nprobe=int(data["nprobe"]))
+
+    def candidates(self, query, nprobe):
+        nprobe = min(nprobe, self.n_lists)
+        lists = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+        return np.concatenate([self.list_ids[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+
+    def search_vectors(self, queries, k=15, exclude=None, nprobe=None):
+        """Approximate top-k for each query; rows short of k candidates are padded with -1."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = nprobe or self.nprobe
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, query in enumerate(queries):
+            cand = self.candidates(query, nprobe)
+            if exclude is not None:
+                cand = cand[cand != exclude[row]]
+            if len(cand) == 0:
+                continue
+            cand = np.sort(cand)  # sequential reads from the (memory-mapped) matrix
+            cand_scores = np.asarray(self.embeddings[cand], dtype=np.float32) @ query
+            top, top_scores = select_top_k(cand_scores, k)
+            n = top.shape[1]
+            ids[row, :n] = cand[top[0]]
+            scores[row, :n] = top_scores[0]
+        return ids, scores
+
+
+def recall_at_k(backend, exact, query_ids, k=15):
+    """Mean fraction of the exact top-k that `backend` also returns."""
+    approx_ids, _ = backend.top_k_batch(query_ids, k=k)
+    exact_ids, _ = exact.top_k_batch(query_ids, k=k)
+    hits = [len(np.intersect1d(a[a >= 0], e)) / k for a, e in zip(approx_ids, exact_ids)]
+    return float(np.mean(hits))
+
+
+def main():
+    from embedding_store import load_store, store_fingerprint
+
+    parser = argparse.ArgumentParser(description="Build an IVF index over the embedding store and report recall@k.")
+    parser.add_argument("--store", default="Sentence-Transformer/movie_store", help="embedding store directory")
+    parser.add_argument("--n-lists", type=int, default=None, help="number of inverted lists (default sqrt(rows))")
+    parser.add_argument("--nprobe", type=int, default=8, help="lists scanned per query")
+    parser.add_argument("--n-iter", type=int, default=10, help="k-means iterations")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=200, help="sample queries for the recall check")
+    args = parser.parse_args()
+
+    _, embeddings = load_store(args.store)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    start = time.perf_counter()
+    index = IVFIndex.build(embeddings, n_lists=args.n_lists, n_iter=args.n_iter, nprobe=args.nprobe)
+    print(f"Built {index.n_lists} lists over {len(index)} rows in {time.perf_counter() - start:.1f}s")
+
+    query_ids = np.random.default_rng(0).choice(len(index), min(args.queries, len(index)), replace=False)
+    recall = recall_at_k(index, ScoringEngine(embeddings), query_ids, k=args.k)
+    print(f"recall@{args.k} with nprobe={args.nprobe}: {recall:.3f}")
+
+    path = os.path.join(args.store, INDEX_FILE)
+    index.save(path, fingerprint=store_fingerprint(args.store))
+    print(f"✅ IVF index saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,148 @@
 # app.py (Streamlit)
 
+import os
+import sys
+from functools import partial
+from pathlib import Path
 import streamlit as st
-import pickle
-import numpy as np
-from numpy.linalg import norm
-from sentence_transformers import SentenceTransformer
-import requests
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common import metrics
+from common.model_loader import BackgroundLoader
+from common.prefetch import Prefetcher
+from common.tmdb_client import TMDBClient
+from common.tmdb_snapshot import SnapshotRefresher, TMDBSnapshot, snapshot_path
+from common.title_index import TitleIndex
+from common.title_search import TitleSearchIndex
+from common.recommender_client import RecommenderClient
+
+metrics.begin_request("rerun", app="embedding")  # per-rerun total time; ended at the bottom of the script
 
 # -----------------------------
 # Load Model + Data
 # -----------------------------
+STORE_DIR = "Sentence-Transformer/movie_store"
+MODEL_PATH = "Sentence-Transformer/saved_model"
+RECOMMENDER_URL = os.environ.get("RECOMMENDER_URL")  # use the headless service (service/) instead of local models
+
 @st.cache_resource
+def load_metrics_exporter():
+    # Prometheus text on localhost:$METRICS_PORT/metrics when METRICS_ENABLED=1
+    return metrics.serve()
+
+load_metrics_exporter()
+
+# The model code (pandas) is imported on the loader thread, so the page shell does not wait for it
+@metrics.timed()
 def load_model():
-    return SentenceTransformer("Sentence-Transformer/saved_model")
+    if RECOMMENDER_URL:
+        return RecommenderClient(RECOMMENDER_URL, engine="embedding")
+    from embedding_recommender import EmbeddingRecommender
+
+    # Memory-mapped store built by embedding_store.py (shared across workers);
+    # uses the IVF index when ann_index.py has built one, exact search otherwise.
+    # The encoder for free-text search (sentence_transformers, and so torch) is
+    # only imported on the first free-text query; lookups need only NumPy.
+    return EmbeddingRecommender.load(STORE_DIR, model_path=MODEL_PATH)
+
+@metrics.timed()
+def load_catalog(recommender):
+    from embedding_store import load_metadata
+
+    movies = load_metadata(STORE_DIR) if RECOMMENDER_URL else recommender.movies
+    title_index = TitleIndex.from_frame(movies) if RECOMMENDER_URL else recommender.title_index
+    # O(1) title -> row IDs (years for duplicates), and prefix/fuzzy search for the sidebar
+    return movies, title_index, TitleSearchIndex(movies["names"])
+
+def load_resources(progress):
+    progress("Opening the embedding store...")
+    recommender = load_model()
+    progress("Indexing titles...")
+    return (recommender, *load_catalog(recommender))
+
+@st.cache_resource
+def start_loading():
+    # Store and indexes load on a background thread, once per process; the page shell renders meanwhile
+    return BackgroundLoader(load_resources)
 
-@st.cache_data
-def load_data():
-    with open("Sentence-Transformer/movies_data.pkl", "rb") as f:
-        data = pickle.load(f)
-    return data["movies"], data["embeddings"]
+loader = start_loading()
 
-model = load_model()
-movies, embeddings = load_data()
+def wait_for_models():
+    # The shell is already on screen; show what is loading until the models are in memory
+    if not loader.wait(0.05):
+        status, shown = st.empty(), None
+        while not loader.wait(0.25):
+            message = f"⏳ {loader.stage} ({loader.elapsed:.0f}s)"
+            if message != shown:
+                status.info(message)
+                shown = message
+        status.empty()
+    try:
+        return loader.result()
+    except Exception as exc:
+        st.error(f"Could not load the models: {exc}")
+        if st.button("🔄 Retry"):
+            start_loading.clear()
+            st.rerun()
+        st.stop()
 
 # --- TMDB API Setup ---
-BASE_URL = "https://api.themoviedb.org/3"
+BASE_URL = os.environ.get("TMDB_BASE_URL", "https://api.themoviedb.org/3")  # point at benchmarks/stub_tmdb.py for offline runs
 IMAGE_URL = "https://image.tmdb.org/t/p/w500"
+SNAPSHOT_PATH = snapshot_path("Sentence-Transformer")  # filled by `python -m common.tmdb_snapshot`
 API_KEY = st.secrets["API_KEY"]
 HEADERS = {
     "accept": "application/json",
     "Authorization": API_KEY
 }
 
-def search_movie_tmdb(query):
-    url = f"{BASE_URL}/search/movie?query={query}"
-    response = requests.get(url, headers=HEADERS).json()
-    return response.get("results", [])
+@st.cache_resource
+def load_tmdb_client():
+    # Pooled session with rate limiting, timeouts and retries on 429/5xx
+    return TMDBClient(headers=HEADERS, base_url=BASE_URL)
+
+@st.cache_resource
+def load_tmdb_snapshot():
+    # Row ID -> TMDB details, read locally; missing and stale rows are refreshed in the background
+    return SnapshotRefresher(TMDBSnapshot(SNAPSHOT_PATH), load_tmdb_client(), movies["names"].tolist(), title_index)
+
+@metrics.timed()
+def tmdb_details(titles):
+    # TMDB details for a whole grid in one indexed read, in order; None renders as "No Image"
+    return tmdb_snapshot.lookup(titles)
 
 # -----------------------------
 # Recommendation Function
 # -----------------------------
-def recommend(movie_name, top_k=15):
-    idx = movies[movies["names"].str.lower() == movie_name.lower()].index
-    if len(idx) == 0:
-        return None
-    idx = idx[0]
-
-    query_embedding = embeddings[idx]
+@st.cache_resource
+def load_prefetcher():
+    # Next-page recommendations for the cards on screen, shared by all sessions
+    return Prefetcher()
 
-    # cosine similarity (NumPy)
-    scores = np.dot(embeddings, query_embedding) / (
-        norm(embeddings, axis=1) * norm(query_embedding)
+@metrics.timed()
+def recommend(movie_name, top_k=15, row_id=None):
+    # row_id picks one of several movies sharing a title; default is the first.
+    # Cosine similarity on unit vectors, top-k via argpartition (skips the same movie);
+    # pages warmed by prefetch_next_pages() come straight from memory
+    row_id = title_index.first(movie_name) if row_id is None else row_id
+    return prefetcher.get(
+        (movie_name, row_id, top_k), lambda: recommender.recommend(movie_name, k=top_k, row_id=row_id)
     )
 
-    # top results (skip the same movie)
-    top_indices = np.argsort(scores)[::-1][1:top_k+1]
+def warm_next_page(movie_name):
+    # Runs on the prefetch pool: the page a click on this card would show
+    recs = recommender.recommend(movie_name, k=15, row_id=title_index.first(movie_name))
+    tmdb_details((recs or [])[:15])  # queues the cards' missing/stale snapshot rows for refresh
+    return recs
 
-    return movies.iloc[top_indices]["names"].tolist()
+def prefetch_next_pages(titles):
+    # Only a card on screen can be clicked next; warm all of their pages in the background
+    prefetcher.prefetch([((title, title_index.first(title), 15), partial(warm_next_page, title)) for title in titles])
+
+@metrics.timed()
+def search_text(query, top_k=15):
+    # Encode free text (cached + micro-batched) and search the embedding matrix
+    return recommender.search_text(query, k=top_k)
 
 # --- STREAMLIT PAGE CONFIG ---
 st.set_page_config(page_title="Movie Recommender", page_icon="🎬", layout="wide")
@@ -153,24 +239,83 @@ if "active_movie" not in st.session_state:
 # --- SIDEBAR SEARCH ---
 st.sidebar.header("🎥 Movie Search")
 st.sidebar.info("👉 Use the sidebar or click a movie to explore AI-powered recommendations.")
-all_movie_names = movies["names"].dropna().unique().tolist()
-
-sidebar_options = [""] + all_movie_names
-current_active = st.session_state.active_movie
-if current_active and current_active not in all_movie_names:
-    sidebar_options.append(current_active)
-try:
-    sidebar_index = sidebar_options.index(current_active) if current_active else 0
-except ValueError:
-    sidebar_index = 0
-
-sidebar_selection = st.sidebar.selectbox("Search a movie:", options=sidebar_options, index=sidebar_index)
-if sidebar_selection != st.session_state.active_movie:
-    st.session_state.active_movie = sidebar_selection
+
+# --- MODELS (loaded in the background) ---
+recommender, movies, title_index, title_search = wait_for_models()
+tmdb_snapshot = load_tmdb_snapshot()
+prefetcher = load_prefetcher()
+
+def select_match():
+    # Only a deliberate pick in the matches box changes the active movie
+    if st.session_state.title_match:
+        st.session_state.active_movie = st.session_state.title_match
+        # Back to blank, so picking the same title again after a card click still fires
+        st.session_state.title_match = ""
+
+# Only the top matches for the typed text are sent to the browser
+typed_title = st.sidebar.text_input("Search a movie:", placeholder="Start typing a title...")
+title_matches = title_search.search(typed_title, limit=10)
+if title_matches:
+    st.sidebar.selectbox("Matches:", options=[""] + title_matches, key="title_match", on_change=select_match)
+elif typed_title:
+    st.sidebar.caption("No matching titles.")
 active_movie_name = st.session_state.active_movie
 
+text_query = st.sidebar.text_input("...or describe a movie:", placeholder="heist movie with a twist ending").strip()
+
+# --- RECOMMENDATION GRID ---
+@metrics.timed("render_grid", grid="recommendations")
+def render_recommendation_grid(recs, key_prefix):
+    # All card posters/ratings from the local snapshot before rendering
+    rec_details = tmdb_details(recs[:15])
+    prefetch_next_pages(recs[:15])
+
+    # Show up to 15 recommendations in 3 rows of 5
+    for row_start in range(0, min(len(recs), 15), 5):
+        cols = st.columns(5)
+        for i, rec_title in enumerate(recs[row_start:row_start+5]):
+            with cols[i]:
+                st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
+
+                # Poster and info from the TMDB snapshot
+                rec_movie = rec_details[row_start + i]
+                if rec_movie:
+                    poster_path = rec_movie.get("poster_path")
+                    if poster_path:
+                        st.image(IMAGE_URL + poster_path, use_container_width=True)
+                    else:
+                        st.markdown(
+                            "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
+                            "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
+                            "🎬 No Image</div>",
+                            unsafe_allow_html=True,
+                        )
+                    st.markdown(f"<div class='movie-rating'>⭐ {rec_movie.get('vote_average','N/A')}/10</div>", unsafe_allow_html=True)
+                else:
+                    st.markdown(
+                        "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
+                        "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
+                        "🎬 No Image</div>",
+                        unsafe_allow_html=True,
+                    )
+                    st.markdown("<div class='movie-rating'>⭐ N/A</div>", unsafe_allow_html=True)
+
+                if st.button(rec_title, key=f"{key_prefix}_{row_start + i}"):
+                    st.session_state.active_movie = rec_title
+                    st.rerun()
+                st.markdown("</div>", unsafe_allow_html=True)
+
 # --- MAIN SCREEN ---
-if not active_movie_name:
+if not active_movie_name and text_query:
+    st.markdown(f"<div class='rec-header'><h2>🔎 Semantic Search Results for \"{text_query}\"</h2></div>", unsafe_allow_html=True)
+    st.markdown("---")
+
+    recs = search_text(text_query, top_k=15)
+    if recs:
+        render_recommendation_grid(recs, key_prefix="search")
+    else:
+        st.warning("No movies matched your description.")
+elif not active_movie_name:
     st.markdown(
         "<div class='hero'><div><h1>🎬 Movie Recommendation System</h1>"
         "<p>Discover movies similar to your favorites using Sentence Transformers! Search on the left to get started.</p></div></div>",
@@ -182,36 +327,39 @@ if not active_movie_name:
     # Show some popular movies from your dataset as default options
     popular_movies_sample = movies["names"].dropna().head(10).tolist()
     
-    # Display in rows of 5
-    for row_start in range(0, min(len(popular_movies_sample), 10), 5):
-        cols = st.columns(5)
-        for i, movie_title in enumerate(popular_movies_sample[row_start:row_start+5]):
-            with cols[i]:
-                st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
+    popular_details = tmdb_details(popular_movies_sample)
+    prefetch_next_pages(popular_movies_sample)
+
+    with metrics.span("render_grid", grid="popular"):
+        # Display in rows of 5
+        for row_start in range(0, min(len(popular_movies_sample), 10), 5):
+            cols = st.columns(5)
+            for i, movie_title in enumerate(popular_movies_sample[row_start:row_start+5]):
+                with cols[i]:
+                    st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
                 
-                # Try to get poster from TMDB
-                search_results = search_movie_tmdb(movie_title)
-                if search_results and search_results[0].get("poster_path"):
-                    st.image(IMAGE_URL + search_results[0]["poster_path"], use_container_width=True)
-                else:
-                    st.markdown(
-                        "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
-                        "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
-                        "🎬 No Image</div>",
-                        unsafe_allow_html=True,
-                    )
+                    # Poster from the TMDB snapshot
+                    details = popular_details[row_start + i]
+                    if details and details.get("poster_path"):
+                        st.image(IMAGE_URL + details["poster_path"], use_container_width=True)
+                    else:
+                        st.markdown(
+                            "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
+                            "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
+                            "🎬 No Image</div>",
+                            unsafe_allow_html=True,
+                        )
                 
-                if st.button(movie_title, key=f"popular_{row_start + i}"):
-                    st.session_state.active_movie = movie_title
-                    st.rerun()
-                st.markdown("</div>", unsafe_allow_html=True)
+                    if st.button(movie_title, key=f"popular_{row_start + i}"):
+                        st.session_state.active_movie = movie_title
+                        st.rerun()
+                    st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("---")
 else:
     # Show sidebar poster & info
-    search_results = search_movie_tmdb(active_movie_name)
-    if search_results:
-        selected_movie = search_results[0]
+    selected_movie = tmdb_details([active_movie_name])[0]
+    if selected_movie:
         poster_path = selected_movie.get("poster_path")
         if poster_path:
             st.sidebar.image(IMAGE_URL + poster_path, caption=active_movie_name, use_container_width=True)
@@ -220,6 +368,14 @@ else:
         if selected_movie.get("overview"):
             st.sidebar.markdown(f"**Overview:** {selected_movie['overview'][:200]}...")
 
+    # Several catalog rows can share a title; let the user pick which one
+    candidates = title_index.candidates(active_movie_name)
+    row_id = None
+    if len(candidates) > 1:
+        labels = [label for _, label in candidates]
+        choice = st.sidebar.selectbox("Several movies share this title:", labels, key=f"dup_{active_movie_name}")
+        row_id = candidates[labels.index(choice)][0]
+
     if st.sidebar.button("🔄 Clear Selection"):
         st.session_state.active_movie = ""
         st.rerun()
@@ -228,43 +384,11 @@ else:
     st.markdown("---")
 
     # Get recommendations from your Sentence Transformer model
-    recs = recommend(active_movie_name, top_k=15)
+    recs = recommend(active_movie_name, top_k=15, row_id=row_id)
     if recs:
-        # Show up to 15 recommendations in 3 rows of 5
-        for row_start in range(0, min(len(recs), 15), 5):
-            cols = st.columns(5)
-            for i, rec_title in enumerate(recs[row_start:row_start+5]):
-                with cols[i]:
-                    st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
-                    
-                    # Get poster and info from TMDB
-                    rec_results = search_movie_tmdb(rec_title)
-                    if rec_results:
-                        rec_movie = rec_results[0]
-                        poster_path = rec_movie.get("poster_path")
-                        if poster_path:
-                            st.image(IMAGE_URL + poster_path, use_container_width=True)
-                        else:
-                            st.markdown(
-                                "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
-                                "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
-                                "🎬 No Image</div>",
-                                unsafe_allow_html=True,
-                            )
-                        st.markdown(f"<div class='movie-rating'>⭐ {rec_movie.get('vote_average','N/A')}/10</div>", unsafe_allow_html=True)
-                    else:
-                        st.markdown(
-                            "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
-                            "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
-                            "🎬 No Image</div>",
-                            unsafe_allow_html=True,
-                        )
-                        st.markdown("<div class='movie-rating'>⭐ N/A</div>", unsafe_allow_html=True)
-                    
-                    if st.button(rec_title, key=f"rec_{active_movie_name}_{row_start + i}"):
-                        st.session_state.active_movie = rec_title
-                        st.rerun()
-                    st.markdown("</div>", unsafe_allow_html=True)
+        render_recommendation_grid(recs, key_prefix=f"rec_{active_movie_name}")
     else:
         st.warning("No recommendations found for this movie.")
         st.info("This movie might not be in our training dataset. Try searching for a different movie using the sidebar.")
+
+metrics.end_request()
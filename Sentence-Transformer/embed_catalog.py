@@ -0,0 +1,303 @@
+# embed_catalog.py
+#
+# Scriptable, restartable replacement for the notebook's single
+# model.encode(movies["overview"]) call. Writes the same movie_store/ layout
+# that embedding_store.load_store() reads, plus one overview hash per row.
+#
+#   1. The CSV is streamed in chunks of --shard-rows; each chunk is a shard.
+#      A first pass writes metadata.csv and hashes every overview so the
+#      embedding matrix can be preallocated as a .npy memmap.
+#   2. Rows whose overview hash matches a row of the previous store (built
+#      with the same model) are copied from it instead of re-encoded.
+#   3. The remaining texts of a shard are sorted by length, so every batch
+#      pads to similar lengths, and encoded on --workers CPU processes.
+#   4. Each finished shard is flushed and recorded in checkpoint.json. After
+#      a crash the same command resumes at the first unfinished shard.
+#
+# Usage (from the repo root):
+#     python Sentence-Transformer/embed_catalog.py \
+#         --csv Sentence-Transformer/imdb_movies.csv \
+#         --model Sentence-Transformer/saved_model \
+#         --out Sentence-Transformer/movie_store --workers 4
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from ann_index import INDEX_FILE
+from embedding_store import EMBEDDINGS_FILE, FORMAT_VERSION, MANIFEST_FILE, METADATA_FILE, fingerprint_embeddings
+from quantized import CODES_FILE
+from sharded import SHARDS_DIR
+
+HASHES_FILE = "overview_hashes.npy"
+CHECKPOINT_FILE = "checkpoint.json"
+PARTIAL_SUFFIX = ".partial"
+
+_model = None  # per worker process
+
+
+def _init_worker(model_path, threads):
+    global _model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)  # workers split the cores instead of oversubscribing them
+    _model = SentenceTransformer(model_path, device="cpu")
+
+
+def _dimension():
+    return _model.get_sentence_embedding_dimension()
+
+
+def _encode(texts, batch_size):
+    vectors = _model.encode(
+        list(texts), batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False
+    )
+    return vectors.astype(np.float32, copy=False)
+
+
+class EncoderPool:
+    """The model on `workers` CPU processes (in-process for workers <= 1), started on first use."""
+
+    def __init__(self, model_path, workers=1, batch_size=64):
+        self.model_path = model_path
+        self.workers = workers
+        self.batch_size = batch_size
+        self._pool = None
+        self._started = False
+
+    def _start(self):
+        if self._started:
+            return
+        threads = max(1, (os.cpu_count() or 1) // max(self.workers, 1))
+        if self.workers > 1:
+            import multiprocessing
+
+            # spawn: torch does not survive fork() once its thread pool exists
+            self._pool = multiprocessing.get_context("spawn").Pool(
+                self.workers, initializer=_init_worker, initargs=(self.model_path, threads)
+            )
+        else:
+            _init_worker(self.model_path, threads)
+        self._started = True
+
+    @property
+    def dimension(self):
+        self._start()
+        return self._pool.apply(_dimension) if self._pool is not None else _dimension()
+
+    def encode(self, texts):
+        """Yield (start, vectors) for consecutive batch_size slices of `texts`, in order."""
+        self._start()
+        starts = range(0, len(texts), self.batch_size)
+        batches = [texts[start:start + self.batch_size] for start in starts]
+        encode = partial(_encode, batch_size=self.batch_size)
+        results = self._pool.imap(encode, batches) if self._pool is not None else map(encode, batches)
+        yield from zip(starts, results)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+
+
+def overview_hashes(overviews):
+    """64-bit content hash of each overview, as uint64."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little") for text in overviews),
+        dtype=np.uint64,
+        count=len(overviews),
+    )
+
+
+def read_shards(csv_path, shard_rows):
+    """Stream the catalog in shards, dropping rows without a title or overview like the notebook."""
+    for chunk in pd.read_csv(csv_path, chunksize=shard_rows):
+        yield chunk.dropna(subset=["names", "overview"])
+
+
+class PreviousStore:
+    """Embeddings of the last run, looked up by overview hash."""
+
+    def __init__(self, hashes, embeddings):
+        self._order = np.argsort(hashes, kind="stable")
+        self._sorted = hashes[self._order]
+        self.embeddings = embeddings
+
+    @classmethod
+    def open(cls, directory, model_path, dim=None):
+        """The previous store in `directory`, or None if it is missing or was built with another model."""
+        try:
+            with open(os.path.join(directory, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            hashes = np.load(os.path.join(directory, HASHES_FILE))
+        except (OSError, ValueError):
+            return None
+        if manifest.get("model") != model_path or (dim is not None and manifest["dim"] != dim):
+            return None
+        embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode="r")
+        if len(hashes) != len(embeddings):
+            return None
+        return cls(hashes, embeddings)
+
+    @property
+    def dim(self):
+        return self.embeddings.shape[1]
+
+    def lookup(self, hashes):
+        """Previous row of each hash, or -1 where the overview is new or changed."""
+        if len(self._sorted) == 0:
+            return np.full(len(hashes), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted, hashes), len(self._sorted) - 1)
+        return np.where(self._sorted[pos] == hashes, self._order[pos], -1)
+
+
+def source_fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_checkpoint(directory, expected):
+    """The saved checkpoint if it belongs to the same source, model and sharding, else None."""
+    try:
+        with open(os.path.join(directory, CHECKPOINT_FILE)) as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if any(checkpoint.get(key) != value for key, value in expected.items()):
+        return None
+    if not os.path.exists(os.path.join(directory, EMBEDDINGS_FILE + PARTIAL_SUFFIX)):
+        return None
+    return checkpoint
+
+
+def save_checkpoint(directory, checkpoint):
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(path + ".tmp", path)  # a crash mid-write never leaves a torn checkpoint
+
+
+def scan_catalog(csv_path, shard_rows, metadata_path):
+    """First pass: write the metadata table and return every row's overview hash."""
+    hashes = []
+    for i, shard in enumerate(read_shards(csv_path, shard_rows)):
+        shard.to_csv(metadata_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        hashes.append(overview_hashes(shard["overview"].astype(str).tolist()))
+    return np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+
+
+def embed_catalog(csv_path, out_dir, model_path, shard_rows=10000, workers=1, batch_size=64):
+    """Build (or refresh) the embedding store in `out_dir` from `csv_path`; returns the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    partial_embeddings = os.path.join(out_dir, EMBEDDINGS_FILE + PARTIAL_SUFFIX)
+    partial_metadata = os.path.join(out_dir, METADATA_FILE + PARTIAL_SUFFIX)
+
+    hashes = scan_catalog(csv_path, shard_rows, partial_metadata)
+    expected = {
+        "source": source_fingerprint(csv_path),
+        "model": model_path,
+        "shard_rows": shard_rows,
+        "rows": int(len(hashes)),
+    }
+    encoder = EncoderPool(model_path, workers=workers, batch_size=batch_size)
+    previous = PreviousStore.open(out_dir, model_path)
+
+    checkpoint = load_checkpoint(out_dir, expected)
+    if checkpoint is not None:
+        embeddings = np.load(partial_embeddings, mmap_mode="r+")
+        print(f"↩️  Resuming: {len(checkpoint['done'])} shards already embedded")
+    else:
+        dim = previous.dim if previous is not None else encoder.dimension
+        # Plain .npy file, so it can be renamed into place and memory-mapped by load_store()
+        embeddings = np.lib.format.open_memmap(partial_embeddings, mode="w+", dtype=np.float32, shape=(len(hashes), dim))
+        checkpoint = dict(expected, dim=dim, done=[])
+        save_checkpoint(out_dir, checkpoint)
+    if previous is not None and previous.dim != embeddings.shape[1]:
+        previous = None
+
+    done = set(checkpoint["done"])
+    start = 0
+    reused = encoded = 0
+    try:
+        for shard_id, shard in enumerate(read_shards(csv_path, shard_rows)):
+            stop = start + len(shard)
+            if shard_id in done:
+                start = stop
+                continue
+            shard_started = time.perf_counter()
+
+            todo = np.arange(len(shard))
+            if previous is not None:
+                source_rows = previous.lookup(hashes[start:stop])
+                hit = source_rows >= 0
+                embeddings[start + todo[hit]] = previous.embeddings[source_rows[hit]]
+                todo = todo[~hit]
+                reused += int(hit.sum())
+
+            texts = shard["overview"].astype(str).to_numpy()[todo]
+            order = np.argsort([len(text) for text in texts], kind="stable")  # similar lengths share a batch
+            rows = start + todo[order]
+            for offset, vectors in encoder.encode(texts[order].tolist()):
+                embeddings[rows[offset:offset + len(vectors)]] = vectors
+            encoded += len(todo)
+
+            embeddings.flush()
+            checkpoint["done"].append(shard_id)
+            save_checkpoint(out_dir, checkpoint)
+            print(f"  shard {shard_id}: {len(shard)} rows, {len(todo)} encoded ({time.perf_counter() - shard_started:.1f}s)")
+            start = stop
+    finally:
+        encoder.close()
+
+    embeddings.flush()
+    fingerprint = fingerprint_embeddings(embeddings)
+    del embeddings
+    previous = None  # release the old mmap before its file is replaced
+
+    os.replace(partial_embeddings, os.path.join(out_dir, EMBEDDINGS_FILE))
+    os.replace(partial_metadata, os.path.join(out_dir, METADATA_FILE))
+    np.save(os.path.join(out_dir, HASHES_FILE), hashes)
+    manifest = {
+        "version": FORMAT_VERSION,
+        "dtype": "float32",
+        "rows": int(len(hashes)),
+        "dim": int(checkpoint["dim"]),
+        "normalized": True,
+        "model": model_path,
+        "fingerprint": fingerprint,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.remove(os.path.join(out_dir, CHECKPOINT_FILE))
+
+    print(f"✅ {manifest['rows']} rows: {encoded} encoded, {reused} reused from the previous store")
+    for derived, builder in ((INDEX_FILE, "ann_index.py"), (SHARDS_DIR, "sharded.py"), (CODES_FILE, "quantized.py")):
+        if os.path.exists(os.path.join(out_dir, derived)):
+            print(f"⚠️  {derived} predates these embeddings and will not load; rebuild it with {builder}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the movie catalog into a memory-mapped store, resumably.")
+    parser.add_argument("--csv", default="Sentence-Transformer/imdb_movies.csv", help="catalog with 'names' and 'overview'")
+    parser.add_argument("--model", default="Sentence-Transformer/saved_model", help="SentenceTransformer model path or name")
+    parser.add_argument("--out", default="Sentence-Transformer/movie_store", help="store directory")
+    parser.add_argument("--shard-rows", type=int, default=10000, help="CSV rows per shard/checkpoint")
+    parser.add_argument("--workers", type=int, default=1, help="CPU encoder processes")
+    parser.add_argument("--batch-size", type=int, default=64, help="texts per forward pass")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    embed_catalog(args.csv, args.out, args.model, args.shard_rows, args.workers, args.batch_size)
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
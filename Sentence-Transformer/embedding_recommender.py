@@ -0,0 +1,126 @@
+# embedding_recommender.py
+#
+# Sentence-Transformer recommendation logic, independent of Streamlit so
+# that both app.py and the headless service (service/) can load it.
+#
+# Expects the repo root on sys.path (for common/), as app.py and service/
+# both arrange.
+
+import os
+import threading
+
+import numpy as np
+
+from ann_index import INDEX_FILE, IVFIndex
+from common.seeds import check_aggregate, drop_masked, resolve_seeds, top_k_by_max
+from common.title_index import TitleIndex
+from embedding_store import load_store, store_fingerprint
+from quantized import QuantizedEngine, has_quantized
+from query_encoder import QueryEncoder
+from scoring import ScoringEngine
+from sharded import SHARDS_DIR, ShardedEngine, has_shards
+
+
+class EmbeddingRecommender:
+    def __init__(self, movies, backend, model_path=None, title_index=None):
+        self.movies = movies
+        self.backend = backend
+        self.model_path = model_path
+        self.title_index = title_index if title_index is not None else TitleIndex.from_frame(movies)
+        self._encoder = None
+        self._encoder_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, store_dir, model_path=None, title_index=None):
+        """Open the embedding store with the best backend built for it.
+
+        The IVF index from ann_index.py wins, then the shards from
+        sharded.py, then the int8 codes from quantized.py, then exact
+        float32 search. A backend built from other embeddings than the
+        store's raises ValueError instead of serving stale vectors.
+        """
+        movies, embeddings = load_store(store_dir)
+        fingerprint = store_fingerprint(store_dir)
+        index_path = os.path.join(store_dir, INDEX_FILE)
+        shards_dir = os.path.join(store_dir, SHARDS_DIR)
+        if os.path.exists(index_path):
+            backend = IVFIndex.load(index_path, embeddings, fingerprint=fingerprint)
+        elif has_shards(shards_dir):
+            backend = ShardedEngine.load(shards_dir, embeddings, fingerprint=fingerprint)
+        elif has_quantized(store_dir):
+            backend = QuantizedEngine.load(store_dir, embeddings, fingerprint=fingerprint)
+        else:
+            backend = ScoringEngine(embeddings)
+        return cls(movies, backend, model_path, title_index)
+
+    @property
+    def encoder(self):
+        """Free-text query encoder, loaded on first use (needs `model_path`)."""
+        with self._encoder_lock:
+            if self._encoder is None:
+                if self.model_path is None:
+                    raise RuntimeError("Free-text search needs a SentenceTransformer model path")
+                from sentence_transformers import SentenceTransformer
+
+                self._encoder = QueryEncoder(SentenceTransformer(self.model_path), cache_size=1024)
+            return self._encoder
+
+    def _titles(self, ids):
+        return self.movies["names"].iloc[ids[ids >= 0]].tolist()
+
+    def neighbors(self, row_id, k=15):
+        """(ids, scores) of the k movies most similar to catalog row `row_id`."""
+        return self.backend.top_k(row_id, k=k)
+
+    def recommend(self, movie_title, k=15, row_id=None):
+        """Titles of the k most similar movies, or None if the title is unknown."""
+        idx = self.title_index.first(movie_title) if row_id is None else row_id
+        if idx is None:
+            return None
+        ids, _ = self.neighbors(idx, k)
+        return self._titles(ids)
+
+    def neighbors_many(self, row_ids, k=15):
+        """(batch, k) ids and scores for several catalog rows, scored as one batch."""
+        return self.backend.top_k_batch(row_ids, k=k)
+
+    def recommend_many(self, titles, k=15):
+        """recommend() for a list of titles, scored as one batch; unknown titles get None."""
+        row_ids = [self.title_index.first(title) for title in titles]
+        known = [i for i, row_id in enumerate(row_ids) if row_id is not None]
+        results = [None] * len(titles)
+        if known:
+            ids, _ = self.neighbors_many([row_ids[i] for i in known], k)
+            for i, row in zip(known, ids):
+                results[i] = self._titles(row)
+        return results
+
+    def seed_neighbors(self, seed_ids, weights, masked, k=15, aggregate="centroid"):
+        """(ids, scores) of the k movies closest to several weighted seeds, none of them in `masked`."""
+        check_aggregate(aggregate)
+        vectors = np.asarray(self.backend.embeddings[np.asarray(seed_ids)], dtype=np.float32)
+        depth = k + len(masked)  # enough rows that k survive the mask
+        if aggregate == "centroid":
+            query = weights @ vectors
+            query /= max(np.linalg.norm(query), 1e-12)
+            ids, scores = self.backend.search_vectors(query, k=depth)
+            return drop_masked(ids[0], scores[0], masked, k)
+        ids, scores = self.backend.search_vectors(vectors, k=depth)  # all seeds in one GEMM
+        return top_k_by_max(ids, scores, weights, masked, k)
+
+    def recommend_seeds(self, titles, weights=None, exclude=(), k=15, aggregate="centroid"):
+        """Titles of the k movies most like all of `titles`, or None if none of them is known."""
+        seed_ids, weights, masked = resolve_seeds(self.title_index, titles, weights, exclude)
+        if len(seed_ids) == 0:
+            return None
+        ids, _ = self.seed_neighbors(seed_ids, weights, masked, k, aggregate)
+        return self._titles(ids)
+
+    def search_vectors(self, query, k=15):
+        """(ids, scores) of the k movies closest to a free-text query."""
+        ids, scores = self.backend.search_vectors(self.encoder.encode(query), k=k)
+        return ids[0], scores[0]
+
+    def search_text(self, query, k=15):
+        ids, _ = self.search_vectors(query, k)
+        return self._titles(ids)
@@ -0,0 +1,137 @@
+# embedding_store.py
+#
+# Versioned on-disk format for the movie embeddings:
+#
+#   movie_store/
+#   ├── manifest.json     # format version, dtype, shape, content fingerprint
+#   ├── embeddings.npy    # L2-normalized float32 (or float16) matrix
+#   └── metadata.csv      # one row per embedding row (names, overview, ...)
+#
+# The matrix is opened with np.load(mmap_mode="r"), so every Streamlit worker
+# on a host shares the same page cache instead of unpickling a private copy.
+#
+# The fingerprint is a hash of the matrix contents. The IVF index, the int8
+# codes and the shards record the fingerprint of the embeddings they were
+# built from, and refuse to load against a store whose matrix has changed
+# since (a re-embedded catalog of the same size would otherwise be served
+# from the old vectors).
+#
+# Convert the notebook's pickle (from the repo root):
+#     python Sentence-Transformer/embedding_store.py \
+#         --pickle Sentence-Transformer/movies_data.pkl \
+#         --out Sentence-Transformer/movie_store [--float16]
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.csv"
+
+
+def normalize_rows(embeddings):
+    """Return a float32 copy of `embeddings` with unit-length rows."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def fingerprint_embeddings(embeddings, chunk_rows=16384):
+    """Hash of the matrix dtype, shape and contents, read chunk by chunk."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{embeddings.dtype.str}{tuple(embeddings.shape)}".encode())
+    for start in range(0, embeddings.shape[0], chunk_rows):
+        digest.update(np.ascontiguousarray(embeddings[start:start + chunk_rows]))
+    return digest.hexdigest()
+
+
+def store_fingerprint(directory):
+    """The store's fingerprint, or None for stores written before fingerprints were recorded."""
+    return read_manifest(directory).get("fingerprint")
+
+
+def check_fingerprint(artifact, built_from, fingerprint):
+    """Raise unless `artifact` was built from the embeddings with `fingerprint` (None skips the check)."""
+    if fingerprint is not None and built_from != fingerprint:
+        raise ValueError(f"{artifact}: built from other embeddings than the store's; rebuild it")
+
+
+def save_store(directory, movies, embeddings, dtype="float32"):
+    if dtype not in ("float32", "float16"):
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    if len(movies) != len(embeddings):
+        raise ValueError(f"{len(movies)} metadata rows but {len(embeddings)} embeddings")
+
+    os.makedirs(directory, exist_ok=True)
+    matrix = normalize_rows(embeddings).astype(dtype)
+    np.save(os.path.join(directory, EMBEDDINGS_FILE), matrix)
+    movies.reset_index(drop=True).to_csv(os.path.join(directory, METADATA_FILE), index=False)
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "dtype": dtype,
+        "rows": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]),
+        "normalized": True,
+        "fingerprint": fingerprint_embeddings(matrix),
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Embedding store version {manifest.get('version')} is not supported (expected {FORMAT_VERSION})"
+        )
+    return manifest
+
+
+def load_metadata(directory):
+    """Only the metadata table, for callers that never touch the embeddings."""
+    read_manifest(directory)
+    return pd.read_csv(os.path.join(directory, METADATA_FILE))
+
+
+def load_store(directory):
+    """Return (movies, embeddings) with the embeddings memory-mapped read-only."""
+    manifest = read_manifest(directory)
+    embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode="r")
+    if embeddings.shape != (manifest["rows"], manifest["dim"]):
+        raise ValueError(f"Embedding matrix shape {embeddings.shape} does not match the manifest")
+    movies = pd.read_csv(os.path.join(directory, METADATA_FILE))
+    if len(movies) != manifest["rows"]:
+        raise ValueError(f"{len(movies)} metadata rows but {manifest['rows']} embeddings")
+    return movies, embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert movies_data.pkl into a memory-mappable embedding store.")
+    parser.add_argument("--pickle", default="Sentence-Transformer/movies_data.pkl", help="notebook output to convert")
+    parser.add_argument("--out", default="Sentence-Transformer/movie_store", help="store directory")
+    parser.add_argument("--float16", action="store_true", help="store embeddings as float16")
+    args = parser.parse_args()
+
+    with open(args.pickle, "rb") as f:
+        data = pickle.load(f)
+    embeddings = data["embeddings"]
+    if hasattr(embeddings, "cpu"):  # torch tensor from convert_to_tensor=True
+        embeddings = embeddings.cpu().numpy()
+
+    manifest = save_store(args.out, data["movies"], embeddings, dtype="float16" if args.float16 else "float32")
+    print(f"✅ Saved {manifest['rows']} x {manifest['dim']} {manifest['dtype']} embeddings to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# quantized.py
+#
+# int8 scalar-quantized copy of the embedding store, a quarter the size of
+# the float32 matrix.
+#
+# Each dimension d is mapped linearly onto [-128, 127]:
+#
+#     x[d] ~= code[d] * scale[d] + offset[d]
+#
+# so a query's dot product with a row is (query * scale) @ code + query @ offset.
+# QuantizedEngine scans the int8 codes in chunks to shortlist k * rerank
+# candidates, then re-ranks them exactly against the float32 rows, which
+# stay memory-mapped on disk: only the shortlisted rows are ever paged in.
+#
+# Build and report overlap@k against the float path (from the repo root):
+#     python Sentence-Transformer/quantized.py --store Sentence-Transformer/movie_store --report quantization_report.md
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from embedding_store import check_fingerprint
+from scoring import ScoringEngine, SearchBackend, select_top_k
+
+QUANT_VERSION = 1
+CODES_FILE = "embeddings_int8.npy"
+PARAMS_FILE = "quantization.npz"
+
+
+def fit_quantizer(embeddings, chunk_rows=65536):
+    """Per-dimension (scale, offset) spanning each dimension's min..max."""
+    low = np.full(embeddings.shape[1], np.inf, dtype=np.float32)
+    high = np.full(embeddings.shape[1], -np.inf, dtype=np.float32)
+    for start in range(0, len(embeddings), chunk_rows):
+        chunk = np.asarray(embeddings[start:start + chunk_rows], dtype=np.float32)
+        low = np.minimum(low, chunk.min(axis=0))
+        high = np.maximum(high, chunk.max(axis=0))
+    scale = (high - low) / 255
+    scale[scale == 0] = 1.0
+    return scale, low + 128 * scale
+
+
+def quantize(embeddings, scale, offset, chunk_rows=65536, out=None):
+    """int8 codes of `embeddings`, written chunk by chunk into `out` if given."""
+    if out is None:
+        out = np.empty(embeddings.shape, dtype=np.int8)
+    for start in range(0, len(embeddings), chunk_rows):
+        chunk = np.asarray(embeddings[start:start + chunk_rows], dtype=np.float32)
+        out[start:start + len(chunk)] = np.clip(np.rint((chunk - offset) / scale), -128, 127)
+    return out
+
+
+def build_quantized(store_dir, embeddings, chunk_rows=65536, fingerprint=None):
+    """Write the int8 codes and their scale/offset next to the float matrix in `store_dir`.
+
+    `fingerprint` is the store's (embedding_store.store_fingerprint), checked again on load.
+    """
+    scale, offset = fit_quantizer(embeddings, chunk_rows)
+    codes = np.lib.format.open_memmap(
+        os.path.join(store_dir, CODES_FILE), mode="w+", dtype=np.int8, shape=embeddings.shape
+    )
+    quantize(embeddings, scale, offset, chunk_rows, out=codes)
+    codes.flush()
+    np.savez(os.path.join(store_dir, PARAMS_FILE), version=QUANT_VERSION, scale=scale, offset=offset,
+             store_fingerprint=fingerprint or "")
+    return codes, scale, offset
+
+
+def has_quantized(store_dir):
+    return os.path.exists(os.path.join(store_dir, CODES_FILE)) and os.path.exists(os.path.join(store_dir, PARAMS_FILE))
+
+
+class QuantizedEngine(SearchBackend):
+    """int8 shortlist over all rows, exact float32 re-rank of the best k * rerank."""
+
+    def __init__(self, codes, scale, offset, embeddings, rerank=4, chunk_rows=16384):
+        if codes.shape != embeddings.shape:
+            raise ValueError(f"int8 codes {codes.shape} do not match the embedding matrix {embeddings.shape}")
+        self.codes = codes
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.offset = np.asarray(offset, dtype=np.float32)
+        self.embeddings = embeddings  # float32 rows, read only for query rows and re-ranking
+        self.rerank = rerank
+        self.chunk_rows = chunk_rows
+
+    @classmethod
+    def load(cls, store_dir, embeddings, rerank=4, fingerprint=None):
+        with np.load(os.path.join(store_dir, PARAMS_FILE)) as params:
+            if int(params["version"]) != QUANT_VERSION:
+                raise ValueError(f"Quantized store version {int(params['version'])} is not supported (expected {QUANT_VERSION})")
+            scale, offset = params["scale"], params["offset"]
+            built_from = str(params["store_fingerprint"]) if "store_fingerprint" in params.files else None
+        check_fingerprint("int8 codes", built_from, fingerprint)
+        codes = np.load(os.path.join(store_dir, CODES_FILE), mmap_mode="r")
+        return cls(codes, scale, offset, embeddings, rerank=rerank)
+
+    def approximate_scores(self, queries):
+        """(batch, rows) dot products against the dequantized matrix."""
+        scaled = queries * self.scale
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), self.chunk_rows):
+            chunk = self.codes[start:start + self.chunk_rows].astype(np.float32)  # one chunk upcast at a time
+            scores[:, start:start + len(chunk)] = scaled @ chunk.T
+        scores += (queries @ self.offset)[:, None]
+        return scores
+
+    def search_vectors(self, queries, k=15, exclude=None):
+        """Top-k rows for each query: int8 shortlist, then exact re-rank from the float32 rows."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        approx = self.approximate_scores(queries)
+        if exclude is not None:
+            approx[np.arange(len(approx)), np.asarray(exclude)] = -np.inf
+        shortlist, _ = select_top_k(approx, max(k, k * self.rerank))
+
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, query in enumerate(queries):
+            cand = np.sort(shortlist[row])  # sequential reads from the memory-mapped matrix
+            if exclude is not None:
+                cand = cand[cand != exclude[row]]
+            cand_scores = np.asarray(self.embeddings[cand], dtype=np.float32) @ query
+            top, top_scores = select_top_k(cand_scores, k)
+            n = top.shape[1]
+            ids[row, :n] = cand[top[0]]
+            scores[row, :n] = top_scores[0]
+        return ids, scores
+
+
+def compare(backend, exact, query_ids, k):
+    """(overlap@k, largest gap between the i-th best scores) of `backend` against exact search.
+
+    Overlap counts shared row IDs, so rows tied on score (duplicate
+    overviews) can lower it even when the returned scores are identical.
+    """
+    ids, scores = backend.top_k_batch(query_ids, k=k)
+    exact_ids, exact_scores = exact.top_k_batch(query_ids, k=k)
+    overlap = np.mean([len(np.intersect1d(a[a >= 0], e)) / k for a, e in zip(ids, exact_ids)])
+    return float(overlap), float(np.abs(scores - exact_scores).max())
+
+
+def time_per_query(backend, query_ids, k):
+    start = time.perf_counter()
+    for idx in query_ids:
+        backend.top_k(idx, k=k)
+    return (time.perf_counter() - start) / len(query_ids)
+
+
+def main():
+    from embedding_store import load_store, store_fingerprint
+
+    parser = argparse.ArgumentParser(description="Build the int8 embedding store and report overlap@k against float32.")
+    parser.add_argument("--store", default="Sentence-Transformer/movie_store", help="embedding store directory")
+    parser.add_argument("--rerank", type=int, nargs="+", default=[1, 2, 4, 8], help="shortlist multipliers to evaluate")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=500, help="sample queries for the overlap check")
+    parser.add_argument("--report", default=None, help="also write the results as a Markdown table here")
+    args = parser.parse_args()
+
+    _, embeddings = load_store(args.store)
+    start = time.perf_counter()
+    codes, scale, offset = build_quantized(args.store, embeddings, fingerprint=store_fingerprint(args.store))
+    print(f"Quantized {codes.shape[0]} x {codes.shape[1]} embeddings in {time.perf_counter() - start:.1f}s")
+
+    exact = ScoringEngine(embeddings)
+    query_ids = np.random.default_rng(0).choice(len(exact), min(args.queries, len(exact)), replace=False)
+    float_bytes = exact.embeddings.astype(np.float32, copy=False).nbytes
+    rows = [("float32 (exact)", float_bytes, 1.0, 0.0, time_per_query(exact, query_ids, args.k))]
+    for rerank in args.rerank:
+        engine = QuantizedEngine(codes, scale, offset, embeddings, rerank=rerank)
+        overlap, gap = compare(engine, exact, query_ids, args.k)
+        rows.append((f"int8, re-rank top {rerank * args.k}", codes.nbytes, overlap, gap, time_per_query(engine, query_ids, args.k)))
+
+    lines = [
+        f"| Mode | Resident matrix | overlap@{args.k} | max score gap | ms / query |",
+        "|---|---:|---:|---:|---:|",
+    ]
+    for name, nbytes, overlap, gap, seconds in rows:
+        lines.append(f"| {name} | {nbytes / 2**20:.1f} MiB | {overlap:.4f} | {gap:.1e} | {seconds * 1e3:.2f} |")
+    table = "\n".join(lines)
+    print(table)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            f.write(f"# int8 quantization: overlap@{args.k} against float32\n\n")
+            f.write(f"{codes.shape[0]} rows x {codes.shape[1]} dims, {len(query_ids)} catalog rows as queries.\n\n")
+            f.write(table + "\n")
+        print(f"Report written to {args.report}")
+    print(f"✅ int8 codes saved to {os.path.join(args.store, CODES_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# query_encoder.py
+#
+# Encodes free-text queries ("heist movie with a twist ending") with the
+# SentenceTransformer model for semantic search.
+#
+# The encoder forward pass dominates latency in this mode, so:
+#   * results go into a bounded LRU cache keyed by the normalized text, and
+#   * concurrent callers are micro-batched: a single worker thread drains
+#     all pending queries (up to max_batch, waiting at most max_wait seconds
+#     for stragglers) and encodes them in one model.encode() call.
+
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping with a fixed number of entries."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def normalize_query(text):
+    return " ".join(text.lower().split())
+
+
+class QueryEncoder:
+    def __init__(self, model, cache_size=1024, max_batch=32, max_wait=0.005):
+        self.model = model
+        self.cache = LRUCache(cache_size)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="query-encoder", daemon=True)
+        self._worker.start()
+
+    def encode(self, text, timeout=None):
+        """Return the unit-length float32 embedding of `text`."""
+        key = normalize_query(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        future = Future()
+        self._pending.put((key, future))
+        return future.result(timeout=timeout)
+
+    def _next_batch(self):
+        batch = [self._pending.get()]  # block until there is work
+        try:
+            while len(batch) < self.max_batch:
+                batch.append(self._pending.get(timeout=self.max_wait))
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            # Duplicate texts in one batch share a single encoder slot
+            texts = list(dict.fromkeys(key for key, _ in batch))
+            try:
+                vectors = self.model.encode(texts, batch_size=len(texts), normalize_embeddings=True, convert_to_numpy=True)
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            encoded = {}
+            for text, vector in zip(texts, np.asarray(vectors, dtype=np.float32)):
+                encoded[text] = vector
+                self.cache.put(text, vector)
+            for key, future in batch:
+                future.set_result(encoded[key])
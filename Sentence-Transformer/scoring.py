@@ -0,0 +1,74 @@
+# scoring.py
+#
+# Cosine top-k search over the movie embeddings.
+#
+# The saved model ends with a Normalize module and embedding_store.py saves
+# unit-length rows, so cosine similarity is a plain dot product: one GEMV per
+# query (one GEMM per batch), then np.argpartition to pick the k best rows
+# followed by a sort of just those k.
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from embedding_store import normalize_rows
+
+
+def select_top_k(scores, k):
+    """Return (ids, scores) of the k highest entries in each row of `scores`, best first."""
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+    part = np.argpartition(scores, -k, axis=1)[:, -k:]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class SearchBackend(ABC):
+    """Interface shared by the exact engine and the ANN indexes in ann_index.py.
+
+    Subclasses set `self.embeddings` (unit rows) and implement search_vectors();
+    one that does not cannot be instantiated.
+    """
+
+    embeddings = None
+
+    def __len__(self):
+        return self.embeddings.shape[0]
+
+    @abstractmethod
+    def search_vectors(self, queries, k=15, exclude=None):
+        """(batch, k) row IDs and scores for each query vector, excluding `exclude[i]` from query i."""
+
+    def top_k(self, idx, k=15):
+        """Top-k neighbors of catalog row `idx`, excluding the row itself."""
+        ids, scores = self.top_k_batch([idx], k=k)
+        return ids[0], scores[0]
+
+    def top_k_batch(self, indices, k=15):
+        """(batch, k) neighbor IDs and scores for several catalog rows."""
+        indices = np.asarray(indices)
+        return self.search_vectors(self.embeddings[indices], k=k, exclude=indices)
+
+
+class ScoringEngine(SearchBackend):
+    """Exact brute-force search: one GEMV per query, one GEMM per batch."""
+
+    def __init__(self, embeddings, normalized=True):
+        # float16 stores are upcast once here; NumPy has no fast float16 GEMM.
+        embeddings = np.asarray(embeddings)
+        if embeddings.dtype != np.float32:
+            embeddings = embeddings.astype(np.float32)
+        self.embeddings = embeddings if normalized else normalize_rows(embeddings)
+
+    def search_vectors(self, queries, k=15, exclude=None):
+        """Top-k rows for each query vector in `queries` (shape (batch, dim)).
+
+        `exclude` is an optional array of one row ID per query that must not
+        appear in that query's results (typically the query movie itself).
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        scores = queries @ self.embeddings.T
+        if exclude is not None:
+            scores[np.arange(len(scores)), np.asarray(exclude)] = -np.inf
+        return select_top_k(scores, k)
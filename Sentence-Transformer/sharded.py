@@ -0,0 +1,222 @@
+# sharded.py
+#
+# Exact top-k search over a catalog split into row shards, so a scan over
+# millions of movies runs on every core instead of one:
+#
+#   movie_store/shards/
+#   ├── manifest.json     # format version, rows, dim, shard row offsets, store fingerprint
+#   ├── shard_000.npy     # float32 rows offsets[0]:offsets[1], memory-mapped
+#   └── ...
+#
+# Every query batch is scored against all shards on a pool of worker
+# threads. Each worker runs one GEMM over its shard and np.argpartition for
+# a local top-k; both release the GIL, so the shards really are scored in
+# parallel. The coordinator then merges the n_shards * k candidates into
+# the global top-k, which is the same as ScoringEngine's.
+#
+# The workers are the parallelism: with more than one, BLAS is held to one
+# thread for the duration of each parallel search (through threadpoolctl
+# when installed, otherwise set OPENBLAS_NUM_THREADS=1), as concurrent
+# multi-threaded BLAS calls would fight over the same cores. BLAS thread
+# counts are process-wide, so other BLAS calls made while a search runs are
+# single-threaded too; the previous limits are restored once the last
+# concurrent search returns. Shards are files of their own, so the page
+# cache can hold the hot ones and a shard never needs a copy in memory.
+# A few more shards than workers evens out uneven shard times.
+#
+# Build and check against exact search (from the repo root):
+#     python Sentence-Transformer/sharded.py --store Sentence-Transformer/movie_store --shards 16 --workers 8
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+
+from embedding_store import check_fingerprint
+from scoring import ScoringEngine, SearchBackend, select_top_k
+
+SHARD_VERSION = 1
+SHARDS_DIR = "shards"
+SHARD_MANIFEST = "manifest.json"
+DEFAULT_WORKERS = int(os.environ.get("EMBEDDING_SEARCH_WORKERS", os.cpu_count() or 1))
+
+
+def shard_offsets(rows, n_shards):
+    """Row offsets splitting `rows` into `n_shards` near-equal contiguous shards."""
+    n_shards = max(1, min(n_shards, rows))
+    return np.array([i * rows // n_shards for i in range(n_shards + 1)], dtype=np.int64)
+
+
+def _shard_path(directory, i):
+    return os.path.join(directory, f"shard_{i:03d}.npy")
+
+
+def build_shards(directory, embeddings, n_shards, chunk_rows=65536, fingerprint=None):
+    """Write `embeddings` as `n_shards` float32 shard files plus a manifest into `directory`.
+
+    `fingerprint` is the store's (embedding_store.store_fingerprint), checked again on load.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for stale in glob.glob(os.path.join(directory, "shard_*.npy")):
+        os.remove(stale)
+    offsets = shard_offsets(embeddings.shape[0], n_shards)
+    for i, (start, end) in enumerate(zip(offsets[:-1].tolist(), offsets[1:].tolist())):
+        shard = np.lib.format.open_memmap(
+            _shard_path(directory, i), mode="w+", dtype=np.float32, shape=(end - start, embeddings.shape[1])
+        )
+        for chunk in range(start, end, chunk_rows):
+            shard[chunk - start:min(chunk + chunk_rows, end) - start] = embeddings[chunk:min(chunk + chunk_rows, end)]
+        shard.flush()
+        del shard
+    manifest = {
+        "version": SHARD_VERSION,
+        "rows": int(embeddings.shape[0]),
+        "dim": int(embeddings.shape[1]),
+        "offsets": offsets.tolist(),
+        "store_fingerprint": fingerprint,
+    }
+    with open(os.path.join(directory, SHARD_MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def has_shards(directory):
+    return os.path.exists(os.path.join(directory, SHARD_MANIFEST))
+
+
+_blas_lock = threading.Lock()
+_blas_holders = 0
+_blas_limiter = None  # threadpoolctl limiter while any search holds BLAS to one thread
+_blas_controller = None
+
+
+@contextmanager
+def single_threaded_blas():
+    """Hold BLAS to one thread inside the block; the previous limits return when the last holder exits.
+
+    A no-op without threadpoolctl. The limit is process-wide while it is held.
+    """
+    global _blas_holders, _blas_limiter, _blas_controller
+    with _blas_lock:
+        if _blas_holders == 0:
+            try:
+                from threadpoolctl import ThreadpoolController
+            except ImportError:
+                ThreadpoolController = None
+            if ThreadpoolController is not None:
+                if _blas_controller is None:
+                    _blas_controller = ThreadpoolController()  # finding the loaded BLAS libraries is the slow part
+                _blas_limiter = _blas_controller.limit(limits=1, user_api="blas")
+        _blas_holders += 1
+    try:
+        yield
+    finally:
+        with _blas_lock:
+            _blas_holders -= 1
+            if _blas_holders == 0 and _blas_limiter is not None:
+                _blas_limiter.restore_original_limits()
+                _blas_limiter = None
+
+
+class ShardedEngine(SearchBackend):
+    """Exact search: a local top-k per shard on `workers` threads, merged into the global top-k."""
+
+    def __init__(self, shards, offsets, embeddings, workers=DEFAULT_WORKERS):
+        if len(shards) != len(offsets) - 1 or offsets[-1] != embeddings.shape[0]:
+            raise ValueError(f"{len(shards)} shards over {offsets[-1]} rows do not match the embedding matrix")
+        self.shards = shards  # float32 row blocks, shards[i] holds rows offsets[i]:offsets[i + 1]
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.embeddings = embeddings  # full matrix, read only for query rows (top_k, seeds)
+        self.workers = max(1, min(workers, len(shards)))
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="shard") if self.workers > 1 else None
+
+    @property
+    def n_shards(self):
+        return len(self.shards)
+
+    @classmethod
+    def from_matrix(cls, embeddings, n_shards, workers=DEFAULT_WORKERS):
+        """Shards as row slices of one matrix (views of it when it is float32)."""
+        offsets = shard_offsets(embeddings.shape[0], n_shards)
+        shards = [np.asarray(embeddings[start:end], dtype=np.float32) for start, end in zip(offsets[:-1], offsets[1:])]
+        return cls(shards, offsets, embeddings, workers)
+
+    @classmethod
+    def load(cls, directory, embeddings, workers=DEFAULT_WORKERS, fingerprint=None):
+        with open(os.path.join(directory, SHARD_MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get("version") != SHARD_VERSION:
+            raise ValueError(f"Shard format version {manifest.get('version')} is not supported (expected {SHARD_VERSION})")
+        if (manifest["rows"], manifest["dim"]) != tuple(embeddings.shape):
+            raise ValueError("Shards were built for a different embedding matrix")
+        check_fingerprint("Shards", manifest.get("store_fingerprint"), fingerprint)
+        offsets = manifest["offsets"]
+        shards = [np.load(_shard_path(directory, i), mmap_mode="r") for i in range(len(offsets) - 1)]
+        return cls(shards, offsets, embeddings, workers)
+
+    def _search_shard(self, i, queries, k, exclude):
+        """Local top-k of shard i, as global row IDs."""
+        start = self.offsets[i]
+        scores = queries @ self.shards[i].T
+        if exclude is not None:
+            local = exclude - start
+            inside = (local >= 0) & (local < scores.shape[1])
+            scores[np.flatnonzero(inside), local[inside]] = -np.inf
+        ids, top_scores = select_top_k(scores, k)
+        return ids + start, top_scores
+
+    def search_vectors(self, queries, k=15, exclude=None):
+        """Top-k rows for each query vector, exactly as ScoringEngine.search_vectors."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if exclude is not None:
+            exclude = np.asarray(exclude, dtype=np.int64)
+        shard_ids = range(self.n_shards)
+        if self._pool is None:
+            parts = [self._search_shard(i, queries, k, exclude) for i in shard_ids]
+        else:
+            with single_threaded_blas():
+                parts = list(self._pool.map(lambda i: self._search_shard(i, queries, k, exclude), shard_ids))
+        ids = np.concatenate([part[0] for part in parts], axis=1)
+        scores = np.concatenate([part[1] for part in parts], axis=1)
+        top, top_scores = select_top_k(scores, k)
+        return np.take_along_axis(ids, top, axis=1), top_scores
+
+
+def main():
+    from embedding_store import load_store, store_fingerprint
+
+    parser = argparse.ArgumentParser(
+        description="Split the embedding store into shards and check them against exact search."
+    )
+    parser.add_argument("--store", default="Sentence-Transformer/movie_store", help="embedding store directory")
+    parser.add_argument("--shards", type=int, default=2 * (os.cpu_count() or 1), help="number of shard files")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="search threads")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=200, help="sample queries for the check")
+    args = parser.parse_args()
+
+    _, embeddings = load_store(args.store)
+    directory = os.path.join(args.store, SHARDS_DIR)
+    start = time.perf_counter()
+    fingerprint = store_fingerprint(args.store)
+    manifest = build_shards(directory, embeddings, args.shards, fingerprint=fingerprint)
+    print(f"Wrote {len(manifest['offsets']) - 1} shards of {manifest['rows']} rows in {time.perf_counter() - start:.1f}s")
+
+    query_ids = np.random.default_rng(0).choice(len(embeddings), min(args.queries, len(embeddings)), replace=False)
+    exact = ScoringEngine(embeddings)
+    exact_ids, exact_scores = exact.top_k_batch(query_ids, k=args.k)
+    engine = ShardedEngine.load(directory, embeddings, workers=args.workers, fingerprint=fingerprint)
+    ids, scores = engine.top_k_batch(query_ids, k=args.k)
+    overlap = np.mean([len(np.intersect1d(a, e)) / args.k for a, e in zip(ids, exact_ids)])
+    print(f"overlap@{args.k} with exact search: {overlap:.4f} (max score gap {np.abs(scores - exact_scores).max():.1e})")
+    print(f"✅ Shards saved to {directory}; search with {engine.workers} worker(s)")
+
+
+if __name__ == "__main__":
+    main()
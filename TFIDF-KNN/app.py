@@ -1,43 +1,135 @@
 import streamlit as st
-import pandas as pd
-import requests
-import joblib
+import os
+import sys
+from functools import partial
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common import metrics
+from common.model_loader import BackgroundLoader
+from common.prefetch import Prefetcher
+from common.tmdb_client import TMDBClient
+from common.tmdb_snapshot import SnapshotRefresher, TMDBSnapshot, snapshot_path
+from common.title_index import TitleIndex
+from common.title_search import TitleSearchIndex
+from common.recommender_client import RecommenderClient
+
+metrics.begin_request("rerun", app="tfidf")  # per-rerun total time; ended at the bottom of the script
+
+RECOMMENDER_URL = os.environ.get("RECOMMENDER_URL")  # use the headless service (service/) instead of local models
 
 # --- LOAD DATA & MODEL ---
 @st.cache_resource
-def load_model():
-    knn = joblib.load("pickle_model/knn_model.pkl")
-    tfidf = joblib.load("pickle_model/tfidf_vectorizer.pkl")
-    movies = pd.read_csv("pickle_model/movies_metadata.csv")
-    return knn, tfidf, movies
+def load_metrics_exporter():
+    # Prometheus text on localhost:$METRICS_PORT/metrics when METRICS_ENABLED=1
+    return metrics.serve()
+
+load_metrics_exporter()
+
+# The model code (pandas, SciPy) is imported on the loader thread, so the page shell does not wait for it
+@metrics.timed()
+def load_catalog(model_dir):
+    from artifacts import load_metadata
+
+    movies = load_metadata(model_dir)
+    # O(1) title -> row IDs, and prefix/fuzzy search for the sidebar
+    return movies, TitleIndex.from_frame(movies), TitleSearchIndex(movies["names"])
+
+@metrics.timed()
+def load_model(model_dir, movies, title_index):
+    if RECOMMENDER_URL:
+        return RecommenderClient(RECOMMENDER_URL, engine="tfidf")
+    from tfidf_recommender import TfidfRecommender
+
+    return TfidfRecommender.load(model_dir, movies=movies, title_index=title_index)
+
+def load_resources(progress):
+    progress("Reading the movie catalog...")
+    from artifacts import default_model_dir
+
+    model_dir = default_model_dir()  # mmap-friendly model_bundle/ when built, else pickle_model/
+    movies, title_index, title_search = load_catalog(model_dir)
+    progress("Loading the TF-IDF model...")
+    return movies, title_index, title_search, load_model(model_dir, movies, title_index)
+
+@st.cache_resource
+def start_loading():
+    # Catalog and model load on a background thread, once per process; the page shell renders meanwhile
+    return BackgroundLoader(load_resources)
+
+loader = start_loading()
 
-knn, tfidf, movies_df = load_model()
+def wait_for_models():
+    # The shell is already on screen; show what is loading until the models are in memory
+    if not loader.wait(0.05):
+        status, shown = st.empty(), None
+        while not loader.wait(0.25):
+            message = f"⏳ {loader.stage} ({loader.elapsed:.0f}s)"
+            if message != shown:
+                status.info(message)
+                shown = message
+        status.empty()
+    try:
+        return loader.result()
+    except Exception as exc:
+        st.error(f"Could not load the models: {exc}")
+        if st.button("🔄 Retry"):
+            start_loading.clear()
+            st.rerun()
+        st.stop()
 
 # --- TMDB API Setup ---
-BASE_URL = "https://api.themoviedb.org/3"
+BASE_URL = os.environ.get("TMDB_BASE_URL", "https://api.themoviedb.org/3")  # point at benchmarks/stub_tmdb.py for offline runs
 IMAGE_URL = "https://image.tmdb.org/t/p/w500"
+SNAPSHOT_PATH = snapshot_path(".")  # filled by `python -m common.tmdb_snapshot`
 
 HEADERS = {
     "accept": "application/json",
     "Authorization": "Bearer YOUR_TMDB_API_KEY"  # replace with your key
 }
 
-def search_movie_tmdb(query):
-    url = f"{BASE_URL}/search/movie?query={query}"
-    response = requests.get(url, headers=HEADERS).json()
-    return response.get("results", [])
+@st.cache_resource
+def load_tmdb_client():
+    # Pooled session with rate limiting, timeouts and retries on 429/5xx
+    return TMDBClient(headers=HEADERS, base_url=BASE_URL)
+
+@st.cache_resource
+def load_tmdb_snapshot():
+    # Row ID -> TMDB details, read locally; missing and stale rows are refreshed in the background
+    return SnapshotRefresher(TMDBSnapshot(SNAPSHOT_PATH), load_tmdb_client(), movies_df["names"].tolist(), title_index)
+
+@metrics.timed()
+def tmdb_details(titles):
+    # TMDB details for a whole grid in one indexed read, in order; None renders as "No Image"
+    return tmdb_snapshot.lookup(titles)
+
+@st.cache_resource
+def load_prefetcher():
+    # Next-page recommendations for the cards on screen, shared by all sessions
+    return Prefetcher()
 
 # --- RECOMMENDATION FUNCTION ---
-def recommend(movie_title):
-    if movie_title not in movies_df["names"].values:
-        return []
-    idx = movies_df[movies_df["names"] == movie_title].index[0]
-    _, indices = knn.kneighbors(tfidf.transform([movies_df.iloc[idx]["overview"]]), n_neighbors=16)  # Get 16 to show 15 (excluding self)
-    recs = []
-    for i in indices.flatten()[1:]:  # skip self
-        recs.append(movies_df.iloc[i]["names"])
+@metrics.timed()
+def load_recommendations(movie_title, row_id):
+    return recommender.recommend(movie_title, k=15, row_id=row_id) or []
+
+@metrics.timed()
+def recommend(movie_title, row_id=None):
+    # row_id picks one of several movies sharing a title; default is the first.
+    # Pages warmed by prefetch_next_pages() come straight from memory.
+    row_id = title_index.first(movie_title) if row_id is None else row_id
+    return prefetcher.get((movie_title, row_id), lambda: load_recommendations(movie_title, row_id))
+
+def warm_next_page(movie_title):
+    # Runs on the prefetch pool: the page a click on this card would show
+    recs = load_recommendations(movie_title, title_index.first(movie_title))
+    tmdb_details(recs[:15])  # queues the cards' missing/stale snapshot rows for refresh
     return recs
 
+def prefetch_next_pages(titles):
+    # Only a card on screen can be clicked next; warm all of their pages in the background
+    prefetcher.prefetch([((title, title_index.first(title)), partial(warm_next_page, title)) for title in titles])
+
 # --- STREAMLIT PAGE CONFIG ---
 st.set_page_config(page_title="Movie Recommender", page_icon="🎬", layout="wide")
 
@@ -133,20 +225,26 @@ if "active_movie" not in st.session_state:
 # --- SIDEBAR SEARCH ---
 st.sidebar.header("🎥 Movie Search")
 st.sidebar.info("👉 Use the sidebar or click a movie to explore AI-powered recommendations.")
-all_movie_names = movies_df["names"].dropna().unique().tolist()
-
-sidebar_options = [""] + all_movie_names
-current_active = st.session_state.active_movie
-if current_active and current_active not in all_movie_names:
-    sidebar_options.append(current_active)
-try:
-    sidebar_index = sidebar_options.index(current_active) if current_active else 0
-except ValueError:
-    sidebar_index = 0
-
-sidebar_selection = st.sidebar.selectbox("Search a movie:", options=sidebar_options, index=sidebar_index)
-if sidebar_selection != st.session_state.active_movie:
-    st.session_state.active_movie = sidebar_selection
+
+# --- MODELS (loaded in the background) ---
+movies_df, title_index, title_search, recommender = wait_for_models()
+tmdb_snapshot = load_tmdb_snapshot()
+prefetcher = load_prefetcher()
+
+def select_match():
+    # Only a deliberate pick in the matches box changes the active movie
+    if st.session_state.title_match:
+        st.session_state.active_movie = st.session_state.title_match
+        # Back to blank, so picking the same title again after a card click still fires
+        st.session_state.title_match = ""
+
+# Only the top matches for the typed text are sent to the browser
+typed_title = st.sidebar.text_input("Search a movie:", placeholder="Start typing a title...")
+title_matches = title_search.search(typed_title, limit=10)
+if title_matches:
+    st.sidebar.selectbox("Matches:", options=[""] + title_matches, key="title_match", on_change=select_match)
+elif typed_title:
+    st.sidebar.caption("No matching titles.")
 active_movie_name = st.session_state.active_movie
 
 # --- MAIN SCREEN ---
@@ -162,36 +260,39 @@ if not active_movie_name:
     # Show some popular movies from your dataset as default options
     popular_movies_sample = movies_df["names"].dropna().head(10).tolist()
     
-    # Display in rows of 5
-    for row_start in range(0, min(len(popular_movies_sample), 10), 5):
-        cols = st.columns(5)
-        for i, movie_title in enumerate(popular_movies_sample[row_start:row_start+5]):
-            with cols[i]:
-                st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
+    popular_details = tmdb_details(popular_movies_sample)
+    prefetch_next_pages(popular_movies_sample)
+
+    with metrics.span("render_grid", grid="popular"):
+        # Display in rows of 5
+        for row_start in range(0, min(len(popular_movies_sample), 10), 5):
+            cols = st.columns(5)
+            for i, movie_title in enumerate(popular_movies_sample[row_start:row_start+5]):
+                with cols[i]:
+                    st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
                 
-                # Try to get poster from TMDB
-                search_results = search_movie_tmdb(movie_title)
-                if search_results and search_results[0].get("poster_path"):
-                    st.image(IMAGE_URL + search_results[0]["poster_path"], use_container_width=True)
-                else:
-                    st.markdown(
-                        "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
-                        "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
-                        "🎬 No Image</div>",
-                        unsafe_allow_html=True,
-                    )
+                    # Poster from the TMDB snapshot
+                    details = popular_details[row_start + i]
+                    if details and details.get("poster_path"):
+                        st.image(IMAGE_URL + details["poster_path"], use_container_width=True)
+                    else:
+                        st.markdown(
+                            "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
+                            "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
+                            "🎬 No Image</div>",
+                            unsafe_allow_html=True,
+                        )
                 
-                if st.button(movie_title, key=f"popular_{row_start + i}"):
-                    st.session_state.active_movie = movie_title
-                    st.rerun()
-                st.markdown("</div>", unsafe_allow_html=True)
+                    if st.button(movie_title, key=f"popular_{row_start + i}"):
+                        st.session_state.active_movie = movie_title
+                        st.rerun()
+                    st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("---")
 else:
     # Show sidebar poster & info
-    search_results = search_movie_tmdb(active_movie_name)
-    if search_results:
-        selected_movie = search_results[0]
+    selected_movie = tmdb_details([active_movie_name])[0]
+    if selected_movie:
         poster_path = selected_movie.get("poster_path")
         if poster_path:
             st.sidebar.image(IMAGE_URL + poster_path, caption=active_movie_name, use_container_width=True)
@@ -200,6 +301,14 @@ else:
         if selected_movie.get("overview"):
             st.sidebar.markdown(f"**Overview:** {selected_movie['overview'][:200]}...")
 
+    # Several catalog rows can share a title; let the user pick which one
+    candidates = title_index.candidates(active_movie_name)
+    row_id = None
+    if len(candidates) > 1:
+        labels = [label for _, label in candidates]
+        choice = st.sidebar.selectbox("Several movies share this title:", labels, key=f"dup_{active_movie_name}")
+        row_id = candidates[labels.index(choice)][0]
+
     if st.sidebar.button("🔄 Clear Selection"):
         st.session_state.active_movie = ""
         st.rerun()
@@ -208,22 +317,34 @@ else:
     st.markdown("---")
 
     # Get recommendations from your ML model
-    recs = recommend(active_movie_name)
+    recs = recommend(active_movie_name, row_id)
     if recs:
-        # Show up to 15 recommendations in 3 rows of 5
-        for row_start in range(0, min(len(recs), 15), 5):
-            cols = st.columns(5)
-            for i, rec_title in enumerate(recs[row_start:row_start+5]):
-                with cols[i]:
-                    st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
+        # All card posters/ratings from the local snapshot before rendering
+        rec_details = tmdb_details(recs[:15])
+        prefetch_next_pages(recs[:15])
+
+        with metrics.span("render_grid", grid="recommendations"):
+            # Show up to 15 recommendations in 3 rows of 5
+            for row_start in range(0, min(len(recs), 15), 5):
+                cols = st.columns(5)
+                for i, rec_title in enumerate(recs[row_start:row_start+5]):
+                    with cols[i]:
+                        st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
                     
-                    # Get poster and info from TMDB
-                    rec_results = search_movie_tmdb(rec_title)
-                    if rec_results:
-                        rec_movie = rec_results[0]
-                        poster_path = rec_movie.get("poster_path")
-                        if poster_path:
-                            st.image(IMAGE_URL + poster_path, use_container_width=True)
+                        # Poster and info from the TMDB snapshot
+                        rec_movie = rec_details[row_start + i]
+                        if rec_movie:
+                            poster_path = rec_movie.get("poster_path")
+                            if poster_path:
+                                st.image(IMAGE_URL + poster_path, use_container_width=True)
+                            else:
+                                st.markdown(
+                                    "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
+                                    "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
+                                    "🎬 No Image</div>",
+                                    unsafe_allow_html=True,
+                                )
+                            st.markdown(f"<div class='movie-rating'>⭐ {rec_movie.get('vote_average','N/A')}/10</div>", unsafe_allow_html=True)
                         else:
                             st.markdown(
                                 "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
@@ -231,20 +352,14 @@ else:
                                 "🎬 No Image</div>",
                                 unsafe_allow_html=True,
                             )
-                        st.markdown(f"<div class='movie-rating'>⭐ {rec_movie.get('vote_average','N/A')}/10</div>", unsafe_allow_html=True)
-                    else:
-                        st.markdown(
-                            "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
-                            "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
-                            "🎬 No Image</div>",
-                            unsafe_allow_html=True,
-                        )
-                        st.markdown("<div class='movie-rating'>⭐ N/A</div>", unsafe_allow_html=True)
+                            st.markdown("<div class='movie-rating'>⭐ N/A</div>", unsafe_allow_html=True)
                     
-                    if st.button(rec_title, key=f"rec_{active_movie_name}_{row_start + i}"):
-                        st.session_state.active_movie = rec_title
-                        st.rerun()
-                    st.markdown("</div>", unsafe_allow_html=True)
+                        if st.button(rec_title, key=f"rec_{active_movie_name}_{row_start + i}"):
+                            st.session_state.active_movie = rec_title
+                            st.rerun()
+                        st.markdown("</div>", unsafe_allow_html=True)
     else:
         st.warning("No recommendations found for this movie.")
-        st.info("This movie might not be in our training dataset. Try searching for a different movie using the sidebar.")
\ No newline at end of file
+        st.info("This movie might not be in our training dataset. Try searching for a different movie using the sidebar.")
+
+metrics.end_request()
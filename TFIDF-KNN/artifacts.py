@@ -0,0 +1,235 @@
+# artifacts.py
+#
+# Pickle-free model bundle for the TF-IDF recommender:
+#
+#   model_bundle/
+#   ├── manifest.json         # format version, shapes, vectorizer and kNN parameters
+#   ├── matrix_indptr.npy     # fitted TF-IDF CSR matrix (the kNN's rows), as its three raw arrays
+#   ├── matrix_indices.npy
+#   ├── matrix_data.npy
+#   ├── vocabulary.npy        # term of each matrix column
+#   ├── idf.npy               # IDF weight of each column
+#   ├── metadata.parquet      # one row per matrix row (names, overview)
+#   ├── neighbor_ids.npy      # optional, see neighbors.py
+#   └── neighbor_scores.npy
+#
+# Arrays are opened with np.load(mmap_mode="r") and wrapped without copying,
+# so loading is a handful of mmaps instead of unpickling sklearn objects, and
+# the bundle does not depend on the sklearn version that wrote it.
+# Brute-force cosine kNN is nothing but its fitted matrix, so a bundle loads
+# as (matrix, vectorizer, metadata) and no NearestNeighbors is rebuilt; only
+# the notebook's pickled kNN is unwrapped (its private _fit_X) on the way in.
+# load_lookup() opens just what recommendations need and defers the
+# vectorizer (and the sklearn import, about a second) to the first free-text
+# query.
+#
+# The notebook still writes pickle_model/; convert it once (from inside TFIDF-KNN/):
+#     python artifacts.py --from pickle_model --out model_bundle
+
+import argparse
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+BUNDLE_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+MATRIX_FILES = {"indptr": "matrix_indptr.npy", "indices": "matrix_indices.npy", "data": "matrix_data.npy"}
+VOCABULARY_FILE = "vocabulary.npy"
+IDF_FILE = "idf.npy"
+METADATA_FILE = "metadata.parquet"
+NEIGHBOR_FILES = ("neighbor_ids.npy", "neighbor_scores.npy")
+KNN_PARAMS = {"n_neighbors": 16, "metric": "cosine", "algorithm": "brute"}  # the notebook's NearestNeighbors
+
+# JSON-safe TfidfVectorizer parameters carried over to the rebuilt vectorizer
+VECTORIZER_PARAMS = (
+    "analyzer", "binary", "decode_error", "encoding", "input", "lowercase", "max_df", "max_features",
+    "min_df", "ngram_range", "norm", "smooth_idf", "stop_words", "strip_accents", "sublinear_tf",
+    "token_pattern", "use_idf",
+)
+
+
+def is_bundle(directory):
+    return os.path.exists(os.path.join(directory, MANIFEST_FILE))
+
+
+def default_model_dir(root="."):
+    """model_bundle/ once artifacts.py has converted the model, else the notebook's pickle_model/."""
+    bundle = os.path.join(root, "model_bundle")
+    return bundle if is_bundle(bundle) else os.path.join(root, "pickle_model")
+
+
+def _save_array(path, array):
+    # Replace rather than overwrite: the old file may still be memory-mapped by a running loader
+    np.save(path + ".tmp.npy", array)
+    os.replace(path + ".tmp.npy", path)
+
+
+def save_bundle(directory, tfidf, matrix, movies):
+    """Write the fitted vectorizer, TF-IDF matrix and metadata as a bundle."""
+    matrix = sp.csr_matrix(matrix)
+    if len(movies) != matrix.shape[0]:
+        raise ValueError(f"{len(movies)} metadata rows but {matrix.shape[0]} matrix rows")
+    os.makedirs(directory, exist_ok=True)
+
+    for part, filename in MATRIX_FILES.items():
+        _save_array(os.path.join(directory, filename), getattr(matrix, part))
+    terms = np.empty(len(tfidf.vocabulary_), dtype=object)
+    for term, column in tfidf.vocabulary_.items():
+        terms[column] = term
+    _save_array(os.path.join(directory, VOCABULARY_FILE), terms.astype(str))  # fixed-width unicode, no pickle
+    _save_array(os.path.join(directory, IDF_FILE), tfidf.idf_)
+    movies.reset_index(drop=True).to_parquet(os.path.join(directory, METADATA_FILE), index=False)
+
+    params = tfidf.get_params()
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "rows": int(matrix.shape[0]),
+        "features": int(matrix.shape[1]),
+        "nnz": int(matrix.nnz),
+        "vectorizer": {name: params[name] for name in VECTORIZER_PARAMS},
+        "dtype": np.dtype(tfidf.dtype).name,
+        "knn": KNN_PARAMS,
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"Model bundle version {manifest.get('version')} is not supported (expected {BUNDLE_VERSION})")
+    return manifest
+
+
+def load_matrix(directory, manifest=None):
+    """The fitted TF-IDF matrix as a CSR matrix over read-only mmaps of the bundle arrays."""
+    manifest = manifest or read_manifest(directory)
+    parts = {part: np.load(os.path.join(directory, filename), mmap_mode="r") for part, filename in MATRIX_FILES.items()}
+    matrix = sp.csr_matrix(
+        (parts["data"], parts["indices"], parts["indptr"]), shape=(manifest["rows"], manifest["features"]), copy=False
+    )
+    if matrix.nnz != manifest["nnz"]:
+        raise ValueError(f"Matrix has {matrix.nnz} stored values but the manifest says {manifest['nnz']}")
+    return matrix
+
+
+def load_vectorizer(directory, manifest=None):
+    """A TfidfVectorizer equivalent to the fitted one, rebuilt from the vocabulary and IDF arrays."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    manifest = manifest or read_manifest(directory)
+    params = dict(manifest["vectorizer"], ngram_range=tuple(manifest["vectorizer"]["ngram_range"]))
+    terms = np.load(os.path.join(directory, VOCABULARY_FILE))
+    tfidf = TfidfVectorizer(vocabulary={term: column for column, term in enumerate(terms.tolist())},
+                            dtype=np.dtype(manifest["dtype"]), **params)
+    tfidf.idf_ = np.load(os.path.join(directory, IDF_FILE))
+    return tfidf
+
+
+def load_bundle(directory, movies=None):
+    """Return (matrix, tfidf, movies) from a bundle, with the matrix memory-mapped.
+
+    Pass `movies` to reuse metadata the caller already loaded.
+    """
+    manifest = read_manifest(directory)
+    matrix = load_matrix(directory, manifest)
+    tfidf = load_vectorizer(directory, manifest)
+    return matrix, tfidf, _bundle_metadata(directory, manifest, movies)
+
+
+def _bundle_metadata(directory, manifest, movies=None):
+    if movies is None:
+        movies = pd.read_parquet(os.path.join(directory, METADATA_FILE))
+    if len(movies) != manifest["rows"]:
+        raise ValueError(f"{len(movies)} metadata rows but {manifest['rows']} matrix rows")
+    return movies
+
+
+class LazyVectorizer:
+    """Stands in for a bundle's TfidfVectorizer; rebuilds it on the first transform()."""
+
+    def __init__(self, directory, manifest):
+        self.directory = directory
+        self.manifest = manifest
+        self._vectorizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def vectorizer(self):
+        with self._lock:
+            if self._vectorizer is None:
+                self._vectorizer = load_vectorizer(self.directory, self.manifest)
+            return self._vectorizer
+
+    def transform(self, documents):
+        return self.vectorizer.transform(documents)
+
+
+def load_lookup(model_dir, movies=None):
+    """(matrix, tfidf, movies): only what recommendations need.
+
+    For a bundle, the matrix is memory-mapped and the vectorizer is a
+    LazyVectorizer, so sklearn is not imported until free text has to be
+    vectorized. Pickles are unpickled in full.
+    """
+    if is_bundle(model_dir):
+        manifest = read_manifest(model_dir)
+        matrix = load_matrix(model_dir, manifest)
+        return matrix, LazyVectorizer(model_dir, manifest), _bundle_metadata(model_dir, manifest, movies)
+    return load_model_artifacts(model_dir, movies)
+
+
+def load_metadata(model_dir):
+    """Only the movie metadata, for callers that never touch the model."""
+    if is_bundle(model_dir):
+        return pd.read_parquet(os.path.join(model_dir, METADATA_FILE))
+    return pd.read_csv(os.path.join(model_dir, "movies_metadata.csv"))
+
+
+def load_model_artifacts(model_dir, movies=None):
+    """(matrix, tfidf, movies) from either a bundle or the notebook's pickle_model/ layout."""
+    if is_bundle(model_dir):
+        return load_bundle(model_dir, movies)
+    import joblib
+
+    knn = joblib.load(os.path.join(model_dir, "knn_model.pkl"))
+    tfidf = joblib.load(os.path.join(model_dir, "tfidf_vectorizer.pkl"))
+    # NearestNeighbors has no public accessor for its fitted rows; the pickle is read as sklearn wrote it
+    return knn._fit_X, tfidf, movies if movies is not None else load_metadata(model_dir)
+
+
+def save_model_artifacts(model_dir, matrix, tfidf, movies):
+    """Write (matrix, tfidf, movies) back in whichever layout `model_dir` already uses."""
+    if is_bundle(model_dir):
+        return save_bundle(model_dir, tfidf, matrix, movies)
+    import joblib
+    from sklearn.neighbors import NearestNeighbors
+
+    joblib.dump(NearestNeighbors(**KNN_PARAMS).fit(matrix), os.path.join(model_dir, "knn_model.pkl"))
+    joblib.dump(tfidf, os.path.join(model_dir, "tfidf_vectorizer.pkl"))
+    movies.to_csv(os.path.join(model_dir, "movies_metadata.csv"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the pickled TF-IDF model into a memory-mappable bundle.")
+    parser.add_argument("--from", dest="source", default="pickle_model", help="directory with the notebook's pickles")
+    parser.add_argument("--out", default="model_bundle", help="bundle directory")
+    args = parser.parse_args()
+
+    matrix, tfidf, movies = load_model_artifacts(args.source)
+    manifest = save_bundle(args.out, tfidf, matrix, movies)
+    for filename in NEIGHBOR_FILES:
+        if os.path.exists(os.path.join(args.source, filename)):
+            shutil.copyfile(os.path.join(args.source, filename), os.path.join(args.out, filename))
+    print(f"✅ Bundle with {manifest['rows']} x {manifest['features']} matrix saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
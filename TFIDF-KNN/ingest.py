@@ -0,0 +1,149 @@
+# ingest.py
+#
+# Incremental catalog updates for the TF-IDF recommender.
+#
+# New movies are vectorized with the existing vocabulary and IDF, appended
+# to the fitted TF-IDF matrix and folded into the precomputed neighbor table
+# (their own neighbor lists, plus the reverse-neighbor entries of existing
+# movies they now outrank). Unchanged rows are left alone, so a batch of a
+# few hundred titles takes seconds instead of a full retrain. Rows whose
+# (names, overview) pair is already in the catalog, or repeated within the
+# CSV, are skipped, so re-running the same file adds nothing.
+#
+# Every ingest records how many of the new tokens fall outside the fitted
+# vocabulary. max_features=5000 leaves part of any text out of vocabulary,
+# so drift is measured against the out-of-vocabulary rate of the catalog at
+# fit time. Once drift, or the share of rows added since the last fit,
+# passes its threshold, the whole model is rebuilt from scratch instead.
+#
+# Works on model_bundle/ (see artifacts.py) when it exists, else pickle_model/,
+# and writes the model back in the same layout.
+#
+# Usage (from inside TFIDF-KNN/):
+#     python ingest.py new_movies.csv            # CSV with "names" and "overview"
+#     python ingest.py new_movies.csv --rebuild  # force a full rebuild
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from artifacts import default_model_dir, load_model_artifacts, save_model_artifacts
+from neighbors import build_neighbor_table, load_neighbor_table, save_neighbor_table, update_neighbor_table
+
+STATE_FILE = "ingest_state.json"
+
+
+def vocabulary_drift(tfidf, overviews):
+    """(tokens outside the fitted vocabulary, total tokens) over `overviews`."""
+    analyzer = tfidf.build_analyzer()
+    vocabulary = tfidf.vocabulary_
+    oov = total = 0
+    for text in overviews:
+        tokens = analyzer(text)
+        total += len(tokens)
+        oov += sum(token not in vocabulary for token in tokens)
+    return oov, total
+
+
+def drop_known(new_movies, movies):
+    """Rows of `new_movies` whose (names, overview) pair is neither in `movies` nor earlier in the CSV."""
+    known = set(zip(movies["names"], movies["overview"]))
+    in_catalog = np.array([key in known for key in zip(new_movies["names"], new_movies["overview"])], dtype=bool)
+    repeated = new_movies.duplicated(["names", "overview"]).to_numpy()
+    return new_movies[~(in_catalog | repeated)].reset_index(drop=True)
+
+
+def fresh_state(tfidf, movies, sample_size=2000):
+    """Ingest bookkeeping right after a fit, with the catalog's own out-of-vocabulary rate as baseline."""
+    sample = movies["overview"].sample(min(sample_size, len(movies)), random_state=0)
+    oov, total = vocabulary_drift(tfidf, sample)
+    return {
+        "rows_at_fit": len(movies),
+        "baseline_oov_rate": oov / max(total, 1),
+        "rows_ingested": 0,
+        "oov_tokens": 0,
+        "total_tokens": 0,
+    }
+
+
+def load_state(model_dir, tfidf, movies):
+    path = os.path.join(model_dir, STATE_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return fresh_state(tfidf, movies)
+
+
+def save_state(model_dir, state):
+    with open(os.path.join(model_dir, STATE_FILE), "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def full_rebuild(movies, top_n=15, chunk_size=1024):
+    """Refit the vectorizer on the whole catalog, as model.ipynb does."""
+    tfidf = TfidfVectorizer(stop_words="english", max_features=5000)
+    matrix = tfidf.fit_transform(movies["overview"])
+    ids, scores = build_neighbor_table(matrix, top_n=top_n, chunk_size=chunk_size)
+    return tfidf, matrix, ids, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append new movies to the TF-IDF recommender without retraining.")
+    parser.add_argument("csv", help="new movies; needs 'names' and 'overview' columns")
+    parser.add_argument("--model-dir", default=default_model_dir())
+    parser.add_argument("--drift-threshold", type=float, default=0.05, help="rebuild once the OOV rate of new text exceeds the fit-time rate by this much")
+    parser.add_argument("--growth-threshold", type=float, default=0.25, help="rebuild once rows added since the last fit exceed this share")
+    parser.add_argument("--rebuild", action="store_true", help="force a full rebuild")
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+    start_time = time.perf_counter()
+
+    new_movies = pd.read_csv(args.csv)[["names", "overview"]].dropna(subset=["overview"]).reset_index(drop=True)
+    matrix, tfidf, movies = load_model_artifacts(args.model_dir)
+    ids_path = os.path.join(args.model_dir, "neighbor_ids.npy")
+    scores_path = os.path.join(args.model_dir, "neighbor_scores.npy")
+    ids, scores = load_neighbor_table(ids_path, scores_path)
+    if ids is not None:
+        ids, scores = np.array(ids), np.array(scores)  # copy out of the mmap before the files are rewritten
+    state = load_state(args.model_dir, tfidf, movies)
+
+    n_read = len(new_movies)
+    new_movies = drop_known(new_movies, movies)
+    if len(new_movies) < n_read:
+        print(f"⏭️ Skipped {n_read - len(new_movies)} movies already in the catalog or repeated in the CSV")
+    if new_movies.empty and not args.rebuild:
+        print(f"✅ Nothing to add; catalog still has {len(movies)} movies")
+        return
+
+    oov, total = vocabulary_drift(tfidf, new_movies["overview"])
+    state["rows_ingested"] += len(new_movies)
+    state["oov_tokens"] += oov
+    state["total_tokens"] += total
+    drift = state["oov_tokens"] / max(state["total_tokens"], 1) - state["baseline_oov_rate"]
+    growth = state["rows_ingested"] / max(state["rows_at_fit"], 1)
+    movies = pd.concat([movies, new_movies], ignore_index=True)
+
+    if args.rebuild or ids is None or drift > args.drift_threshold or growth > args.growth_threshold:
+        print(f"🔁 Full rebuild (vocabulary drift {drift:+.1%}, growth {growth:.1%})")
+        tfidf, matrix, ids, scores = full_rebuild(movies, top_n=ids.shape[1] if ids is not None else 15, chunk_size=args.chunk_size)
+        state = fresh_state(tfidf, movies)
+    else:
+        matrix = sp.vstack([matrix, tfidf.transform(new_movies["overview"])], format="csr")
+        ids, scores, n_updated = update_neighbor_table(ids, scores, matrix, chunk_size=args.chunk_size)
+        print(f"➕ Appended {len(new_movies)} movies, updated neighbors of {n_updated} existing movies "
+              f"(vocabulary drift {drift:+.1%}, growth {growth:.1%})")
+
+    save_model_artifacts(args.model_dir, matrix, tfidf, movies)
+    save_neighbor_table(ids, scores, ids_path, scores_path)
+    save_state(args.model_dir, state)
+    print(f"✅ Catalog now has {len(movies)} movies ({time.perf_counter() - start_time:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
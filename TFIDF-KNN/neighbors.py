@@ -0,0 +1,125 @@
+# neighbors.py
+#
+# Offline build of the all-pairs top-N neighbor table used by app.py.
+# The catalog is static, so instead of running a brute-force kNN scan on
+# every click we score every movie against every other movie once, keep the
+# best N per row and store them as compact arrays next to the pickled model.
+#
+# Usage (from inside TFIDF-KNN/):
+#     python neighbors.py --top-n 15 --chunk-size 1024
+
+import argparse
+import os
+
+import numpy as np
+
+from artifacts import _save_array, default_model_dir, load_model_artifacts
+
+NEIGHBOR_IDS_PATH = "pickle_model/neighbor_ids.npy"
+NEIGHBOR_SCORES_PATH = "pickle_model/neighbor_scores.npy"
+
+
+def _top_columns(block, top_n):
+    """Column positions and values of the top_n entries of each row of `block`, best first."""
+    part = np.argpartition(block, -top_n, axis=1)[:, -top_n:]
+    part_scores = np.take_along_axis(block, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+def _score_rows(matrix, matrix_t, start, stop, top_n, ids, scores):
+    block = (matrix[start:stop] @ matrix_t).toarray()
+    rows = np.arange(stop - start)
+    block[rows, rows + start] = -np.inf  # skip self
+    ids[start:stop], scores[start:stop] = _top_columns(block, top_n)
+
+
+def build_neighbor_table(matrix, top_n=15, chunk_size=1024):
+    """Return (ids, scores) of the top_n cosine neighbors of every row.
+
+    `matrix` is the L2-normalized TF-IDF CSR matrix, so a plain sparse
+    product gives cosine similarity. Rows are processed in chunks so only a
+    (chunk_size x n_rows) dense block is alive at any time. Each row's own
+    index is excluded from its neighbors.
+    """
+    n_rows = matrix.shape[0]
+    top_n = min(top_n, n_rows - 1)
+    ids = np.empty((n_rows, top_n), dtype=np.int32)
+    scores = np.empty((n_rows, top_n), dtype=np.float16)
+    matrix_t = matrix.T.tocsc()
+
+    for start in range(0, n_rows, chunk_size):
+        _score_rows(matrix, matrix_t, start, min(start + chunk_size, n_rows), top_n, ids, scores)
+
+    return ids, scores
+
+
+def update_neighbor_table(ids, scores, matrix, chunk_size=1024):
+    """Extend a neighbor table after rows were appended to `matrix`.
+
+    `ids`/`scores` cover the first len(ids) rows of `matrix`; the rest are
+    new. New rows get a full neighbor list. Existing rows are only touched
+    when a new row scores above their current weakest neighbor (the
+    reverse-neighbor update). Returns (ids, scores, n_updated_rows).
+    """
+    n_old, top_n = ids.shape
+    n_rows = matrix.shape[0]
+    new_ids = np.empty((n_rows, top_n), dtype=np.int32)
+    new_scores = np.empty((n_rows, top_n), dtype=np.float16)
+    new_ids[:n_old], new_scores[:n_old] = ids, scores
+
+    matrix_t = matrix.T.tocsc()
+    for start in range(n_old, n_rows, chunk_size):
+        _score_rows(matrix, matrix_t, start, min(start + chunk_size, n_rows), top_n, new_ids, new_scores)
+
+    appended_t = matrix[n_old:].T.tocsc()
+    appended_ids = np.arange(n_old, n_rows, dtype=np.int32)
+    n_updated = 0
+    for start in range(0, n_old, chunk_size):
+        stop = min(start + chunk_size, n_old)
+        block = (matrix[start:stop] @ appended_t).toarray()
+        affected = np.flatnonzero(block.max(axis=1) > new_scores[start:stop, -1].astype(np.float32))
+        if len(affected) == 0:
+            continue
+        rows = affected + start
+        cand_ids = np.hstack([new_ids[rows], np.broadcast_to(appended_ids, (len(rows), len(appended_ids)))])
+        cand_scores = np.hstack([new_scores[rows].astype(np.float32), block[affected]])
+        cols, top_scores = _top_columns(cand_scores, top_n)
+        new_ids[rows] = np.take_along_axis(cand_ids, cols, axis=1)
+        new_scores[rows] = top_scores
+        n_updated += len(rows)
+
+    return new_ids, new_scores, n_updated
+
+
+def save_neighbor_table(ids, scores, ids_path=NEIGHBOR_IDS_PATH, scores_path=NEIGHBOR_SCORES_PATH):
+    os.makedirs(os.path.dirname(ids_path), exist_ok=True)
+    # The app may have the previous table memory-mapped (ingest.py rewrites it in place)
+    _save_array(ids_path, ids)
+    _save_array(scores_path, scores)
+
+
+def load_neighbor_table(ids_path=NEIGHBOR_IDS_PATH, scores_path=NEIGHBOR_SCORES_PATH):
+    """Load the neighbor table memory-mapped, or (None, None) if it was never built."""
+    if not (os.path.exists(ids_path) and os.path.exists(scores_path)):
+        return None, None
+    return np.load(ids_path, mmap_mode="r"), np.load(scores_path, mmap_mode="r")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the top-N neighbor table for the TF-IDF recommender.")
+    parser.add_argument("--model-dir", default=None, help="model_bundle/ or pickle_model/ (default: whichever app.py uses)")
+    parser.add_argument("--top-n", type=int, default=15, help="neighbors kept per movie")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="rows scored per sparse product")
+    args = parser.parse_args()
+
+    model_dir = args.model_dir or default_model_dir()
+    matrix, _, _ = load_model_artifacts(model_dir)
+    ids, scores = build_neighbor_table(matrix.tocsr(), top_n=args.top_n, chunk_size=args.chunk_size)
+    ids_path, scores_path = os.path.join(model_dir, "neighbor_ids.npy"), os.path.join(model_dir, "neighbor_scores.npy")
+    save_neighbor_table(ids, scores, ids_path, scores_path)
+    print(f"✅ Neighbor table {ids.shape} saved to {ids_path} and {scores_path}")
+
+
+if __name__ == "__main__":
+    main()
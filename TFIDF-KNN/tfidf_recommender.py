@@ -0,0 +1,164 @@
+# tfidf_recommender.py
+#
+# TF-IDF + kNN recommendation logic, independent of Streamlit so that both
+# app.py and the headless service (service/) can load it.
+#
+# Catalog movies are scored from their stored rows of the fitted TF-IDF
+# matrix (the rows the kNN was fitted on), so the vectorizer only runs for free text and for
+# metadata rows the matrix does not cover yet. Loading from a bundle does
+# not import sklearn at all until then (see artifacts.load_lookup).
+#
+# Expects the repo root on sys.path (for common/), as app.py and service/
+# both arrange.
+
+import os
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+from artifacts import load_lookup
+from common.seeds import check_aggregate, resolve_seeds
+from common.title_index import TitleIndex
+from neighbors import _top_columns, load_neighbor_table
+
+
+class TfidfRecommender:
+    def __init__(self, matrix, tfidf, movies, neighbor_ids=None, neighbor_scores=None, title_index=None):
+        self.tfidf = tfidf
+        self.matrix = matrix.tocsr()  # L2-normalized TF-IDF rows (the kNN's fitted rows), one per catalog movie
+        self._matrix_t = None
+        self._matrix_t_lock = threading.Lock()
+        self.movies = movies
+        self.neighbor_ids = neighbor_ids
+        self.neighbor_scores = neighbor_scores
+        self.title_index = title_index if title_index is not None else TitleIndex.from_frame(movies)
+
+    @classmethod
+    def load(cls, model_dir="pickle_model", movies=None, title_index=None):
+        """Load the model, vectorizer, metadata and (if built) neighbor table from `model_dir`.
+
+        `model_dir` is either an artifacts.py bundle or the notebook's pickles.
+        """
+        matrix, tfidf, movies = load_lookup(model_dir, movies)
+        neighbor_ids, neighbor_scores = load_neighbor_table(  # built offline by neighbors.py
+            os.path.join(model_dir, "neighbor_ids.npy"), os.path.join(model_dir, "neighbor_scores.npy")
+        )
+        return cls(matrix, tfidf, movies, neighbor_ids, neighbor_scores, title_index)
+
+    @property
+    def matrix_t(self):
+        """Transposed matrix in CSR form, built on first use; row blocks times this is the fast product."""
+        with self._matrix_t_lock:
+            if self._matrix_t is None:
+                self._matrix_t = self.matrix.T.tocsr()
+            return self._matrix_t
+
+    def _in_table(self, row_id, k):
+        return self.neighbor_ids is not None and row_id < len(self.neighbor_ids) and k <= self.neighbor_ids.shape[1]
+
+    def _vectors(self, row_ids):
+        """TF-IDF rows for catalog rows; only rows past the end of the matrix are vectorized from text."""
+        row_ids = np.asarray(row_ids)
+        if row_ids.max(initial=-1) < self.matrix.shape[0]:
+            return self.matrix[row_ids]
+        return sp.vstack([
+            self.matrix[[row_id]] if row_id < self.matrix.shape[0]
+            else self.tfidf.transform([self.movies["overview"].iat[row_id]])
+            for row_id in row_ids
+        ], format="csr")
+
+    def score_vectors(self, vectors, k=15, exclude=None):
+        """Top-k catalog rows for each TF-IDF row of `vectors`, with one sparse product for the batch.
+
+        `exclude` holds one row ID per query to leave out (the seed itself);
+        -1 excludes nothing.
+        """
+        scores = (vectors @ self.matrix_t).toarray()
+        if exclude is not None:
+            exclude = np.asarray(exclude)
+            rows = np.flatnonzero((exclude >= 0) & (exclude < scores.shape[1]))
+            scores[rows, exclude[rows]] = -np.inf
+        return _top_columns(scores, min(k, scores.shape[1] - 1))
+
+    def neighbors(self, row_id, k=15):
+        """(ids, scores) of the k movies most similar to catalog row `row_id`."""
+        if self._in_table(row_id, k):
+            # Precomputed table lookup
+            return np.asarray(self.neighbor_ids[row_id][:k]), np.asarray(self.neighbor_scores[row_id][:k], dtype=np.float32)
+        # Fallback: score the stored row against the whole matrix
+        ids, scores = self.score_vectors(self._vectors([row_id]), k, exclude=[row_id])
+        return ids[0], scores[0]
+
+    def neighbors_many(self, row_ids, k=15):
+        """(batch, k) ids and scores for several catalog rows.
+
+        Table rows are looked up; all other seeds are scored together in one
+        sparse-sparse product.
+        """
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        ids = np.empty((len(row_ids), k), dtype=np.int64)
+        scores = np.empty((len(row_ids), k), dtype=np.float32)
+        live = []
+        for i, row_id in enumerate(row_ids):
+            if self._in_table(row_id, k):
+                ids[i] = self.neighbor_ids[row_id][:k]
+                scores[i] = self.neighbor_scores[row_id][:k]
+            else:
+                live.append(i)
+        if live:
+            ids[live], scores[live] = self.score_vectors(self._vectors(row_ids[live]), k, exclude=row_ids[live])
+        return ids, scores
+
+    def recommend(self, movie_title, k=15, row_id=None):
+        """Titles of the k most similar movies; row_id picks one of several movies sharing a title."""
+        idx = self.title_index.first(movie_title) if row_id is None else row_id
+        if idx is None:
+            return []
+        ids, _ = self.neighbors(idx, k)
+        return self.movies["names"].iloc[ids].tolist()
+
+    def recommend_many(self, titles, k=15):
+        """recommend() for a list of titles, scored as one batch; unknown titles get []."""
+        row_ids = [self.title_index.first(title) for title in titles]
+        known = [i for i, row_id in enumerate(row_ids) if row_id is not None]
+        results = [[] for _ in titles]
+        if known:
+            ids, _ = self.neighbors_many([row_ids[i] for i in known], k)
+            names = self.movies["names"]
+            for i, row in zip(known, ids):
+                results[i] = names.iloc[row].tolist()
+        return results
+
+    def seed_neighbors(self, seed_ids, weights, masked, k=15, aggregate="centroid"):
+        """(ids, scores) of the k movies closest to several weighted seeds, none of them in `masked`."""
+        check_aggregate(aggregate)
+        seeds = self._vectors(seed_ids)
+        if aggregate == "centroid":
+            query = sp.csr_matrix(weights[None, :]) @ seeds  # weighted sum of the sparse seed rows
+            query = query / max(np.linalg.norm(query.data), 1e-12)
+            scores = (query @ self.matrix_t).toarray()
+        else:
+            scores = (seeds @ self.matrix_t).toarray()  # (n_seeds, n_rows), one sparse product
+            scores = (scores * weights[:, None]).max(axis=0, keepdims=True)
+        scores[0, masked[masked < scores.shape[1]]] = -np.inf
+        ids, top = _top_columns(scores, min(k, scores.shape[1]))
+        keep = np.isfinite(top[0])
+        return ids[0][keep], top[0][keep]
+
+    def recommend_seeds(self, titles, weights=None, exclude=(), k=15, aggregate="centroid"):
+        """Titles of the k movies most like all of `titles`; [] if none of them is known."""
+        seed_ids, weights, masked = resolve_seeds(self.title_index, titles, weights, exclude)
+        if len(seed_ids) == 0:
+            return []
+        ids, _ = self.seed_neighbors(seed_ids, weights, masked, k, aggregate)
+        return self.movies["names"].iloc[ids].tolist()
+
+    def search_vectors(self, query, k=15):
+        """(ids, scores) of the k movies whose overviews best match free text."""
+        ids, scores = self.score_vectors(self.tfidf.transform([query]), k)
+        return ids[0], scores[0]
+
+    def search_text(self, query, k=15):
+        ids, _ = self.search_vectors(query, k)
+        return self.movies["names"].iloc[ids].tolist()
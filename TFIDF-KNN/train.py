@@ -0,0 +1,285 @@
+# train.py
+#
+# Streaming, parallel TF-IDF training for catalogs too large for
+# model.ipynb, which reads the whole CSV into pandas and fits the vectorizer
+# in one process. The output is a model bundle (see artifacts.py) with the
+# vocabulary, IDF and matrix of the notebook's
+# TfidfVectorizer(stop_words="english", max_features=5000):
+#
+#   1. count      the CSV is read in chunks of --chunk-rows and --workers
+#                 processes tokenize them, once, with the vectorizer's own
+#                 analyzer. Each chunk's term counts are spilled to disk as
+#                 a small CSR matrix over the chunk's own terms, and its term
+#                 and document frequencies are merged. Metadata is appended
+#                 to metadata.parquet chunk by chunk.
+#   2. select     the max_features most frequent terms become the columns
+#                 (alphabetical, as in sklearn), with their smoothed IDF.
+#   3. vectorize  the workers map every spilled chunk onto those columns,
+#                 weight it by IDF and L2-normalize its rows; the CSR rows
+#                 are appended to files on disk and assembled into the
+#                 bundle's arrays at the end.
+#
+# At most 2 * workers chunks are in flight, so memory is bounded by the
+# chunk size and the vocabulary rather than by the catalog. The peak
+# memory of this process and of the largest worker is printed at the end.
+#
+# There is no kNN to fit: brute-force cosine kNN only stores the matrix,
+# which the bundle already holds. An old neighbor table in --out would no
+# longer match and is removed; rebuild it with neighbors.py.
+#
+# Usage (from inside TFIDF-KNN/):
+#     python train.py --csv imdb_movies.csv --out model_bundle --workers 4 --chunk-rows 50000
+
+import argparse
+import glob
+import json
+import os
+import resource
+import shutil
+import sys
+import time
+from collections import Counter, deque
+
+import numpy as np
+import pandas as pd
+
+from artifacts import (BUNDLE_VERSION, IDF_FILE, KNN_PARAMS, MANIFEST_FILE, MATRIX_FILES, METADATA_FILE,
+                       NEIGHBOR_FILES, VECTORIZER_PARAMS, VOCABULARY_FILE, _save_array)
+
+VECTORIZER = {"stop_words": "english", "max_features": 5000}  # as in model.ipynb
+INGEST_STATE_FILE = "ingest_state.json"  # ingest.py's bookkeeping, describes the old matrix
+SPILL_DIR = "train_chunks"  # per-chunk term counts between the two steps, removed at the end
+
+_worker = {}  # per-process state set by the pool initializers
+
+
+def read_chunks(csv_path, chunk_rows):
+    """The catalog as DataFrames of "names" and "overview", without rows lacking an overview."""
+    for chunk in pd.read_csv(csv_path, usecols=["names", "overview"], chunksize=chunk_rows):
+        yield chunk.dropna(subset=["overview"]).astype(object)
+
+
+def _init_counter(params, spill_dir):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    _worker["analyzer"] = TfidfVectorizer(**params).build_analyzer()
+    _worker["spill_dir"] = spill_dir
+
+
+def _count_chunk(task):
+    """Tokenize one chunk, spill its term counts and return (path, terms, term frequencies, document frequencies)."""
+    number, texts = task
+    analyzer = _worker["analyzer"]
+    vocabulary = {}  # term -> column local to this chunk
+    indptr, indices, values = [0], [], []
+    for text in texts:
+        row = Counter(vocabulary.setdefault(token, len(vocabulary)) for token in analyzer(text))
+        indices.extend(row)
+        values.extend(row.values())
+        indptr.append(len(indices))
+    indices, values = np.array(indices, dtype=np.int32), np.array(values, dtype=np.int64)
+    path = os.path.join(_worker["spill_dir"], f"chunk_{number:06d}.npz")
+    np.savez(path, terms=np.array(list(vocabulary), dtype=str), indptr=np.array(indptr, dtype=np.int64),
+             indices=indices, values=values)
+    tf = np.bincount(indices, weights=values, minlength=len(vocabulary)).astype(np.int64)
+    df = np.bincount(indices, minlength=len(vocabulary))
+    return path, list(vocabulary), tf, df
+
+
+def _init_vectorizer(terms, idf):
+    _worker["column"] = {term: column for column, term in enumerate(terms)}
+    _worker["idf"] = idf
+
+
+def _vectorize_chunk(path):
+    """(nonzeros per row, column indices, values) of one spilled chunk's L2-normalized TF-IDF rows.
+
+    The same arithmetic as TfidfVectorizer.transform: raw counts times IDF,
+    then sklearn's normalize().
+    """
+    import scipy.sparse as sp
+    from sklearn.preprocessing import normalize
+
+    with np.load(path) as chunk:
+        terms, indptr, indices, values = chunk["terms"], chunk["indptr"], chunk["indices"], chunk["values"]
+    column, idf = _worker["column"], _worker["idf"]
+    columns = np.array([column.get(term, -1) for term in terms.tolist()], dtype=np.int64)[indices]
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    keep = columns >= 0
+    matrix = sp.csr_matrix((values[keep].astype(np.float64), (rows[keep], columns[keep])),
+                           shape=(len(indptr) - 1, len(idf)))
+    matrix.sort_indices()
+    matrix.data *= idf[matrix.indices]
+    matrix = normalize(matrix, norm="l2", copy=False)
+    return np.diff(matrix.indptr), matrix.indices.astype(np.int32), matrix.data
+
+
+def map_chunks(task, items, initializer, initargs, workers):
+    """task(item) for every item, in order, with at most 2 * workers items in flight."""
+    if workers <= 1:
+        initializer(*initargs)
+        for item in items:
+            yield task(item)
+        return
+    import multiprocessing
+
+    pool = multiprocessing.get_context("spawn").Pool(workers, initializer=initializer, initargs=initargs)
+    try:
+        pending = deque()
+        for item in items:
+            pending.append(pool.apply_async(task, (item,)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def select_features(counts, docs, rows, max_features):
+    """(terms, idf) of the max_features most frequent terms, columns in alphabetical order.
+
+    Same selection as TfidfVectorizer, down to the ties at the cut-off: the
+    same (unstable) argsort over the same alphabetical frequency array. The
+    IDF is its smoothed ln((1 + n) / (1 + df)) + 1.
+    """
+    terms = np.array(sorted(counts))
+    if max_features is not None and len(terms) > max_features:
+        frequency = np.array([counts[term] for term in terms], dtype=np.int64)
+        keep = np.sort((-frequency).argsort()[:max_features])
+        terms = terms[keep]
+    df = np.array([docs[term] for term in terms], dtype=np.float64)
+    return terms, np.log((1 + rows) / (1 + df)) + 1
+
+
+def _finish_array(directory, filename, raw_path, raw_dtype, count, dtype, block_rows=1 << 22):
+    """Stream a raw append-only file into the bundle's .npy, block by block."""
+    path = os.path.join(directory, filename)
+    # Replace rather than overwrite: the old file may still be memory-mapped by a running loader
+    with open(raw_path, "rb") as raw, open(path + ".tmp.npy", "wb") as out:
+        header = {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": (count,)}
+        np.lib.format.write_array_header_1_0(out, header)
+        for start in range(0, count, block_rows):
+            block = np.fromfile(raw, dtype=raw_dtype, count=min(block_rows, count - start))
+            out.write(block.astype(dtype, copy=False).tobytes())
+    os.replace(path + ".tmp.npy", path)
+    os.remove(raw_path)
+
+
+def peak_rss_mb():
+    """(this process, largest finished worker) peak resident set size in MB."""
+    scale = 2**20 if sys.platform == "darwin" else 1024  # bytes on macOS, KB elsewhere
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+
+def train(csv_path, out_dir, workers=1, chunk_rows=50_000, max_features=VECTORIZER["max_features"]):
+    """Fit the TF-IDF model on `csv_path`, reading it once, and write it as a bundle to `out_dir`."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(VECTORIZER, max_features=max_features)
+    spill_dir = os.path.join(out_dir, SPILL_DIR)
+    os.makedirs(spill_dir, exist_ok=True)
+
+    metadata_tmp = os.path.join(out_dir, METADATA_FILE + ".tmp")
+    try:
+        # 1. count: one pass over the CSV; term counts spilled, frequencies merged, metadata written
+        started = time.perf_counter()
+        counts, docs, spilled = Counter(), Counter(), []
+        schema = pa.schema([("names", pa.string()), ("overview", pa.string())])
+
+        def count_tasks(writer):
+            for number, chunk in enumerate(read_chunks(csv_path, chunk_rows)):
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                yield number, chunk["overview"].tolist()
+
+        with pq.ParquetWriter(metadata_tmp, schema) as writer:
+            for path, chunk_terms, tf, df in map_chunks(_count_chunk, count_tasks(writer), _init_counter,
+                                                        (params, spill_dir), workers):
+                spilled.append(path)
+                counts.update(dict(zip(chunk_terms, tf.tolist())))
+                docs.update(dict(zip(chunk_terms, df.tolist())))
+        rows = pq.ParquetFile(metadata_tmp).metadata.num_rows
+        if rows == 0:
+            raise ValueError(f"No movies with an overview in {csv_path}")
+        print(f"Counted {len(counts)} distinct terms in {rows} overviews ({time.perf_counter() - started:.1f}s)")
+
+        # 2. select
+        terms, idf = select_features(counts, docs, rows, max_features)
+        del counts, docs
+
+        # 3. vectorize: CSR rows appended to raw files, then streamed into the bundle's arrays
+        started = time.perf_counter()
+        raw = {part: os.path.join(spill_dir, f"matrix_{part}.bin") for part in ("indices", "data")}
+        row_nnz = []
+        with open(raw["indices"], "wb") as indices_file, open(raw["data"], "wb") as data_file:
+            results = map_chunks(_vectorize_chunk, spilled, _init_vectorizer, (terms.tolist(), idf), workers)
+            for path, (nnz, indices, data) in zip(spilled, results):
+                row_nnz.append(nnz)
+                indices_file.write(indices.tobytes())
+                data_file.write(data.tobytes())
+                os.remove(path)
+        indptr = np.zeros(rows + 1, dtype=np.int64)
+        np.cumsum(np.concatenate(row_nnz), out=indptr[1:])
+        nnz = int(indptr[-1])
+        index_dtype = np.int32 if nnz < 2**31 else np.int64  # one dtype for both, so scipy wraps them without a copy
+        _save_array(os.path.join(out_dir, MATRIX_FILES["indptr"]), indptr.astype(index_dtype))
+        _finish_array(out_dir, MATRIX_FILES["indices"], raw["indices"], np.int32, nnz, index_dtype)
+        _finish_array(out_dir, MATRIX_FILES["data"], raw["data"], np.float64, nnz, np.float64)
+        _save_array(os.path.join(out_dir, VOCABULARY_FILE), terms.astype(str))
+        _save_array(os.path.join(out_dir, IDF_FILE), idf)
+        os.replace(metadata_tmp, os.path.join(out_dir, METADATA_FILE))
+        os.rmdir(spill_dir)
+        print(f"Vectorized {rows} x {len(terms)} matrix, {nnz} nonzeros ({time.perf_counter() - started:.1f}s)")
+    finally:
+        # A failed or interrupted run must not leave gigabytes of spilled chunks and half-written files in --out
+        shutil.rmtree(spill_dir, ignore_errors=True)
+        for leftover in (metadata_tmp, *glob.glob(os.path.join(out_dir, "*.tmp.npy"))):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    for stale in (*NEIGHBOR_FILES, INGEST_STATE_FILE):
+        if os.path.exists(os.path.join(out_dir, stale)):
+            os.remove(os.path.join(out_dir, stale))
+    vectorizer_params = TfidfVectorizer(**params).get_params()
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "rows": rows,
+        "features": len(terms),
+        "nnz": nnz,
+        "vectorizer": {name: vectorizer_params[name] for name in VECTORIZER_PARAMS},
+        "dtype": "float64",
+        "knn": KNN_PARAMS,
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE + ".tmp"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(out_dir, MANIFEST_FILE + ".tmp"), os.path.join(out_dir, MANIFEST_FILE))
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the TF-IDF model from a large CSV, streamed and tokenized in parallel."
+    )
+    parser.add_argument("--csv", default="imdb_movies.csv", help="catalog with 'names' and 'overview' columns")
+    parser.add_argument("--out", default="model_bundle", help="bundle directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="tokenizer processes")
+    parser.add_argument("--chunk-rows", type=int, default=50_000, help="CSV rows per chunk")
+    parser.add_argument("--max-features", type=int, default=VECTORIZER["max_features"])
+    args = parser.parse_args()
+    start_time = time.perf_counter()
+
+    manifest = train(args.csv, args.out, args.workers, args.chunk_rows, args.max_features)
+    own, worker = peak_rss_mb()
+    workers = f", {worker:.0f} MB in the largest worker" if args.workers > 1 else ""
+    print(f"Peak memory: {own:.0f} MB in this process{workers}")
+    print(f"✅ Bundle with {manifest['rows']} x {manifest['features']} matrix saved to {args.out} "
+          f"({time.perf_counter() - start_time:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
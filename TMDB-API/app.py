@@ -1,17 +1,57 @@
 import streamlit as st
 import pandas as pd
-import requests
+import os
+import sys
+from functools import partial
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # repo root, for common/
+from common import metrics
+from common.prefetch import Prefetcher
+from common.tmdb_cache import TMDBCache
+from common.tmdb_client import TMDBClient
+from common.tmdb_snapshot import SnapshotRefresher, TMDBSnapshot, snapshot_path
+from common.title_index import TitleIndex
+from common.title_search import TitleSearchIndex
+from common.recommender_client import RecommenderClient
+
+RECOMMENDER_URL = os.environ.get("RECOMMENDER_URL")  # use the headless service (service/) for recommendations
+RECOMMENDER_ENGINE = os.environ.get("RECOMMENDER_ENGINE", "hybrid")  # service engine: hybrid, tmdb, tfidf, embedding
+
+metrics.begin_request("rerun", app="tmdb")  # per-rerun total time; ended at the bottom of the script
 
 # --- LOAD DATA ---
+@st.cache_resource
+def load_metrics_exporter():
+    # Prometheus text on localhost:$METRICS_PORT/metrics when METRICS_ENABLED=1
+    return metrics.serve()
+
+load_metrics_exporter()
+
 @st.cache_data
+@metrics.timed()
 def load_movies():
     return pd.read_csv("imdb_movies.csv")   # must contain a "names" column
 
-movies_df = load_movies()
+@st.cache_resource
+def load_title_search():
+    # Prefix/fuzzy title search for the sidebar, built once
+    return TitleSearchIndex(load_movies()["names"])
+
+@st.cache_resource
+def load_title_index():
+    # O(1) title -> row IDs, the keys of the TMDB snapshot
+    return TitleIndex.from_frame(load_movies())
+
+title_search = load_title_search()
+title_index = load_title_index()
 
 # --- TMDB API Setup ---
-BASE_URL = "https://api.themoviedb.org/3"
+BASE_URL = os.environ.get("TMDB_BASE_URL", "https://api.themoviedb.org/3")  # point at benchmarks/stub_tmdb.py for offline runs
 IMAGE_URL = "https://image.tmdb.org/t/p/w500"
+SNAPSHOT_PATH = snapshot_path(".")  # filled by `python -m common.tmdb_snapshot`
+PREFETCH_CARDS = 5  # top cards whose pages are fetched ahead of a click
+POPULAR_TITLES = ["The Shawshank Redemption", "The Godfather", "The Dark Knight", "Money Heist", "3 Idiots"]
 
 HEADERS = {
     "accept": "application/json",
@@ -19,15 +59,85 @@ HEADERS = {
     "Authorization": ""  # replace with your key
 }
 
+@st.cache_resource
+def load_tmdb_client():
+    # Pooled session with rate limiting, timeouts and retries on 429/5xx
+    return TMDBClient(headers=HEADERS, base_url=BASE_URL)
+
+@st.cache_resource
+def load_tmdb_cache():
+    # In-memory LRU backed by SQLite, shared across sessions and restarts
+    return TMDBCache()
+
+@st.cache_resource
+def load_recommender_client():
+    # "hybrid" fuses the local engines and only waits a bounded time for TMDB, so pages render when TMDB is down
+    return RecommenderClient(RECOMMENDER_URL, engine=RECOMMENDER_ENGINE) if RECOMMENDER_URL else None
+
+@st.cache_resource
+def load_tmdb_snapshot():
+    # Row ID -> TMDB details, read locally; missing and stale rows are refreshed in the background
+    return SnapshotRefresher(TMDBSnapshot(SNAPSHOT_PATH), load_tmdb_client(), load_movies()["names"].tolist(), title_index)
+
+@st.cache_resource
+def load_prefetcher():
+    # Next pages for the cards on screen, shared by all sessions; TMDB data goes stale, hence the TTL,
+    # and pages without recommendations (TMDB unreachable) are not kept
+    return Prefetcher(ttl=3600, keep=lambda page: page is not None and bool(page[1]))
+
+tmdb = load_tmdb_client()
+tmdb_cache = load_tmdb_cache()
+tmdb_snapshot = load_tmdb_snapshot()
+recommender_client = load_recommender_client()
+prefetcher = load_prefetcher()
+
+@metrics.timed()
+def tmdb_details(titles):
+    # TMDB details for several titles in one indexed read, in order; None when not in the snapshot
+    return tmdb_snapshot.lookup(titles)
+
+@metrics.timed()
 def search_movie_tmdb(query):
-    url = f"{BASE_URL}/search/movie?query={query}"
-    response = requests.get(url, headers=HEADERS).json()
-    return response.get("results", [])
+    # None (TMDB unreachable) is not cached
+    return tmdb_cache.get_or_fetch(f"search:{query}", lambda: tmdb.search_movie(query)) or []
+
+@metrics.timed()
+def get_recommendations(movie_id, movie_title=None):
+    if recommender_client is not None:
+        recs = recommender_client.recommend_results(movie_title, k=15) or []
+        # Fill posters/ratings the service could not attach from the snapshot
+        for rec, details in zip(recs, tmdb_details([rec["title"] for rec in recs])):
+            if details and not rec.get("poster_path"):
+                rec.update(poster_path=details["poster_path"], vote_average=details["vote_average"])
+        return recs
+    return tmdb_cache.get_or_fetch(f"recommendations:{movie_id}", lambda: tmdb.recommendations(movie_id)) or []
+
+@metrics.timed()
+def load_page(movie_title):
+    # (TMDB details or {}, recommendations) behind a movie page; None when the movie cannot be shown
+    # The snapshot answers for catalog titles; anything else is searched on TMDB
+    snapshot_movie = tmdb_details([movie_title])[0]
+    movies = [snapshot_movie] if snapshot_movie else search_movie_tmdb(movie_title)
+    # With the recommender service the page still works when TMDB is unreachable, just without details
+    if not movies and recommender_client is None:
+        return None
+    selected_movie = movies[0] if movies else {}
+    return selected_movie, get_recommendations(selected_movie.get("id", movie_title), movie_title)
 
-def get_recommendations(movie_id):
-    url = f"{BASE_URL}/movie/{movie_id}/recommendations?language=en-US"
-    response = requests.get(url, headers=HEADERS).json()
-    return response.get("results", [])
+def warm_page(movie_title):
+    # Runs on the prefetch pool; its TMDB requests leave part of the rate limit to page loads
+    with tmdb.background():
+        return load_page(movie_title)
+
+@metrics.timed()
+def movie_page(movie_title):
+    # Pages warmed by prefetch_next_pages() come straight from memory
+    return prefetcher.get(movie_title, lambda: load_page(movie_title))
+
+def prefetch_next_pages(titles):
+    # Every prefetched page costs up to two TMDB requests, so only the top-ranked cards,
+    # which get most of the clicks, are warmed
+    prefetcher.prefetch([(title, partial(warm_page, title)) for title in titles[:PREFETCH_CARDS]])
 
 # --- STREAMLIT PAGE CONFIG ---
 st.set_page_config(page_title="Movie Recommender", page_icon="🎬", layout="wide")
@@ -116,20 +226,20 @@ if "active_movie" not in st.session_state:
 
 # --- SIDEBAR SEARCH ---
 st.sidebar.header("🎥 Movie Search")
-all_movie_names = movies_df["names"].dropna().unique().tolist()
-
-sidebar_options = [""] + all_movie_names
-current_active = st.session_state.active_movie
-if current_active and current_active not in all_movie_names:
-    sidebar_options.append(current_active)
-try:
-    sidebar_index = sidebar_options.index(current_active) if current_active else 0
-except ValueError:
-    sidebar_index = 0
-
-sidebar_selection = st.sidebar.selectbox("Search a movie:", options=sidebar_options, index=sidebar_index)
-if sidebar_selection != st.session_state.active_movie:
-    st.session_state.active_movie = sidebar_selection
+def select_match():
+    # Only a deliberate pick in the matches box changes the active movie
+    if st.session_state.title_match:
+        st.session_state.active_movie = st.session_state.title_match
+        # Back to blank, so picking the same title again after a card click still fires
+        st.session_state.title_match = ""
+
+# Only the top matches for the typed text are sent to the browser
+typed_title = st.sidebar.text_input("Search a movie:", placeholder="Start typing a title...")
+title_matches = title_search.search(typed_title, limit=10)
+if title_matches:
+    st.sidebar.selectbox("Matches:", options=[""] + title_matches, key="title_match", on_change=select_match)
+elif typed_title:
+    st.sidebar.caption("No matching titles.")
 active_movie_name = st.session_state.active_movie
 
 # --- MAIN SCREEN ---
@@ -142,37 +252,43 @@ if not active_movie_name:
     st.markdown("---")
     st.subheader("🔥 Popular Movies")
 
-    default_movies = [
-        {"title":"The Shawshank Redemption","poster":"/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg"},
-        {"title":"The Godfather","poster":"/rPdtLWNsZmAtoZl9PK7S2wE3qiS.jpg"},
-        {"title":"The Dark Knight","poster":"/qJ2tW6WMUDux911r6m7haRef0WH.jpg"},
-        {"title":"Money Heist","poster":"/reEMJA1uzscCbkpeRJeTT2bjqUp.jpg"},
-        {"title":"3 Idiots","poster":"/66A9MqXOyVFCssoloscw79z8Tew.jpg"}
-    ]
-
-    cols = st.columns(5)
-    for i, movie in enumerate(default_movies):
-        with cols[i]:
-            st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
-            st.image(IMAGE_URL + movie["poster"], use_container_width=True)
-            if st.button(movie["title"], key=f"default_{i}"):
-                st.session_state.active_movie = movie["title"]
-                st.rerun()
-            st.markdown("</div>", unsafe_allow_html=True)
+    # Posters from the TMDB snapshot
+    popular_details = tmdb_details(POPULAR_TITLES)
+    prefetch_next_pages(POPULAR_TITLES)
+
+    with metrics.span("render_grid", grid="popular"):
+        cols = st.columns(5)
+        for i, (movie_title, details) in enumerate(zip(POPULAR_TITLES, popular_details)):
+            with cols[i]:
+                st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
+                if details and details.get("poster_path"):
+                    st.image(IMAGE_URL + details["poster_path"], use_container_width=True)
+                else:
+                    st.markdown(
+                        "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
+                        "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
+                        "🎬 No Image</div>",
+                        unsafe_allow_html=True,
+                    )
+                if st.button(movie_title, key=f"default_{i}"):
+                    st.session_state.active_movie = movie_title
+                    st.rerun()
+                st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("---")
     st.info("👉 Use the sidebar or click a movie to explore recommendations.")
 else:
-    movies = search_movie_tmdb(active_movie_name)
-    if movies:
-        selected_movie = movies[0]
-        movie_id = selected_movie["id"]
+    page = movie_page(active_movie_name)
+    if page is not None:
+        selected_movie, recs = page
+        movie_id = selected_movie.get("id", active_movie_name)
         poster_path = selected_movie.get("poster_path")
 
         if poster_path:
             st.sidebar.image(IMAGE_URL + poster_path, caption=active_movie_name, use_container_width=True)
-        st.sidebar.markdown(f"**Release Date:** {selected_movie.get('release_date','N/A')}")
-        st.sidebar.markdown(f"**Rating:** {selected_movie.get('vote_average','N/A')}/10")
+        if selected_movie:
+            st.sidebar.markdown(f"**Release Date:** {selected_movie.get('release_date','N/A')}")
+            st.sidebar.markdown(f"**Rating:** {selected_movie.get('vote_average','N/A')}/10")
         if selected_movie.get('overview'):
             st.sidebar.markdown(f"**Overview:** {selected_movie['overview'][:200]}...")
 
@@ -183,28 +299,29 @@ else:
         st.markdown(f"<div class='rec-header'><h2>🎞️ Recommendations for {active_movie_name}</h2></div>", unsafe_allow_html=True)
         st.markdown("---")
 
-        recs = get_recommendations(movie_id)
         if recs:
-            for row_start in range(0, min(len(recs), 15), 5):
-                cols = st.columns(5)
-                for i, rec in enumerate(recs[row_start:row_start+5]):
-                    with cols[i]:
-                        poster_path = rec.get("poster_path")
-                        st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
-                        if poster_path:
-                            st.image(IMAGE_URL + poster_path, use_container_width=True)
-                        else:
-                            st.markdown(
-                                "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
-                                "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
-                                "🎬 No Image</div>",
-                                unsafe_allow_html=True,
-                            )
-                        st.markdown(f"<div class='movie-rating'>⭐ {rec.get('vote_average','N/A')}/10</div>", unsafe_allow_html=True)
-                        if st.button(rec["title"], key=f"rec_{movie_id}_{row_start + i}"):
-                            st.session_state.active_movie = rec["title"]
-                            st.rerun()
-                        st.markdown("</div>", unsafe_allow_html=True)
+            prefetch_next_pages([rec["title"] for rec in recs[:15]])
+            with metrics.span("render_grid", grid="recommendations"):
+                for row_start in range(0, min(len(recs), 15), 5):
+                    cols = st.columns(5)
+                    for i, rec in enumerate(recs[row_start:row_start+5]):
+                        with cols[i]:
+                            poster_path = rec.get("poster_path")
+                            st.markdown("<div class='movie-card'>", unsafe_allow_html=True)
+                            if poster_path:
+                                st.image(IMAGE_URL + poster_path, use_container_width=True)
+                            else:
+                                st.markdown(
+                                    "<div style='height:300px; background: linear-gradient(135deg,#ddd,#f8f8f8); "
+                                    "display:flex; align-items:center; justify-content:center; border-radius:8px; color:#666;'>"
+                                    "🎬 No Image</div>",
+                                    unsafe_allow_html=True,
+                                )
+                            st.markdown(f"<div class='movie-rating'>⭐ {rec.get('vote_average','N/A')}/10</div>", unsafe_allow_html=True)
+                            if st.button(rec["title"], key=f"rec_{movie_id}_{row_start + i}"):
+                                st.session_state.active_movie = rec["title"]
+                                st.rerun()
+                            st.markdown("</div>", unsafe_allow_html=True)
         else:
             st.warning("No recommendations found for this movie.")
             st.info("Try searching for a different movie using the sidebar.")
@@ -214,3 +331,5 @@ else:
         if st.button("🔄 Try Another Movie"):
             st.session_state.active_movie = ""
             st.rerun()
+
+metrics.end_request()
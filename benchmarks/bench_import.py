@@ -0,0 +1,165 @@
+# bench_import.py
+#
+# Startup cost of the recommendation code paths, two ways:
+#
+#   imports   `python -X importtime` for each module in IMPORT_TARGETS: total
+#             import time, the heaviest top-level packages it pulls in, and
+#             whether it drags in sklearn or torch (the lookup paths must not)
+#   apps      time from process launch to the first element an app renders
+#             (first_render_s) and to the finished page (ready_s), with the
+#             app run headless by AppTest over a synthetic catalog
+#
+# Every measurement runs in a fresh interpreter; the OS page cache stays
+# warm, as it does when a server restarts a worker.
+#
+# Usage (from the repo root):
+#     python benchmarks/bench_import.py --rows 100000 --runs 5
+#     python -X importtime -c "import sys; sys.path[:0] = ['TFIDF-KNN', '.']; import tfidf_recommender" 2> import.log
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from report import REPO_ROOT, write_report
+from stub_tmdb import start_stub_server
+from synthetic import DEFAULT_DATA_DIR, STORE_DIR, TFIDF_DIR, ensure_catalog
+
+# name -> (module, directories put on sys.path)
+IMPORT_TARGETS = {
+    "tfidf": ("tfidf_recommender", ["TFIDF-KNN", "."]),
+    "embedding": ("embedding_recommender", ["Sentence-Transformer", "."]),
+    "service": ("service.app", ["."]),
+    "streamlit": ("streamlit", []),
+    "sklearn-text": ("sklearn.feature_extraction.text", []),  # deferred to the first free-text TF-IDF query
+    "encoder": ("sentence_transformers", []),  # deferred to the first free-text embedding query
+}
+HEAVY_PACKAGES = ("sklearn", "torch", "sentence_transformers")
+
+# app name -> script, run from a scratch directory laid out like the repo root (see scratch_root)
+APPS = {
+    "tfidf": "TFIDF-KNN/app.py",
+    "sentence-transformer": "Sentence-Transformer/app.py",
+}
+
+RENDER_CHILD = """
+import json, sys, time
+launched, script = float(sys.argv[1]), sys.argv[2]
+from streamlit.runtime.scriptrunner_utils.script_run_context import ScriptRunContext
+marks = {}
+enqueue = ScriptRunContext.enqueue
+def timed_enqueue(self, msg):
+    if "first_render" not in marks and msg.HasField("delta"):
+        marks["first_render"] = time.time()
+    return enqueue(self, msg)
+ScriptRunContext.enqueue = timed_enqueue
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(script, default_timeout=600)
+app.secrets["API_KEY"] = "stub"
+app.run()
+ready = time.time()
+if app.exception:
+    raise SystemExit(app.exception[0].message)
+print(json.dumps({"first_render_s": marks["first_render"] - launched, "ready_s": ready - launched}))
+"""
+
+
+def parse_importtime(stderr):
+    """[(module, self µs, cumulative µs)] from `-X importtime` output, in import-completion order."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_import(module, paths):
+    code = f"import sys; sys.path[:0] = {[os.path.join(REPO_ROOT, path) for path in paths]!r}; import {module}"
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=REPO_ROOT)
+    if out.returncode != 0:
+        return None
+    return parse_importtime(out.stderr)
+
+
+def summarize_imports(entries, module, top=6):
+    """(total seconds, [(package, seconds)] heaviest first, {heavy package: imported?}) for one import."""
+    total = next(cumulative for name, _, cumulative in reversed(entries) if name == module)
+    packages = {}
+    for name, self_us, _ in entries:  # self times add up without double counting nested imports
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])[:top]
+    heavy = {package: package in packages for package in HEAVY_PACKAGES}
+    return total / 1e6, [(package, us / 1e6) for package, us in heaviest], heavy
+
+
+def scratch_root(directory):
+    """A working directory laid out like the repo, with the apps' model paths pointing at a synthetic catalog."""
+    root = tempfile.mkdtemp(prefix="bench_import_")
+    os.makedirs(os.path.join(root, "Sentence-Transformer"))
+    os.symlink(os.path.join(directory, TFIDF_DIR), os.path.join(root, "model_bundle"))
+    os.symlink(os.path.join(directory, STORE_DIR), os.path.join(root, "Sentence-Transformer", "movie_store"))
+    return root
+
+
+def measure_render(script, root, env):
+    launched = time.time()
+    out = subprocess.run([sys.executable, "-c", RENDER_CHILD, str(launched), script],
+                         check=True, capture_output=True, text=True, cwd=root, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-render.")
+    parser.add_argument("--targets", nargs="+", default=list(IMPORT_TARGETS), choices=IMPORT_TARGETS)
+    parser.add_argument("--apps", nargs="*", default=list(APPS), choices=APPS)
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic catalog size the apps load")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where synthetic.py keeps the catalogs")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement (median reported)")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/import-<commit>.json)")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'import':<14} {'time (s)':>9}  {'sklearn/torch':<14} heaviest packages")
+    for name in args.targets:
+        module, paths = IMPORT_TARGETS[name]
+        runs = [measure_import(module, paths) for _ in range(args.runs)]
+        if runs[0] is None:
+            print(f"{name:<14} {'-':>9}  not importable here")
+            continue
+        summaries = [summarize_imports(entries, module) for entries in runs]
+        import_s = float(np.median([summary[0] for summary in summaries]))
+        _, heaviest, heavy = summaries[0]
+        results.append({"key": f"import/{name}", "module": module, "heaviest": heaviest, **heavy,
+                        "metrics": {"import_s": import_s}})
+        flags = "/".join("yes" if heavy[package] else "no" for package in ("sklearn", "torch"))
+        print(f"{name:<14} {import_s:>9.3f}  {flags:<14} "
+              + ", ".join(f"{package} {seconds:.2f}" for package, seconds in heaviest[:4]))
+
+    if args.apps:
+        directory = ensure_catalog(args.rows, args.data_dir)
+        root = scratch_root(directory)
+        server, tmdb_url = start_stub_server()
+        env = dict(os.environ, TMDB_BASE_URL=tmdb_url, TMDB_SNAPSHOT_PATH=os.path.join(root, "tmdb_snapshot.sqlite3"),
+                   TMDB_CACHE_PATH=os.path.join(root, "tmdb.sqlite3"))
+        print(f"\n{'app':<22} {'rows':>9} {'first render (s)':>17} {'ready (s)':>10}")
+        for app in args.apps:
+            runs = [measure_render(os.path.join(REPO_ROOT, APPS[app]), root, env) for _ in range(args.runs)]
+            metrics = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+            results.append({"key": f"app/{app}/{args.rows}", "app": app, "rows": args.rows, "metrics": metrics})
+            print(f"{app:<22} {args.rows:>9} {metrics['first_render_s']:>17.3f} {metrics['ready_s']:>10.3f}")
+        server.shutdown()
+
+    config = {name: value for name, value in vars(args).items() if name != "out"}
+    print(f"✅ Results written to {write_report('import', config, results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# bench_recommenders.py
+#
+# Benchmarks both recommend() implementations on synthetic catalogs
+# (see synthetic.py) of several sizes:
+#
+#   load_s / import_s     cold import and artifact load in a fresh interpreter
+#   rss_mb / peak_rss_mb  resident memory after loading, and its peak
+#   first_query_s         first recommendation after loading
+#   p50_ms ... p99_ms     single-query recommend() latency
+#   batch_qps             recommend_many() throughput at --batch titles per call
+#   threads<N>_qps        recommend() throughput with N threads issuing queries,
+#   threads<N>_speedup    and its speedup over one thread
+#
+# Every (engine, size) pair runs in its own interpreter, so load times and
+# memory are not flattered by an earlier run. Set --blas-threads 1 to measure
+# scaling across request threads without BLAS's own threads competing.
+#
+# Usage (from the repo root):
+#     python benchmarks/bench_recommenders.py --rows 10000 100000 1000000
+#     python benchmarks/compare.py benchmarks/results/recommenders-<old>.json benchmarks/results/recommenders-<new>.json
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from report import REPO_ROOT, percentiles, write_report
+from synthetic import DEFAULT_DATA_DIR, STORE_DIR, TFIDF_DIR, ensure_catalog
+
+ENGINES = ("tfidf", "embedding")
+BLAS_THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def rss_mb():
+    """(current, peak) resident set size of this process in MB."""
+    import resource
+
+    current = None
+    try:
+        with open("/proc/self/status") as f:
+            current = next(int(line.split()[1]) / 1024 for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak / 2**20 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB elsewhere
+    return current if current is not None else peak, peak
+
+
+def load_engine(engine, directory):
+    """(recommender, import seconds, load seconds) for a synthetic catalog directory."""
+    for path in (REPO_ROOT, os.path.join(REPO_ROOT, "TFIDF-KNN"), os.path.join(REPO_ROOT, "Sentence-Transformer")):
+        if path not in sys.path:
+            sys.path.append(path)
+    started = time.perf_counter()
+    if engine == "tfidf":
+        from tfidf_recommender import TfidfRecommender
+
+        imported = time.perf_counter()
+        recommender = TfidfRecommender.load(os.path.join(directory, TFIDF_DIR))
+    elif engine == "embedding":
+        from embedding_recommender import EmbeddingRecommender
+
+        imported = time.perf_counter()
+        recommender = EmbeddingRecommender.load(os.path.join(directory, STORE_DIR))
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+    return recommender, imported - started, time.perf_counter() - imported
+
+
+def throughput(fn, queries, threads):
+    """Queries per second with `threads` threads sharing `queries`."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(fn, queries))
+    return len(queries) / (time.perf_counter() - started)
+
+
+def measure(engine, directory, queries=200, batch=32, threads=(1, 2, 4), k=15, seed=1):
+    """All metrics for one engine on one catalog; meant to run in a fresh interpreter."""
+    recommender, import_s, load_s = load_engine(engine, directory)
+    rss, _ = rss_mb()
+    names = recommender.movies["names"]
+    rng = np.random.default_rng(seed)
+    titles = names.iloc[rng.integers(len(names), size=queries)].tolist()
+
+    started = time.perf_counter()
+    recommender.recommend(titles[0], k=k)
+    first_query_s = time.perf_counter() - started
+
+    latencies = []
+    for title in titles:
+        started = time.perf_counter()
+        recommender.recommend(title, k=k)
+        latencies.append(time.perf_counter() - started)
+
+    batch_times = []
+    for start in range(0, len(titles) - batch + 1, batch):
+        started = time.perf_counter()
+        recommender.recommend_many(titles[start:start + batch], k=k)
+        batch_times.append(time.perf_counter() - started)
+
+    metrics = {
+        "import_s": import_s,
+        "load_s": load_s,
+        "rss_mb": rss,
+        "first_query_s": first_query_s,
+        **percentiles(latencies),
+        "batch_qps": batch / float(np.median(batch_times)) if batch_times else None,
+    }
+    single_qps = None
+    for n in threads:
+        qps = throughput(lambda title: recommender.recommend(title, k=k), titles, n)
+        single_qps = single_qps or qps
+        metrics[f"threads{n}_qps"] = qps
+        metrics[f"threads{n}_speedup"] = qps / single_qps
+    metrics["peak_rss_mb"] = rss_mb()[1]
+    info = {
+        "rows": len(names),
+        "backend": type(getattr(recommender, "backend", recommender)).__name__,
+        "neighbor_table": getattr(recommender, "neighbor_ids", None) is not None,
+    }
+    return metrics, info
+
+
+def run_child(engine, directory, args):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", engine, "--dir", directory,
+        "--queries", str(args.queries), "--batch", str(args.batch), "--k", str(args.k),
+        "--threads", *map(str, args.threads),
+    ]
+    env = dict(os.environ)
+    if args.blas_threads:
+        env.update(dict.fromkeys(BLAS_THREAD_VARS, str(args.blas_threads)))
+    out = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TF-IDF and embedding recommenders on synthetic catalogs.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where synthetic.py keeps the catalogs")
+    parser.add_argument("--queries", type=int, default=200, help="titles queried per measurement")
+    parser.add_argument("--batch", type=int, default=32, help="titles per recommend_many() call")
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--blas-threads", type=int, help="pin BLAS/OpenMP threads in the measured process")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/recommenders-<commit>.json)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        metrics, info = measure(args.child, args.dir, args.queries, args.batch, args.threads, args.k)
+        print(json.dumps({"metrics": metrics, "info": info}))
+        return
+
+    results = []
+    print(f"{'engine':<10} {'rows':>9} {'load (s)':>9} {'RSS (MB)':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'batch q/s':>10} {'max speedup':>12}")
+    for rows in args.rows:
+        directory = ensure_catalog(rows, args.data_dir)
+        for engine in args.engines:
+            run = run_child(engine, directory, args)
+            metrics = run["metrics"]
+            results.append({"key": f"{engine}/{rows}", "engine": engine, **run["info"], "metrics": metrics})
+            speedup = max(value for name, value in metrics.items() if name.endswith("_speedup"))
+            print(f"{engine:<10} {rows:>9} {metrics['load_s']:>9.3f} {metrics['rss_mb']:>9.0f} "
+                  f"{metrics['p50_ms']:>9.2f} {metrics['p99_ms']:>9.2f} {metrics['batch_qps']:>10.0f} {speedup:>11.2f}x")
+
+    config = {name: value for name, value in vars(args).items() if name not in ("child", "dir", "out")}
+    print(f"✅ Results written to {write_report('recommenders', config, results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
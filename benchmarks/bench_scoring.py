@@ -0,0 +1,78 @@
+# bench_scoring.py
+#
+# Microbenchmark for the Sentence-Transformer ScoringEngine on the embedding
+# stores of the synthetic catalogs (see synthetic.py):
+#
+#   p50_ms ... mean_ms              single-query top_k() latency
+#   batch_p50_ms ... batch_mean_ms  top_k_batch() latency at --batch queries per call
+#   batch_qps                       top_k_batch() throughput
+#
+# Usage (from the repo root):
+#     python benchmarks/bench_scoring.py --rows 10000 100000 1000000 --batch 32
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from report import REPO_ROOT, percentiles, write_report
+from synthetic import DEFAULT_DATA_DIR, STORE_DIR, ensure_catalog
+
+
+def measure(directory, queries=200, batch=32, k=15, seed=1):
+    """Metrics of exact top-k search over the catalog's embedding store."""
+    from embedding_store import load_store
+    from scoring import ScoringEngine
+
+    _, embeddings = load_store(os.path.join(directory, STORE_DIR))
+    engine = ScoringEngine(embeddings)
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(len(engine), size=queries)
+    engine.top_k_batch(ids[:batch], k=k)  # page the matrix in before timing
+
+    latencies = []
+    for idx in ids:
+        started = time.perf_counter()
+        engine.top_k(idx, k=k)
+        latencies.append(time.perf_counter() - started)
+
+    batch_times = []
+    for start in range(0, len(ids) - batch + 1, batch):
+        started = time.perf_counter()
+        engine.top_k_batch(ids[start:start + batch], k=k)
+        batch_times.append(time.perf_counter() - started)
+
+    return {
+        **percentiles(latencies),
+        **percentiles(batch_times, prefix="batch_"),
+        "batch_qps": batch / float(np.median(batch_times)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ScoringEngine top-k search.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where synthetic.py keeps the catalogs")
+    parser.add_argument("--queries", type=int, default=200, help="row IDs queried per measurement")
+    parser.add_argument("--batch", type=int, default=32, help="queries per top_k_batch() call")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--out", help="result file (default: benchmarks/results/scoring-<commit>.json)")
+    args = parser.parse_args()
+
+    sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, "Sentence-Transformer")]
+    results = []
+    print(f"{'rows':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'batch p50 (ms)':>15} {'per query in batch (ms)':>24}")
+    for rows in args.rows:
+        metrics = measure(ensure_catalog(rows, args.data_dir), args.queries, args.batch, args.k)
+        results.append({"key": f"exact/{rows}", "rows": rows, "metrics": metrics})
+        print(f"{rows:>10} {metrics['p50_ms']:>9.2f} {metrics['p99_ms']:>9.2f} {metrics['batch_p50_ms']:>15.2f} "
+              f"{metrics['batch_p50_ms'] / args.batch:>24.3f}")
+
+    config = {name: value for name, value in vars(args).items() if name != "out"}
+    print(f"✅ Results written to {write_report('scoring', config, results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
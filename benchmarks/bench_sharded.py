@@ -0,0 +1,145 @@
+# bench_sharded.py
+#
+# Scaling of the sharded embedding search (Sentence-Transformer/sharded.py)
+# with the number of worker threads, next to exact ScoringEngine search, on
+# synthetic catalogs (see synthetic.py):
+#
+#   load_s / rss_mb     opening the store and its shards, and resident memory after it
+#   p50_ms ... p99_ms   single-query top_k() latency
+#   batch_qps           top_k_batch() throughput at --batch queries per call
+#   batch_speedup       batch_qps over the same shards searched by one worker
+#                       (workers=1 is always measured, whatever --workers lists)
+#
+# Shards are written once per (rows, shards) into <rows>/shards-<n>/ beside
+# the synthetic catalog, not into its movie_store/, so the other benchmarks
+# keep measuring the backend they always did. Every configuration runs in
+# its own interpreter; "exact" keeps BLAS's default threads, as the app
+# does without shards.
+#
+# Usage (from the repo root):
+#     python benchmarks/bench_sharded.py --rows 1000000 --shards 16 --workers 1 2 4 8
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from bench_recommenders import rss_mb
+from report import REPO_ROOT, percentiles, write_report
+from synthetic import DEFAULT_DATA_DIR, STORE_DIR, ensure_catalog
+
+
+def shards_dir(directory, n_shards):
+    return os.path.join(directory, f"shards-{n_shards}")
+
+
+def ensure_shards(directory, n_shards):
+    """Directory of the catalog's embeddings split into `n_shards`, written if missing."""
+    from embedding_store import load_store, store_fingerprint
+    from sharded import build_shards, has_shards
+
+    path = shards_dir(directory, n_shards)
+    if not has_shards(path):
+        _, embeddings = load_store(os.path.join(directory, STORE_DIR))
+        build_shards(path, embeddings, n_shards, fingerprint=store_fingerprint(os.path.join(directory, STORE_DIR)))
+    return path
+
+
+def measure(directory, n_shards, workers, queries=200, batch=32, k=15, seed=1):
+    """Metrics for exact search (workers=0) or the shards on `workers` threads; meant for a fresh interpreter."""
+    from embedding_store import load_store
+    from scoring import ScoringEngine
+    from sharded import ShardedEngine
+
+    started = time.perf_counter()
+    _, embeddings = load_store(os.path.join(directory, STORE_DIR))
+    if workers:
+        engine = ShardedEngine.load(shards_dir(directory, n_shards), embeddings, workers=workers)
+    else:
+        engine = ScoringEngine(embeddings)
+    load_s = time.perf_counter() - started
+    rss, _ = rss_mb()
+
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(len(engine), size=queries)
+    engine.top_k_batch(ids[:batch], k=k)  # page the matrix in before timing
+
+    latencies = []
+    for idx in ids:
+        started = time.perf_counter()
+        engine.top_k(idx, k=k)
+        latencies.append(time.perf_counter() - started)
+
+    batch_times = []
+    for start in range(0, len(ids) - batch + 1, batch):
+        started = time.perf_counter()
+        engine.top_k_batch(ids[start:start + batch], k=k)
+        batch_times.append(time.perf_counter() - started)
+
+    return {
+        "load_s": load_s,
+        "rss_mb": rss,
+        **percentiles(latencies),
+        "batch_qps": batch / float(np.median(batch_times)),
+    }
+
+
+def run_child(directory, n_shards, workers, args):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", "--dir", directory,
+        "--shards", str(n_shards), "--workers", str(workers),
+        "--queries", str(args.queries), "--batch", str(args.batch), "--k", str(args.k),
+    ]
+    out = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sharded embedding search against worker count.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--shards", type=int, default=16, help="shards the catalog is split into")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="where synthetic.py keeps the catalogs")
+    parser.add_argument("--queries", type=int, default=200, help="row IDs queried per measurement")
+    parser.add_argument("--batch", type=int, default=32, help="queries per top_k_batch() call")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--out", help="result file (default: benchmarks/results/sharded-<commit>.json)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, "Sentence-Transformer")]
+    if args.child:
+        print(json.dumps(measure(args.dir, args.shards, args.workers[0], args.queries, args.batch, args.k)))
+        return
+
+    results = []
+    print(f"{'search':<12} {'rows':>9} {'load (s)':>9} {'RSS (MB)':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'batch q/s':>10} {'speedup':>8}")
+    for rows in args.rows:
+        directory = ensure_catalog(rows, args.data_dir)
+        ensure_shards(directory, args.shards)
+        single_qps = None
+        for workers in [0, *sorted(set(args.workers) | {1})]:  # 1 first: the baseline of batch_speedup
+            metrics = run_child(directory, args.shards, workers, args)
+            name = f"sharded-{workers}" if workers else "exact"
+            if workers:
+                if workers == 1:
+                    single_qps = metrics["batch_qps"]
+                metrics["batch_speedup"] = metrics["batch_qps"] / single_qps
+            results.append({"key": f"{name}/{rows}", "workers": workers, "shards": args.shards if workers else 1,
+                            "rows": rows, "metrics": metrics})
+            speedup = f"{metrics['batch_speedup']:.2f}x" if workers else "-"
+            print(f"{name:<12} {rows:>9} {metrics['load_s']:>9.3f} {metrics['rss_mb']:>9.0f} {metrics['p50_ms']:>9.2f} "
+                  f"{metrics['p99_ms']:>9.2f} {metrics['batch_qps']:>10.0f} {speedup:>8}")
+
+    config = {name: value for name, value in vars(args).items() if name not in ("child", "dir", "out")}
+    print(f"✅ Results written to {write_report('sharded', config, results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# bench_startup.py
+#
+# Cold-start time of the TF-IDF recommender, from process launch to the
+# first recommendation, for the notebook's pickles and the model bundle.
+# Every run is a fresh interpreter; the OS page cache stays warm, as it
+# does when a server restarts a worker. Medians over --runs, per model dir:
+#
+#   import_s        importing tfidf_recommender (pandas, numpy, ...)
+#   load_s          TfidfRecommender.load()
+#   first_query_s   the first recommend() call
+#   total_s         process launch to the first recommendation
+#
+# Usage (from the repo root):
+#     python benchmarks/bench_startup.py --runs 5
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from report import REPO_ROOT, write_report
+
+TFIDF_DIR = os.path.join(REPO_ROOT, "TFIDF-KNN")
+
+CHILD = """
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+started = time.perf_counter()
+sys.path[:0] = [{tfidf_dir!r}, {repo_root!r}]
+from tfidf_recommender import TfidfRecommender
+imported = time.perf_counter()
+recommender = TfidfRecommender.load({model_dir!r})
+loaded = time.perf_counter()
+recommender.recommend({title!r})
+done = time.perf_counter()
+print(json.dumps({{"import_s": imported - started, "load_s": loaded - imported, "first_query_s": done - loaded}}))
+"""
+
+
+def run_once(model_dir, title):
+    code = CHILD.format(tfidf_dir=TFIDF_DIR, repo_root=REPO_ROOT, model_dir=model_dir, title=title)
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    total = time.perf_counter() - start
+    return dict(json.loads(out.strip().splitlines()[-1]), total_s=total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TF-IDF recommender startup time.")
+    parser.add_argument("--model-dirs", nargs="+", default=[
+        os.path.join(TFIDF_DIR, "pickle_model"),
+        os.path.join(TFIDF_DIR, "model_bundle"),
+    ])
+    parser.add_argument("--title", default="The Dark Knight")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", help="result file (default: benchmarks/results/startup-<commit>.json)")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'model dir':<16} {'imports (s)':>12} {'load (s)':>9} {'1st rec (s)':>12} {'launch→rec (s)':>15}")
+    for model_dir in args.model_dirs:
+        run_once(model_dir, args.title)  # warm the page cache
+        runs = [run_once(model_dir, args.title) for _ in range(args.runs)]
+        metrics = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+        name = os.path.basename(os.path.normpath(model_dir))
+        results.append({"key": f"tfidf/{name}", "model_dir": model_dir, "metrics": metrics})
+        print(f"{name:<16} {metrics['import_s']:>12.3f} {metrics['load_s']:>9.3f} "
+              f"{metrics['first_query_s']:>12.3f} {metrics['total_s']:>15.3f}")
+
+    config = {name: value for name, value in vars(args).items() if name != "out"}
+    print(f"✅ Results written to {write_report('startup', config, results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
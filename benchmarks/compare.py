@@ -0,0 +1,69 @@
+# compare.py
+#
+# Compare two benchmark result files written by report.py (say, the base
+# branch and a feature branch) and flag metrics that got worse by more than
+# a threshold. Exits with status 1 when there is a regression, so it can
+# gate CI.
+#
+# Usage (from the repo root):
+#     python benchmarks/compare.py benchmarks/results/recommenders-3a99aa5.json \
+#         benchmarks/results/recommenders-0db45a4.json --threshold 0.10
+
+import argparse
+import sys
+
+from report import direction, load_report
+
+
+def compare(baseline, candidate, threshold=0.10, min_ms=0.05):
+    """Rows of (key, metric, baseline, candidate, relative change, regressed) for metrics in both runs.
+
+    The relative change is signed so that positive means worse. Latencies
+    below `min_ms` in both runs are too close to timer noise to flag, and
+    informational metrics (see report.direction) are skipped.
+    """
+    rows = []
+    for key in sorted(baseline.keys() & candidate.keys()):
+        for metric in sorted(baseline[key].keys() & candidate[key].keys()):
+            old, new = baseline[key][metric], candidate[key][metric]
+            sign = direction(metric)
+            if sign is None or not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            if old == 0:
+                change = 0.0 if new == 0 else float("inf")
+            else:
+                change = (new - old) / abs(old)
+            change *= -sign
+            noise = metric.endswith("_ms") and max(old, new) < min_ms
+            rows.append((key, metric, old, new, change, change > threshold and not noise))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change that counts as a regression")
+    parser.add_argument("--all", action="store_true", help="print every metric, not only regressions")
+    args = parser.parse_args()
+
+    base_report, baseline = load_report(args.baseline)
+    cand_report, candidate = load_report(args.candidate)
+    if base_report["benchmark"] != cand_report["benchmark"]:
+        sys.exit(f"Cannot compare a '{base_report['benchmark']}' run with a '{cand_report['benchmark']}' run")
+    if base_report["meta"].get("platform") != cand_report["meta"].get("platform"):
+        print("⚠️  The runs were taken on different machines")
+
+    rows = compare(baseline, candidate, args.threshold)
+    regressions = [row for row in rows if row[5]]
+    print(f"{base_report['meta'].get('commit')} → {cand_report['meta'].get('commit')}: "
+          f"{len(rows)} metrics compared, {len(regressions)} regressed by more than {args.threshold:.0%}")
+    print(f"{'key':<28} {'metric':<22} {'baseline':>12} {'candidate':>12} {'change':>8}")
+    for key, metric, old, new, change, regressed in rows if args.all else regressions:
+        print(f"{key:<28} {metric:<22} {old:>12.4g} {new:>12.4g} {-change * direction(metric):>+8.1%}"
+              f"{'  ❌' if regressed else ''}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
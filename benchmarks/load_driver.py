@@ -0,0 +1,325 @@
+# load_driver.py
+#
+# Load test: replays browsing sessions against either the recommender
+# service (service/) or one of the Streamlit apps, with TMDB served by the
+# local stub (stub_tmdb.py) so no run touches the real API.
+#
+# A session opens a movie the way a visitor would from the sidebar (popular
+# titles far more often than the long tail), then mostly clicks one of the
+# shown recommendations, top ranks more often than lower ones, and now and
+# then goes back home or opens another movie. Sessions are generated from a
+# seed, or recorded/replayed as JSON lines so two commits see the same
+# clicks:
+#
+#   {"session": 0, "actions": [{"action": "select", "title": "Heat"}, {"action": "click", "rank": 2}, ...]}
+#
+# Targets:
+#   service  GET /recommend through common/recommender_client.py. With
+#            --start-service the driver launches uvicorn itself over a
+#            synthetic catalog of --rows movies (see synthetic.py).
+#   app      the script run headless by streamlit.testing.v1.AppTest, one
+#            AppTest per virtual user; every action is a full script rerun,
+#            i.e. a page render, with a cold TMDB snapshot and cache in a
+#            temporary directory.
+#
+# Per-action latency percentiles, throughput, errors and the number of stub
+# TMDB requests go to a JSON result file (see report.py).
+#
+# Usage (from the repo root):
+#     python benchmarks/load_driver.py --target service --start-service --rows 100000 --users 8 --sessions 200
+#     python benchmarks/load_driver.py --target service --url http://127.0.0.1:8000 --catalog TFIDF-KNN/model_bundle/metadata.parquet
+#     python benchmarks/load_driver.py --target app --app tfidf --users 4 --sessions 50
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+from report import REPO_ROOT, percentiles, write_report
+from stub_tmdb import start_stub_server
+from synthetic import CATALOG_FILE, DEFAULT_DATA_DIR, STORE_DIR, TFIDF_DIR, ensure_catalog
+
+sys.path.append(REPO_ROOT)
+
+from common.tmdb_snapshot import read_titles  # noqa: E402
+
+# app name -> (script, working directory it expects, catalog its titles come from)
+APPS = {
+    "tfidf": ("TFIDF-KNN/app.py", "TFIDF-KNN", "TFIDF-KNN/model_bundle/metadata.parquet"),
+    "sentence-transformer": ("Sentence-Transformer/app.py", ".", "Sentence-Transformer/movie_store/metadata.csv"),
+    "tmdb": ("TMDB-API/app.py", "TMDB-API", "TMDB-API/imdb_movies.csv"),
+}
+GRID_SIZE = 15
+
+
+def click_streams(titles, sessions, clicks=8, click_share=0.7, home_share=0.1, seed=0):
+    """`sessions` lists of actions over `titles`, deterministic for a seed."""
+    rng = np.random.default_rng(seed)
+    titles = [title for title in titles if isinstance(title, str) and title.strip()]
+    order = rng.permutation(len(titles))  # which titles are popular
+    popularity = np.cumsum(1.0 / np.arange(1, len(titles) + 1))
+    popularity /= popularity[-1]
+    rank_weights = 1.0 / np.arange(1, GRID_SIZE + 1)
+    rank_weights /= rank_weights.sum()
+
+    def popular_title():
+        return titles[order[min(np.searchsorted(popularity, rng.random()), len(titles) - 1)]]
+
+    streams = []
+    for session in range(sessions):
+        actions = [{"action": "select", "title": popular_title()}]
+        for _ in range(int(rng.integers(1, clicks + 1))):
+            roll = rng.random()
+            if roll < click_share:
+                actions.append({"action": "click", "rank": int(rng.choice(GRID_SIZE, p=rank_weights))})
+            elif roll < click_share + home_share:
+                actions.append({"action": "home"})
+            else:
+                actions.append({"action": "select", "title": popular_title()})
+        streams.append({"session": session, "actions": actions})
+    return streams
+
+
+def save_streams(path, streams):
+    with open(path, "w", encoding="utf-8") as f:
+        for stream in streams:
+            f.write(json.dumps(stream) + "\n")
+
+
+def load_streams(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ServiceUser:
+    """One visitor of the recommender service; remembers the titles it was last shown."""
+
+    def __init__(self, url, engine, k=GRID_SIZE):
+        from common.recommender_client import RecommenderClient
+
+        self.client = RecommenderClient(url, engine=engine, pool_size=2)
+        self.k = k
+        self.shown = []
+
+    def perform(self, action):
+        """Run one action; returns False when it could not be performed (e.g. clicking an empty grid)."""
+        if action["action"] == "home":
+            self.shown = []
+            return True
+        if action["action"] == "click":
+            if action["rank"] >= len(self.shown):
+                return False
+            title = self.shown[action["rank"]]
+        else:
+            title = action["title"]
+        results = self.client.recommend_results(title, k=self.k)
+        self.shown = [result["title"] for result in results or []]
+        return True
+
+
+class AppUser:
+    """One browser session of a Streamlit app, driven through AppTest."""
+
+    def __init__(self, script, timeout=60):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(script, default_timeout=timeout)
+        self.app.secrets["API_KEY"] = "stub"
+        self.app.run()
+
+    def _grid(self):
+        keys = [button.key for button in self.app.button if button.key and button.key.startswith(("rec_", "search_"))]
+        return keys
+
+    def perform(self, action):
+        if action["action"] == "click":
+            grid = self._grid()
+            if action["rank"] >= len(grid):
+                return False
+            self.app.button(key=grid[action["rank"]]).click()
+        else:
+            self.app.session_state["active_movie"] = action.get("title", "")
+        self.app.run()
+        if self.app.exception:
+            raise RuntimeError(self.app.exception[0].message)
+        return True
+
+
+@contextmanager
+def running_service(directory, port, workers, tmdb_url):
+    """uvicorn serving service.app over a synthetic catalog, until the block exits."""
+    env = dict(
+        os.environ,
+        RECOMMENDER_TFIDF_DIR=os.path.join(directory, TFIDF_DIR),
+        RECOMMENDER_STORE_DIR=os.path.join(directory, STORE_DIR),
+        TMDB_BASE_URL=tmdb_url,
+        TMDB_API_KEY="stub",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "service.app:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        import requests
+
+        deadline = time.monotonic() + 600  # large catalogs take a while to load
+        while True:
+            try:
+                if requests.get(f"{url}/ready", timeout=1).ok:
+                    break
+            except requests.ConnectionError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("The recommender service did not come up")
+            time.sleep(0.5)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def replay(streams, make_user, users, think=0.0):
+    """Replay `streams` with `users` concurrent visitors; returns (timings by action, errors, skipped, seconds)."""
+    work = queue.Queue()
+    for stream in streams:
+        work.put(stream)
+    timings = defaultdict(list)
+    counts = {"errors": 0, "skipped": 0}
+    lock = threading.Lock()
+
+    def visitor():
+        user = make_user()
+        while True:
+            try:
+                stream = work.get_nowait()
+            except queue.Empty:
+                return
+            for action in stream["actions"]:
+                started = time.perf_counter()
+                try:
+                    done = user.perform(action)
+                except Exception:
+                    done = None
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if done:
+                        timings[action["action"]].append(elapsed)
+                    else:
+                        counts["errors" if done is None else "skipped"] += 1
+                if think:
+                    time.sleep(think)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=visitor, name=f"visitor-{i}") for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, counts["errors"], counts["skipped"], time.perf_counter() - started
+
+
+def summarize(target, timings, errors, skipped, elapsed, tmdb_calls):
+    results = [
+        {"key": f"{target}/{action}", "metrics": {**percentiles(samples), "count": len(samples)}}
+        for action, samples in sorted(timings.items())
+    ]
+    samples = [sample for action_samples in timings.values() for sample in action_samples]
+    results.append({"key": f"{target}/all", "metrics": {
+        **percentiles(samples),
+        "throughput_qps": len(samples) / elapsed,
+        "action_errors": errors,
+        "skipped": skipped,
+        "tmdb_calls": tmdb_calls,
+        "wall_s": elapsed,
+    }})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay click streams against the recommender service or an app.")
+    parser.add_argument("--target", choices=("service", "app"), default="service")
+    parser.add_argument("--url", help="running recommender service (target=service)")
+    parser.add_argument("--start-service", action="store_true", help="launch the service over a synthetic catalog")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic catalog size for --start-service")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--service-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--engine", default="tfidf", help="service engine: tfidf, embedding, hybrid, tmdb")
+    parser.add_argument("--app", choices=sorted(APPS), default="tfidf", help="app to render (target=app)")
+    parser.add_argument("--catalog", help="titles the sessions pick from (default: the target's own catalog)")
+    parser.add_argument("--users", type=int, default=4, help="concurrent visitors")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--clicks", type=int, default=8, help="maximum actions after the first per session")
+    parser.add_argument("--think", type=float, default=0.0, help="seconds a visitor waits between actions")
+    parser.add_argument("--tmdb-latency", type=float, default=0.05, help="seconds the stub TMDB adds per request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", help="write the generated sessions to this JSON-lines file")
+    parser.add_argument("--replay", help="replay sessions from a JSON-lines file instead of generating them")
+    parser.add_argument("--out", help="result file (default: benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args()
+
+    stub, tmdb_url = start_stub_server(latency=args.tmdb_latency)
+    os.environ["TMDB_BASE_URL"] = tmdb_url
+
+    directory = None
+    if args.target == "service" and args.start_service:
+        directory = ensure_catalog(args.rows, args.data_dir)
+    catalog = args.catalog
+    if catalog is None:
+        catalog = os.path.join(directory, CATALOG_FILE) if directory else os.path.join(REPO_ROOT, APPS[args.app][2])
+
+    if args.replay:
+        streams = load_streams(args.replay)
+    else:
+        streams = click_streams(read_titles(catalog), args.sessions, args.clicks, seed=args.seed)
+    if args.record:
+        save_streams(args.record, streams)
+    print(f"Replaying {len(streams)} sessions, {sum(len(s['actions']) for s in streams)} actions, "
+          f"with {args.users} users against the {args.target}")
+
+    if args.target == "service":
+        if directory:
+            with running_service(directory, args.port, args.service_workers, tmdb_url) as url:
+                result = replay(streams, lambda: ServiceUser(url, args.engine), args.users, args.think)
+        elif args.url:
+            result = replay(streams, lambda: ServiceUser(args.url, args.engine), args.users, args.think)
+        else:
+            parser.error("target=service needs --url or --start-service")
+        target = f"service-{args.engine}"
+    else:
+        script, workdir, _ = APPS[args.app]
+        scratch = tempfile.mkdtemp()  # cold TMDB snapshot and cache, so runs do not warm each other
+        os.environ["TMDB_SNAPSHOT_PATH"] = os.path.join(scratch, "tmdb_snapshot.sqlite3")
+        os.environ["TMDB_CACHE_PATH"] = os.path.join(scratch, "tmdb.sqlite3")
+        os.chdir(os.path.join(REPO_ROOT, workdir))  # the apps open their models relative to the working directory
+        result = replay(streams, lambda: AppUser(os.path.join(REPO_ROOT, script)), args.users, args.think)
+        target = f"app-{args.app}"
+
+    timings, errors, skipped, elapsed = result
+    results = summarize(target, timings, errors, skipped, elapsed, stub.requests_served)
+    print(f"{'action':<10} {'count':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    for entry in results[:-1]:
+        metrics = entry["metrics"]
+        print(f"{entry['key'].split('/')[-1]:<10} {metrics['count']:>7} {metrics['p50_ms']:>9.1f} "
+              f"{metrics['p95_ms']:>9.1f} {metrics['p99_ms']:>9.1f}")
+    total = results[-1]["metrics"]
+    print(f"{total['throughput_qps']:.1f} actions/s, {errors} errors, {skipped} skipped, "
+          f"{stub.requests_served} stub TMDB requests in {elapsed:.1f}s")
+
+    config = {name: value for name, value in vars(args).items() if name not in ("out", "record")}
+    print(f"✅ Results written to {write_report('load', config, results, args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# report.py
+#
+# JSON result files shared by the benchmarks, so runs on different commits
+# can be compared with compare.py:
+#
+#   {
+#     "benchmark": "recommenders",
+#     "meta": {"commit": "3a99aa5", "dirty": false, "python": "3.12.3", "cpus": 8, ...},
+#     "config": {... the benchmark's arguments ...},
+#     "results": [{"key": "tfidf/100000", "metrics": {"load_s": 0.21, "p99_ms": 4.1, "batch_qps": 950, ...}}]
+#   }
+#
+# Metric names carry their unit, which also tells compare.py which way is
+# better: *_qps and *_speedup are higher-is-better; *_s, *_ms, *_mb,
+# *_errors and *_calls are lower-is-better. Anything else (counts, flags)
+# is informational and not compared.
+
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+HIGHER_IS_BETTER = ("_qps", "_speedup")
+LOWER_IS_BETTER = ("_s", "_ms", "_mb", "_errors", "_calls")
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata():
+    """Commit, interpreter and machine the numbers were taken on."""
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def percentiles(samples, prefix=""):
+    """{prefix}p50_ms / p95_ms / p99_ms / mean_ms of latencies given in seconds."""
+    samples = np.asarray(samples, dtype=np.float64) * 1e3
+    if len(samples) == 0:
+        return {}
+    return {
+        f"{prefix}p50_ms": float(np.percentile(samples, 50)),
+        f"{prefix}p95_ms": float(np.percentile(samples, 95)),
+        f"{prefix}p99_ms": float(np.percentile(samples, 99)),
+        f"{prefix}mean_ms": float(samples.mean()),
+    }
+
+
+def write_report(benchmark, config, results, out=None):
+    """Write a result file (default: benchmarks/results/<benchmark>-<commit>.json) and return its path."""
+    report = {"benchmark": benchmark, "meta": run_metadata(), "config": config, "results": results}
+    if out is None:
+        suffix = report["meta"]["commit"] or time.strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{benchmark}-{suffix}{'-dirty' if report['meta']['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    return out
+
+
+def load_report(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {result["key"]: result["metrics"] for result in report["results"]}
+
+
+def direction(metric):
+    """+1 if higher is better, -1 if lower is better, None for informational metrics."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
@@ -0,0 +1,93 @@
+# stub_tmdb.py
+#
+# Minimal local stand-in for the TMDB API, for exercising the apps and the
+# TMDB helpers in common/ without network access or an API key.
+#
+# Serves /search/movie?query=... and /movie/<id>/recommendations with
+# deterministic fake results and an optional artificial latency.
+#
+# Usage:
+#     python benchmarks/stub_tmdb.py --port 8765 --latency 0.05
+#     TMDB_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_movie(title):
+    movie_id = zlib.crc32(title.encode("utf-8")) % 1_000_000
+    return {
+        "id": movie_id,
+        "title": title,
+        "poster_path": f"/stub{movie_id}.jpg",
+        "release_date": "2000-01-01",
+        "vote_average": round((movie_id % 100) / 10, 1),
+        "overview": f"Stub overview for {title}.",
+    }
+
+
+class StubTMDBHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        with self.server.count_lock:
+            self.server.requests_served += 1
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        path = url.path.removeprefix("/3")
+        if path == "/search/movie":
+            query = parse_qs(url.query).get("query", [""])[0]
+            body = {"results": [fake_movie(query)] if query else []}
+        elif path.startswith("/movie/") and path.endswith("/recommendations"):
+            movie_id = path.split("/")[2]
+            body = {"results": [fake_movie(f"Recommended {movie_id}-{i}") for i in range(20)]}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(port=0, latency=0.0):
+    handler = type("Handler", (StubTMDBHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.count_lock = threading.Lock()
+    server.requests_served = 0
+    return server
+
+
+def start_stub_server(port=0, latency=0.0):
+    """Start the stub in a background thread; returns (server, base_url).
+
+    `server.requests_served` counts the requests answered so far.
+    """
+    server = make_server(port, latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub of the TMDB API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency)
+    print(f"Stub TMDB listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
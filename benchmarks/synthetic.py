@@ -0,0 +1,165 @@
+# synthetic.py
+#
+# Synthetic catalogs for the benchmarks, in the on-disk formats the two
+# recommenders load:
+#
+#   <out>/<rows>/
+#   ├── catalog.csv        # names, overview
+#   ├── tfidf/             # artifacts.py model bundle (+ neighbors.py table with --neighbors)
+#   └── movie_store/       # embedding_store.py layout
+#
+# Overviews are drawn from a pseudo-word vocabulary with a Zipf-like word
+# frequency, and every movie belongs to one of `topics` latent topics that
+# supply part of its words, so nearest neighbors are meaningful rather than
+# random. Titles repeat now and then, as remakes do in the real catalog.
+#
+# Encoding a million overviews with the SentenceTransformer would dominate
+# the run, so the embeddings are a fixed random projection of the TF-IDF
+# rows: dense, unit-length and with the same shape as the real store.
+#
+# Usage (from the repo root; catalogs that already exist are reused):
+#     python benchmarks/synthetic.py --rows 10000 100000 1000000
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+DEFAULT_DATA_DIR = os.path.join(REPO_ROOT, "benchmarks", ".data")
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "TFIDF-KNN"), os.path.join(REPO_ROOT, "Sentence-Transformer")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+CATALOG_FILE = "catalog.csv"
+TFIDF_DIR = "tfidf"
+STORE_DIR = "movie_store"
+SYLLABLES = ["ka", "lo", "mi", "ren", "sta", "vo", "dra", "bel", "qui", "nor", "tes", "fa", "zu", "gri", "pel", "an"]
+
+
+def vocabulary(size, seed=0):
+    """`size` distinct pseudo-words of two to four syllables."""
+    rng = np.random.default_rng(seed)
+    words = set()
+    while len(words) < size:
+        lengths = rng.integers(2, 5, size=size)
+        picks = rng.integers(len(SYLLABLES), size=(size, 4))
+        words.update("".join(SYLLABLES[s] for s in row[:n]) for row, n in zip(picks, lengths))
+    return sorted(words)[:size]
+
+
+def synthetic_catalog(rows, vocab_size=30_000, topics=500, topic_share=0.5, duplicate_share=0.02, seed=0):
+    """DataFrame of `rows` movies with "names" and "overview" columns."""
+    rng = np.random.default_rng(seed)
+    words = np.array(vocabulary(vocab_size, seed))
+    popularity = np.cumsum(1.0 / np.arange(1, vocab_size + 1) ** 1.1)
+    popularity /= popularity[-1]
+    topic_words = rng.integers(vocab_size, size=(topics, 40))  # each topic draws from its own 40 words
+
+    lengths = rng.integers(20, 80, size=rows)
+    movie_topics = rng.integers(topics, size=rows)
+    overviews = []
+    for start in range(0, rows, 10_000):
+        # All words of a chunk of movies in one draw, then split per movie
+        counts = lengths[start:start + 10_000]
+        ids = np.minimum(np.searchsorted(popularity, rng.random(counts.sum())), vocab_size - 1)
+        from_topic = rng.random(len(ids)) < topic_share
+        owners = np.repeat(movie_topics[start:start + 10_000], counts)
+        ids[from_topic] = topic_words[owners[from_topic], rng.integers(40, size=int(from_topic.sum()))]
+        tokens = words[ids].tolist()
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        overviews.extend(" ".join(tokens[a:b]) for a, b in zip(offsets[:-1], offsets[1:]))
+
+    title_words = rng.integers(vocab_size, size=(rows, 3))
+    names = [" ".join(w.capitalize() for w in words[ids[:1 + i % 3]]) + f" {i}" for i, ids in enumerate(title_words)]
+    remakes = np.flatnonzero(rng.random(rows) < duplicate_share)
+    for row in remakes[remakes > 0]:
+        names[row] = names[rng.integers(row)]  # same title as an earlier movie
+    return pd.DataFrame({"names": names, "overview": overviews})
+
+
+def build_tfidf(directory, movies, neighbors=False):
+    """Fit the notebook's vectorizer on `movies` and save it and its matrix as a model bundle."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from artifacts import save_bundle
+    from neighbors import build_neighbor_table, save_neighbor_table
+
+    tfidf = TfidfVectorizer(stop_words="english", max_features=5000)
+    matrix = tfidf.fit_transform(movies["overview"])
+    save_bundle(directory, tfidf, matrix, movies)
+    if neighbors:
+        ids, scores = build_neighbor_table(matrix)
+        save_neighbor_table(ids, scores, os.path.join(directory, "neighbor_ids.npy"),
+                            os.path.join(directory, "neighbor_scores.npy"))
+    return matrix
+
+
+def build_store(directory, movies, matrix, dim=384, chunk_size=50_000, seed=0):
+    """Embedding store whose rows are a fixed random projection of the TF-IDF rows."""
+    from embedding_store import (EMBEDDINGS_FILE, FORMAT_VERSION, MANIFEST_FILE, METADATA_FILE, fingerprint_embeddings,
+                                 normalize_rows)
+
+    os.makedirs(directory, exist_ok=True)
+    projection = np.random.default_rng(seed).standard_normal((matrix.shape[1], dim), dtype=np.float32)
+    # Written chunk by chunk into a .npy memmap, so a 1M-row store never sits in memory twice
+    embeddings = np.lib.format.open_memmap(
+        os.path.join(directory, EMBEDDINGS_FILE), mode="w+", dtype=np.float32, shape=(matrix.shape[0], dim)
+    )
+    for start in range(0, matrix.shape[0], chunk_size):
+        embeddings[start:start + chunk_size] = normalize_rows(matrix[start:start + chunk_size] @ projection)
+    embeddings.flush()
+    fingerprint = fingerprint_embeddings(embeddings)
+    del embeddings
+    movies.to_csv(os.path.join(directory, METADATA_FILE), index=False)
+    manifest = {"version": FORMAT_VERSION, "dtype": "float32", "rows": int(matrix.shape[0]), "dim": dim,
+                "normalized": True, "model": "synthetic", "fingerprint": fingerprint}
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def catalog_dir(rows, data_dir=DEFAULT_DATA_DIR):
+    return os.path.join(data_dir, str(rows))
+
+
+def ensure_catalog(rows, data_dir=DEFAULT_DATA_DIR, neighbors=False, seed=0):
+    """Directory holding the synthetic catalog of `rows` movies, generating whatever is missing."""
+    directory = catalog_dir(rows, data_dir)
+    catalog_path = os.path.join(directory, CATALOG_FILE)
+    tfidf_dir, store_dir = os.path.join(directory, TFIDF_DIR), os.path.join(directory, STORE_DIR)
+    has_table = os.path.exists(os.path.join(tfidf_dir, "neighbor_ids.npy"))
+    if os.path.exists(os.path.join(store_dir, "manifest.json")) and (has_table or not neighbors):
+        return directory
+
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(catalog_path):
+        movies = pd.read_csv(catalog_path, keep_default_na=False)
+    else:
+        movies = synthetic_catalog(rows, seed=seed)
+        movies.to_csv(catalog_path, index=False)
+    matrix = build_tfidf(tfidf_dir, movies, neighbors)
+    build_store(store_dir, movies, matrix, seed=seed)
+    print(f"✅ Synthetic catalog of {rows} movies in {directory} ({time.perf_counter() - started:.1f}s)")
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic catalogs and models for the benchmarks.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--out", default=DEFAULT_DATA_DIR, help="directory holding one subdirectory per size")
+    parser.add_argument("--neighbors", action="store_true", help="also build the TF-IDF neighbor table")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        ensure_catalog(rows, args.out, neighbors=args.neighbors, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Shared helpers used by the TMDB-API, TFIDF-KNN and Sentence-Transformer apps.
@@ -0,0 +1,263 @@
+# metrics.py
+#
+# Lightweight tracing for the apps and the service: timing spans, counters
+# and histograms, exported in Prometheus text format.
+#
+#   * span("recommend") times a block (or timed("load_model") a function)
+#     into the recommender_span_seconds histogram;
+#   * inc() / observe() feed counters and histograms such as cache lookups
+#     by result or TMDB latency and status codes;
+#   * begin_request()/end_request() (or request()) time one Streamlit rerun
+#     or HTTP request into recommender_request_seconds and collect the spans
+#     run inside it; with METRICS_PROFILE_DIR set, each one is written there
+#     as a JSON profile;
+#   * render() is the Prometheus text exposition; serve() exports it on a
+#     local port for the Streamlit apps, the service has GET /metrics.
+#
+# Everything is off unless METRICS_ENABLED=1 (or METRICS_PROFILE_DIR) is
+# set: span() then returns a shared no-op context manager, timed() returns
+# the function unchanged and inc()/observe() return at once.
+
+import itertools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROFILE_DIR = os.environ.get("METRICS_PROFILE_DIR")  # one JSON profile per request/rerun when set
+ENABLED = os.environ.get("METRICS_ENABLED", "") not in ("", "0") or bool(PROFILE_DIR)
+DEFAULT_PORT = int(os.environ.get("METRICS_PORT", 9108))
+PREFIX = "recommender_"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_trace = ContextVar("metrics_trace", default=None)
+_servers = {}  # port -> ThreadingHTTPServer
+_profiles = itertools.count()
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Add `value` to the counter `name`{labels}."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    """Record one observation in the histogram `name`{labels}."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+
+class _Trace:
+    __slots__ = ("name", "labels", "start", "last", "depth", "spans")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.start = self.last = time.perf_counter()  # last: when the latest span ended
+        self.depth = 0
+        self.spans = []  # (name, labels, offset, seconds, depth), in completion order
+
+
+class _Span:
+    __slots__ = ("name", "labels", "trace", "depth", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.trace = _trace.get()
+        if self.trace is not None:
+            self.depth = self.trace.depth
+            self.trace.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        elapsed = end - self.start
+        observe("span_seconds", elapsed, span=self.name, **self.labels)
+        if self.trace is not None:
+            self.trace.last = end
+            self.trace.depth -= 1
+            self.trace.spans.append((self.name, self.labels, self.start - self.trace.start, elapsed, self.depth))
+        return False
+
+
+def span(name, **labels):
+    """Context manager timing a block as span `name`."""
+    return _Span(name, labels) if ENABLED else _NOOP
+
+
+def timed(name=None, **labels):
+    """Decorator timing every call of a function as span `name` (default: the function's name)."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+        span_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name, labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def begin_request(name, **labels):
+    """Start timing a request (e.g. one Streamlit rerun) in the current context.
+
+    A request still open in this context was cut short (st.rerun() and
+    st.stop() raise out of the script), so it is recorded as interrupted,
+    ending where its last span ended.
+    """
+    if not ENABLED:
+        return
+    end_request(outcome="interrupted")
+    _trace.set(_Trace(name, labels))
+
+
+def end_request(outcome="ok"):
+    """Finish the current request: record its total time and write its profile if enabled."""
+    if not ENABLED:
+        return
+    trace = _trace.get()
+    if trace is None:
+        return
+    _trace.set(None)
+    elapsed = (trace.last if outcome == "interrupted" else time.perf_counter()) - trace.start
+    observe("request_seconds", elapsed, request=trace.name, outcome=outcome, **trace.labels)
+    if PROFILE_DIR:
+        _write_profile(trace, elapsed, outcome)
+
+
+@contextmanager
+def request(name, **labels):
+    """Time the enclosed block as one request; `labels` may be updated inside it (e.g. the matched route)."""
+    if not ENABLED:
+        yield labels
+        return
+    token = _trace.set(_Trace(name, labels))
+    outcome = "error"
+    try:
+        yield labels
+        outcome = "ok"
+    finally:
+        end_request(outcome)
+        _trace.reset(token)
+
+
+def _write_profile(trace, elapsed, outcome):
+    profile = {
+        "request": trace.name,
+        "labels": trace.labels,
+        "outcome": outcome,
+        "started": time.time() - elapsed,
+        "total_ms": elapsed * 1e3,
+        # In start order, with nesting depth, so the file reads as a call tree
+        "spans": [
+            {"name": name, "labels": labels, "depth": depth, "start_ms": offset * 1e3, "ms": seconds * 1e3}
+            for name, labels, offset, seconds, depth in sorted(trace.spans, key=lambda s: (s[2], s[4]))
+        ],
+    }
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{trace.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_profiles)}.json"
+        with open(os.path.join(PROFILE_DIR, name), "w") as f:
+            json.dump(profile, f, indent=2, default=str)
+    except OSError:
+        pass  # profiling must never take the app down
+
+
+def _labels_text(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(value)) for key, value in _histograms.items())
+    lines, typed = [], set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+        lines.append(f"{PREFIX}{name}{_labels_text(labels)} {value}")
+    for (name, labels), histogram in histograms:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), histogram[:-1]):
+            cumulative += count
+            lines.append(f"{PREFIX}{name}_bucket{_labels_text(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{PREFIX}{name}_sum{_labels_text(labels)} {histogram[-1]}")
+        lines.append(f"{PREFIX}{name}_count{_labels_text(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=DEFAULT_PORT, host="127.0.0.1"):
+    """Export GET /metrics on a local port from a daemon thread, once per process; None when disabled or taken."""
+    if not ENABLED:
+        return None
+    with _lock:
+        if port in _servers:
+            return _servers[port]
+        try:
+            server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError:
+            return None  # another process (e.g. a second app) already exports on this port
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+        _servers[port] = server
+        return server
@@ -0,0 +1,69 @@
+# model_loader.py
+#
+# Loads models and artifacts on a background thread, so a Streamlit app can
+# paint its page shell (config, CSS, header) at once and show a readiness
+# state instead of a blank page while a worker starts.
+#
+#   loader = BackgroundLoader(load)    # load(progress) -> resources; starts at once
+#   loader.ready / loader.stage        # readiness for the UI
+#   loader.wait(timeout)               # True once loading finished (or failed)
+#   loader.result()                    # the resources, or the load's exception
+#   loader.error                       # that exception, if loading failed
+#
+# load() calls progress("Loading the model...") between its steps; the
+# latest stage is what the app shows. It runs outside Streamlit's script
+# thread, so it must not call st.*.
+
+import threading
+import time
+
+from common import metrics
+
+
+class BackgroundLoader:
+    def __init__(self, load, name="model-loader"):
+        self.stage = "Starting..."
+        self.started = time.perf_counter()
+        self.seconds = None  # how long loading took, once done
+        self._load = load
+        self._value = None
+        self._error = None
+        self._done = threading.Event()
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def _progress(self, stage):
+        self.stage = stage
+
+    def _run(self):
+        try:
+            with metrics.span("background_load"):
+                self._value = self._load(self._progress)
+        except Exception as exc:  # surfaced to the page by result()
+            self._error = exc
+        finally:
+            self.seconds = time.perf_counter() - self.started
+            self.stage = "Failed" if self._error is not None else "Ready"
+            self._done.set()
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self._error is None
+
+    @property
+    def error(self):
+        return self._error if self._done.is_set() else None
+
+    @property
+    def elapsed(self):
+        """Seconds since loading started, or how long it took once done."""
+        return self.seconds if self.seconds is not None else time.perf_counter() - self.started
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Still loading ({self.stage})")
+        if self._error is not None:
+            raise self._error
+        return self._value
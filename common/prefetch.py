@@ -0,0 +1,166 @@
+# prefetch.py
+#
+# Speculative prefetch of the page behind each card of a recommendation grid.
+#
+# A visitor can only click one of the titles on screen, and usually clicks
+# through a chain of related movies. Once a grid is shown, the apps hand its
+# titles to a Prefetcher, which computes "the next page" for each of them
+# (recommendations, plus warming the TMDB details of those cards) on a small
+# background pool and keeps the results in a shared LRU. The click that
+# follows is then served from memory instead of from scratch.
+#
+#   * Foreground first: get() computes a miss in the caller's thread, and
+#     while any foreground request is running the workers start no new job.
+#     A foreground miss on a key the pool is already computing waits for
+#     that job instead of computing it twice.
+#   * The newest grid wins: pending jobs are ordered by grid (newest first),
+#     then by position on the page, and only `max_pending` are kept; older
+#     speculation is dropped rather than computed late.
+#   * Bounded: `workers` threads, `max_entries` results (least recently used
+#     evicted), optional `ttl` for values that go stale (TMDB data). Only
+#     values passing `keep` are cached (default: anything but None), so
+#     failed lookups are retried.
+#
+# Jobs run outside Streamlit's script thread, so they must not call st.*.
+# Lookups are counted in common.metrics as
+# recommender_cache_lookups_total{cache="prefetch", result="hit|running|miss"}.
+
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from common import metrics
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_MAX_PENDING = 64
+
+
+class Prefetcher:
+    def __init__(self, workers=DEFAULT_WORKERS, max_entries=DEFAULT_MAX_ENTRIES, max_pending=DEFAULT_MAX_PENDING,
+                 ttl=None, keep=None):
+        self.max_entries = max_entries
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.keep = keep or (lambda value: value is not None)
+        self._cache = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future of a running or queued job
+        self._pending = []  # heap of (-grid, position, key, compute)
+        self._grids = itertools.count()
+        self._foreground = 0
+        self._cond = threading.Condition()
+        self.hits = 0
+        self.prefetch_hits = 0  # served by a job that was still running
+        self.misses = 0
+        self.dropped = 0
+        for i in range(workers):
+            threading.Thread(target=self._run, name=f"prefetch-{i}", daemon=True).start()
+
+    def _cached(self, key, now):
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] is not None and entry[0] <= now:
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, entry[1]
+
+    def _store(self, key, value):
+        self._cache[key] = (time.time() + self.ttl if self.ttl else None, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def get(self, key, compute):
+        """compute() for `key`, from the cache or a running prefetch when possible."""
+        with self._cond:
+            found, value = self._cached(key, time.time())
+            if found:
+                self.hits += 1
+                metrics.inc("cache_lookups_total", cache="prefetch", result="hit")
+                return value
+            future = self._inflight.get(key)
+            if future is not None and future.running():
+                self.prefetch_hits += 1
+                metrics.inc("cache_lookups_total", cache="prefetch", result="running")
+            else:
+                if future is not None:  # still queued: computed here, so drop the job
+                    self._unqueue(key)
+                future = None
+                self.misses += 1
+                metrics.inc("cache_lookups_total", cache="prefetch", result="miss")
+            self._foreground += 1
+        try:
+            if future is not None:
+                try:
+                    return future.result()
+                except Exception:
+                    pass  # the speculative job failed; compute it here instead
+            value = compute()
+            if self.keep(value):
+                with self._cond:
+                    self._store(key, value)
+            return value
+        finally:
+            with self._cond:
+                self._foreground -= 1
+                self._cond.notify_all()
+
+    def prefetch(self, items):
+        """Queue (key, compute) pairs of one grid, in on-screen order, behind any foreground work."""
+        grid = next(self._grids)
+        with self._cond:
+            now = time.time()
+            for position, (key, compute) in enumerate(items):
+                if key in self._inflight or self._cached(key, now)[0]:
+                    continue
+                self._inflight[key] = Future()
+                heapq.heappush(self._pending, (-grid, position, key, compute))
+            while len(self._pending) > self.max_pending:
+                # Drop the oldest grid's lowest-ranked job
+                self._unqueue(max(self._pending, key=lambda job: job[:2])[2])
+                self.dropped += 1
+                metrics.inc("prefetch_dropped_total")
+            self._cond.notify_all()
+
+    def _unqueue(self, key):
+        """Remove a queued (not yet running) job; caller holds the lock."""
+        self._pending = [job for job in self._pending if job[2] != key]
+        heapq.heapify(self._pending)
+        self._inflight.pop(key).cancel()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending or self._foreground:
+                    self._cond.wait()
+                _, _, key, compute = heapq.heappop(self._pending)
+                future = self._inflight[key]
+                future.set_running_or_notify_cancel()
+            try:
+                with metrics.span("prefetch_job"):
+                    value = compute()
+            except Exception as exc:  # speculation must never take the app down
+                future.set_exception(exc)
+                value = None
+            else:
+                future.set_result(value)
+            with self._cond:
+                if future.exception() is None and self.keep(value):
+                    self._store(key, value)
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "entries": len(self._cache),
+                "pending": len(self._pending),
+                "hits": self.hits,
+                "prefetch_hits": self.prefetch_hits,
+                "misses": self.misses,
+                "dropped": self.dropped,
+            }
@@ -0,0 +1,62 @@
+# recommender_client.py
+#
+# Thin HTTP client for the headless recommender service (service/app.py).
+# With RECOMMENDER_URL set, the Streamlit apps use it in place of their local
+# models; recommend() and search_text() mirror the local recommenders'
+# methods so the apps do not care which one they hold.
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+
+class RecommenderClient:
+    def __init__(self, base_url, engine="embedding", timeout=DEFAULT_TIMEOUT, pool_size=16):
+        self.base_url = base_url.rstrip("/")
+        self.engine = engine
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, path, params):
+        response = self.session.get(f"{self.base_url}/{path}", params=params, timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def recommend_results(self, movie_title, k=15, row_id=None, engine=None):
+        """Full result dicts from /recommend, or None if the title is unknown to the service."""
+        params = {"title": movie_title, "k": k, "engine": engine or self.engine}
+        if row_id is not None:
+            params["row_id"] = row_id
+        data = self._get("recommend", params)
+        return None if data is None else data["results"]
+
+    def recommend(self, movie_title, k=15, row_id=None):
+        results = self.recommend_results(movie_title, k=k, row_id=row_id)
+        return None if results is None else [result["title"] for result in results]
+
+    def recommend_batch(self, titles, k=15, engine=None):
+        """{title: [result dicts] or None} for several titles in one request."""
+        payload = {"titles": list(titles), "k": k, "engine": engine or self.engine}
+        response = self.session.post(f"{self.base_url}/recommend/batch", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["results"]
+
+    def recommend_seeds(self, titles, weights=None, exclude=(), k=15, aggregate="centroid", engine=None):
+        """Titles most like all of `titles` (optionally weighted), skipping `exclude`; None if no seed is known."""
+        payload = {"titles": list(titles), "weights": weights, "exclude": list(exclude), "k": k,
+                   "aggregate": aggregate, "engine": engine or self.engine}
+        response = self.session.post(f"{self.base_url}/recommend/seeds", json=payload, timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return [result["title"] for result in response.json()["results"]]
+
+    def search_text(self, query, k=15):
+        data = self._get("search", {"q": query, "k": k, "engine": self.engine})
+        return [] if data is None else [result["title"] for result in data["results"]]
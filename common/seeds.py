@@ -0,0 +1,74 @@
+# seeds.py
+#
+# Shared pieces of multi-seed ("more like these") recommendations. The
+# engines resolve N seed titles, optional weights and an exclude list to row
+# IDs here, aggregate the per-seed similarities in one matrix operation of
+# their own, and mask the results with the helpers below.
+#
+# Aggregations:
+#   centroid  cosine to the weighted mean of the seed vectors; ranks exactly
+#             like the weighted mean of the per-seed similarities
+#   max       weighted max of the per-seed similarities ("close to any seed")
+
+import numpy as np
+
+AGGREGATIONS = ("centroid", "max")
+
+
+def check_aggregate(aggregate):
+    if aggregate not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation '{aggregate}'; expected one of {AGGREGATIONS}")
+
+
+def resolve_seeds(title_index, titles, weights=None, exclude=()):
+    """(seed_ids, weights, masked_ids) for the seed titles found in `title_index`.
+
+    Unknown seed titles are dropped along with their weights. Every row
+    sharing a title with a seed or with an `exclude` entry is masked, so
+    none of them is recommended back.
+    """
+    if weights is None:
+        weights = [1.0] * len(titles)
+    if len(weights) != len(titles):
+        raise ValueError(f"{len(weights)} weights for {len(titles)} seed titles")
+    if any(weight <= 0 for weight in weights):
+        raise ValueError("Seed weights must be positive")
+
+    seed_ids, seed_weights, masked = [], [], set()
+    for title, weight in zip(titles, weights):
+        rows = title_index.lookup(title)
+        if rows:
+            seed_ids.append(rows[0])
+            seed_weights.append(weight)
+            masked.update(rows)
+    for title in exclude:
+        masked.update(title_index.lookup(title))
+    return (
+        np.asarray(seed_ids, dtype=np.int64),
+        np.asarray(seed_weights, dtype=np.float32),
+        np.fromiter(masked, dtype=np.int64, count=len(masked)),
+    )
+
+
+def drop_masked(ids, scores, masked, k):
+    """The first k entries of a best-first (ids, scores) list that are real rows and not masked."""
+    keep = (ids >= 0) & ~np.isin(ids, masked)
+    return ids[keep][:k], scores[keep][:k]
+
+
+def top_k_by_max(ids, scores, weights, masked, k):
+    """Top-k rows by weighted max similarity, merged from each seed's own top list.
+
+    `ids`/`scores` are (n_seeds, m) best-first lists with m >= k + len(masked).
+    A row in the true top-k reaches its max at some seed, and that seed's
+    list must contain it, so the union of the lists gives the exact answer.
+    """
+    ids = ids.ravel()
+    scores = (scores * weights[:, None]).ravel()
+    keep = (ids >= 0) & ~np.isin(ids, masked)
+    ids, scores = ids[keep], scores[keep]
+    order = np.argsort(-scores, kind="stable")
+    ids, scores = ids[order], scores[order]
+    _, first = np.unique(ids, return_index=True)  # first occurrence in score order = the row's max
+    first.sort()
+    return ids[first][:k], scores[first][:k]
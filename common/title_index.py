@@ -0,0 +1,66 @@
+# title_index.py
+#
+# O(1) title -> row ID lookup, built once when a catalog is loaded.
+#
+# Replaces per-request scans such as `movies_df["names"] == title` and
+# `movies["names"].str.lower() == title.lower()`, which touch (and for the
+# latter, allocate) the whole column on every click. Titles are compared
+# case- and whitespace-insensitively. Duplicate titles keep all their row
+# IDs in catalog order, so the default match is deterministic and callers
+# can offer the other candidates, labelled by release year when known.
+
+import re
+
+
+def normalize_title(title):
+    return " ".join(str(title).casefold().split())
+
+
+def _year(value):
+    match = re.search(r"(\d{4})", str(value))
+    return match.group(1) if match else None
+
+
+class TitleIndex:
+    def __init__(self, names, years=None):
+        self.names = list(names)
+        self.years = list(years) if years is not None else [None] * len(self.names)
+        self._rows = {}
+        for row_id, name in enumerate(self.names):
+            if name is None or name != name:  # skip missing (NaN) titles
+                continue
+            self._rows.setdefault(normalize_title(name), []).append(row_id)
+
+    @classmethod
+    def from_frame(cls, movies, name_column="names", date_column="date_x"):
+        """Build from a catalog DataFrame; release years come from `date_column` if present."""
+        years = None
+        if date_column in movies.columns:
+            years = [_year(value) for value in movies[date_column].tolist()]
+        return cls(movies[name_column].tolist(), years)
+
+    def __contains__(self, title):
+        return normalize_title(title) in self._rows
+
+    def lookup(self, title):
+        """All row IDs whose title matches, in catalog order (empty if none)."""
+        return self._rows.get(normalize_title(title), [])
+
+    def first(self, title):
+        """The first matching row ID, or None."""
+        rows = self.lookup(title)
+        return rows[0] if rows else None
+
+    def candidates(self, title):
+        """[(row_id, label)] for every match; labels are unique, e.g. "Dune (1984)", "Dune (2021)"."""
+        rows = self.lookup(title)
+        labels = []
+        for position, row_id in enumerate(rows, start=1):
+            label = self.names[row_id]
+            if len(rows) > 1:
+                year = self.years[row_id]
+                label = f"{label} ({year})" if year else f"{label} (#{position})"
+            if label in labels:
+                label = f"{label} #{position}"
+            labels.append(label)
+        return list(zip(rows, labels))
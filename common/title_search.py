@@ -0,0 +1,91 @@
+# title_search.py
+#
+# Type-ahead search over catalog titles, built once and cached.
+#
+# The sidebars used to hand the full list of ~10k titles to a selectbox on
+# every rerun. TitleSearchIndex answers "top-N titles for this typed text"
+# so only the matches are sent to the browser:
+#
+#   * prefix matches come from a binary search over the sorted normalized
+#     titles (bisect), best for "the dark kn...";
+#   * the rest of the slots are filled by trigram similarity, which
+#     tolerates typos ("godfahter") and matches words in the middle.
+
+from bisect import bisect_left
+
+import numpy as np
+
+from common.title_index import normalize_title
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleSearchIndex:
+    def __init__(self, names, min_similarity=0.3):
+        self.min_similarity = min_similarity
+        seen = set()
+        self.titles = []
+        for name in names:
+            if name is None or name != name or name in seen:  # skip NaN and duplicates
+                continue
+            seen.add(name)
+            self.titles.append(name)
+
+        keys = [normalize_title(title) for title in self.titles]
+        self._sorted = sorted(zip(keys, range(len(keys))))
+        self._sorted_keys = [key for key, _ in self._sorted]
+
+        postings = {}
+        self._trigram_counts = np.empty(len(keys), dtype=np.int32)
+        for title_id, key in enumerate(keys):
+            grams = trigrams(key)
+            self._trigram_counts[title_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(title_id)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.titles)
+
+    def prefix(self, query, limit=10):
+        key = normalize_title(query)
+        start = bisect_left(self._sorted_keys, key)
+        matches = []
+        for sorted_key, title_id in self._sorted[start:start + limit]:
+            if not sorted_key.startswith(key):
+                break
+            matches.append(title_id)
+        return matches
+
+    def fuzzy(self, query, limit=10):
+        """Title IDs ranked by how many of the query's trigrams they contain.
+
+        Ties (e.g. a typo'd word found in several titles) go to the title
+        closest in overall length, via trigram Jaccard similarity.
+        """
+        grams = trigrams(normalize_title(query))
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.titles))
+        candidates = np.flatnonzero(shared)
+        shared = shared[candidates]
+        containment = shared / len(grams)
+        keep = containment >= self.min_similarity
+        candidates, shared, containment = candidates[keep], shared[keep], containment[keep]
+        jaccard = shared / (len(grams) + self._trigram_counts[candidates] - shared)
+        order = np.lexsort((-jaccard, -containment))[:limit]
+        return candidates[order].tolist()
+
+    def search(self, query, limit=10):
+        """Up to `limit` titles for the typed text: prefix matches first, then fuzzy ones."""
+        if not query or not query.strip():
+            return []
+        ids = self.prefix(query, limit)
+        if len(ids) < limit:
+            seen = set(ids)
+            ids += [title_id for title_id in self.fuzzy(query, limit) if title_id not in seen][:limit - len(ids)]
+        return [self.titles[title_id] for title_id in ids]
@@ -0,0 +1,110 @@
+# tmdb_cache.py
+#
+# Two-level cache for TMDB lookups shared by all three apps:
+#
+#   * an in-memory LRU (per process) in front of
+#   * a SQLite table on disk (shared by every process on the host and
+#     surviving restarts).
+#
+# Entries expire after `ttl` seconds. Empty results (titles TMDB does not
+# know) are cached too, with their own shorter `negative_ttl`, so a missing
+# poster does not trigger a request on every Streamlit rerun.
+#
+# Lookups are counted in common.metrics as
+# recommender_cache_lookups_total{cache="tmdb", result="memory|disk|miss"}.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from common import metrics
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "TMDB_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".cache", "tmdb.sqlite3"),
+)
+DEFAULT_TTL = int(os.environ.get("TMDB_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_NEGATIVE_TTL = int(os.environ.get("TMDB_CACHE_NEGATIVE_TTL", 6 * 3600))
+
+
+class TMDBCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL, max_entries=4096):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tmdb_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return (found, value) for `key`, ignoring expired entries."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                metrics.inc("cache_lookups_total", cache="tmdb", result="memory")
+                return True, entry[1]
+
+            row = self._db.execute("SELECT value, expires_at FROM tmdb_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(key, row[1], value)
+                self.hits += 1
+                metrics.inc("cache_lookups_total", cache="tmdb", result="disk")
+                return True, value
+
+            self._memory.pop(key, None)
+            self.misses += 1
+            metrics.inc("cache_lookups_total", cache="tmdb", result="miss")
+            return False, None
+
+    def set(self, key, value):
+        ttl = self.ttl if value else self.negative_ttl
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._db.execute(
+                "INSERT OR REPLACE INTO tmdb_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            self._db.commit()
+
+    def get_or_fetch(self, key, fetch):
+        """Return the cached value for `key`, calling fetch() and storing its result on a miss.
+
+        fetch() returning None (e.g. an API error) is passed through uncached.
+        """
+        found, value = self.get(key)
+        if found:
+            return value
+        value = fetch()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def purge_expired(self):
+        with self._lock:
+            self._db.execute("DELETE FROM tmdb_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
@@ -0,0 +1,177 @@
+# tmdb_client.py
+#
+# TMDB HTTP client shared by all three apps.
+#
+#   * one requests.Session with a keep-alive connection pool, so cards reuse
+#     TLS connections instead of opening one per call;
+#   * a client-side token bucket matched to TMDB's rate limit; requests
+#     made inside `with client.background():` (prefetch, snapshot refresh)
+#     leave part of the bucket to foreground page loads;
+#   * hard (connect, read) timeouts on every request;
+#   * exponential backoff with jitter on 429/5xx and connection errors,
+#     honoring Retry-After when TMDB sends it;
+#   * counters for requests, retries, failures, status codes and latency,
+#     also exported through common.metrics (latency histogram per endpoint,
+#     responses by status, rate-limiter wait).
+#
+# Query parameters are passed through `params`, so titles such as
+# "Tom & Jerry" or "What's Up, Doc?" are URL-encoded correctly.
+
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common import metrics
+
+DEFAULT_BASE_URL = os.environ.get("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")  # movie/603/recommendations -> movie/{id}/recommendations
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, reserve=0):
+        """Take one token; with `reserve`, only once that many more would be left for other callers."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1 + reserve:
+                    self._tokens -= 1
+                    return
+                wait = (1 + reserve - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class TMDBClient:
+    def __init__(
+        self,
+        headers=None,
+        base_url=DEFAULT_BASE_URL,
+        timeout=DEFAULT_TIMEOUT,
+        max_retries=3,
+        backoff=0.5,
+        max_backoff=8.0,
+        rate_limit=40,
+        rate_period=10.0,
+        pool_size=16,
+        background_reserve=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate_limit / rate_period, rate_limit)
+        # Tokens background requests must leave in the bucket (default: half of it)
+        self.background_reserve = rate_limit // 2 if background_reserve is None else background_reserve
+        self._local = threading.local()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"accept": "application/json"})
+        self.session.headers.update(headers or {})
+
+        self._lock = threading.Lock()
+        self.counters = Counter()  # requests, retries, failures, status_<code>
+        self.latency_total = 0.0
+
+    def _record(self, **increments):
+        with self._lock:
+            self.counters.update(increments)
+
+    def _retry_delay(self, attempt, response=None):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.max_backoff)
+                except ValueError:
+                    pass
+        delay = min(self.backoff * (2 ** attempt), self.max_backoff)
+        return delay * (0.5 + random.random() / 2)
+
+    @contextmanager
+    def background(self):
+        """Requests made by this thread inside the block yield to foreground requests at the rate limiter."""
+        previous = getattr(self._local, "reserve", 0)
+        self._local.reserve = self.background_reserve
+        try:
+            yield
+        finally:
+            self._local.reserve = previous
+
+    def get(self, path, params=None):
+        """GET `path` and return the decoded JSON, or None once retries are exhausted."""
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        reserve = getattr(self._local, "reserve", 0)
+        endpoint = ID_SEGMENT.sub("/{id}", "/" + path.lstrip("/"))
+        for attempt in range(self.max_retries + 1):
+            waited = time.perf_counter()
+            self.bucket.acquire(reserve)
+            start = time.perf_counter()
+            metrics.observe("tmdb_rate_limit_wait_seconds", start - waited, background=bool(reserve))
+            response = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                pass
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.counters["requests"] += 1
+                self.latency_total += elapsed
+                if response is not None:
+                    self.counters[f"status_{response.status_code}"] += 1
+            metrics.observe("tmdb_request_seconds", elapsed, endpoint=endpoint)
+            metrics.inc("tmdb_responses_total", endpoint=endpoint,
+                        status=response.status_code if response is not None else "connection_error")
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                if not response.ok:
+                    break  # 4xx other than 429: retrying will not help
+                try:
+                    return response.json()
+                except ValueError:
+                    break  # a 2xx that is not JSON, e.g. a proxy or captive-portal page
+            if attempt < self.max_retries:
+                self._record(retries=1)
+                metrics.inc("tmdb_retries_total", endpoint=endpoint)
+                time.sleep(self._retry_delay(attempt, response))
+        self._record(failures=1)
+        metrics.inc("tmdb_failures_total", endpoint=endpoint)
+        return None
+
+    def search_movie(self, query):
+        """Search results for `query`, or None if TMDB could not be reached."""
+        data = self.get("search/movie", params={"query": query})
+        return None if data is None else data.get("results", [])
+
+    def recommendations(self, movie_id):
+        data = self.get(f"movie/{movie_id}/recommendations", params={"language": "en-US"})
+        return None if data is None else data.get("results", [])
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            requests_made = stats.get("requests", 0)
+            stats["mean_latency_ms"] = 1000 * self.latency_total / requests_made if requests_made else 0.0
+        return stats
@@ -0,0 +1,38 @@
+# tmdb_enrich.py
+#
+# Resolve the TMDB metadata of many titles at once.
+#
+# One lookup at a time costs one sequential round-trip per title.
+# fetch_many() runs the lookups on a bounded thread pool and returns the
+# results in the original order. Lookups that fail, or are still running
+# when the overall deadline expires, come back as `default` instead of
+# holding up the caller. The snapshot sync (tmdb_snapshot.sync_rows) resolves
+# its batches of catalog rows through it.
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+DEFAULT_MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="tmdb-enrich")
+
+
+def fetch_many(keys, fetch, timeout=10.0, default=None, executor=None):
+    """Return [fetch(key) for key in keys], computed concurrently.
+
+    `timeout` bounds the whole batch in seconds (None waits for every
+    lookup); keys whose lookup fails or does not finish in time map to
+    `default`. Pass `executor` to use a pool
+    other than the shared module-level one (capped at DEFAULT_MAX_WORKERS).
+    """
+    executor = executor or _executor
+    futures = [executor.submit(fetch, key) for key in keys]
+    wait(futures, timeout=timeout)
+
+    results = []
+    for future in futures:
+        if future.done() and future.exception() is None:
+            results.append(future.result())
+        else:
+            future.cancel()
+            results.append(default)
+    return results
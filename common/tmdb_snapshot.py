@@ -0,0 +1,322 @@
+# tmdb_snapshot.py
+#
+# Offline TMDB metadata for a whole catalog.
+#
+#   * A bulk sync resolves every catalog title to its TMDB id, poster,
+#     release date, rating and overview once, on a bounded thread pool
+#     behind the TMDBClient rate limiter. Results go into a SQLite table
+#     keyed by our catalog row ID, so a grid of cards is one indexed read
+#     instead of one search round-trip per card.
+#   * The apps render only from the snapshot. Rows that are missing or older
+#     than `max_age` are handed to a SnapshotRefresher, which re-resolves
+#     them on a background thread; the next rerun shows the fresh values.
+#
+# Each row also stores the catalog title it was resolved from, and lookups
+# ignore rows whose title no longer matches, so a snapshot synced against
+# another version of the catalog never shows the wrong poster.
+#
+# Lookups are counted in common.metrics as
+# recommender_cache_lookups_total{cache="snapshot", result="hit|stale|miss"}.
+#
+# Sync a catalog (from the repo root; re-running only fetches missing and
+# stale rows, so an interrupted sync resumes where it stopped):
+#     python -m common.tmdb_snapshot --catalog TFIDF-KNN/model_bundle/metadata.parquet \
+#         --out TFIDF-KNN/tmdb_snapshot.sqlite3 --workers 8
+#
+# Load the offline fixture instead (no network, no API key):
+#     python -m common.tmdb_snapshot --import benchmarks/fixtures/tmdb_snapshot.jsonl \
+#         --out TFIDF-KNN/tmdb_snapshot.sqlite3
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import metrics
+from common.title_index import normalize_title
+from common.tmdb_enrich import fetch_many
+
+SNAPSHOT_FILE = "tmdb_snapshot.sqlite3"
+DEFAULT_MAX_AGE = int(os.environ.get("TMDB_SNAPSHOT_MAX_AGE", 30 * 24 * 3600))
+DEFAULT_RETRY_AFTER = 300  # seconds before a row whose refresh failed is tried again
+FIELDS = ("tmdb_id", "poster_path", "release_date", "vote_average", "overview")
+
+
+def snapshot_path(directory="."):
+    """$TMDB_SNAPSHOT_PATH, else tmdb_snapshot.sqlite3 in `directory`."""
+    return os.environ.get("TMDB_SNAPSHOT_PATH", os.path.join(directory, SNAPSHOT_FILE))
+
+
+def _entry(result):
+    """Snapshot columns from the best TMDB search result ({} when TMDB has no match)."""
+    if not result:
+        return dict.fromkeys(FIELDS)
+    return {
+        "tmdb_id": result.get("id"),
+        "poster_path": result.get("poster_path"),
+        "release_date": result.get("release_date"),
+        "vote_average": result.get("vote_average"),
+        "overview": result.get("overview"),
+    }
+
+
+class TMDBSnapshot:
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tmdb_snapshot (row_id INTEGER PRIMARY KEY, title TEXT NOT NULL, "
+            "tmdb_id INTEGER, poster_path TEXT, release_date TEXT, vote_average REAL, overview TEXT, "
+            "synced_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tmdb_snapshot").fetchone()[0]
+
+    def get_many(self, row_ids):
+        """{row_id: row dict} for the stored rows among `row_ids`, in one query."""
+        row_ids = sorted({int(row_id) for row_id in row_ids})
+        if not row_ids:
+            return {}
+        columns = ("row_id", "title") + FIELDS + ("synced_at",)
+        placeholders = ",".join("?" * len(row_ids))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(columns)} FROM tmdb_snapshot WHERE row_id IN ({placeholders})", row_ids
+            ).fetchall()
+        return {row[0]: dict(zip(columns, row)) for row in rows}
+
+    def put_many(self, entries):
+        """Store [(row_id, catalog title, best TMDB search result or None)], replacing older rows."""
+        now = time.time()
+        values = [
+            (int(row_id), title, *_entry(result).values(), now)
+            for row_id, title, result in entries
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tmdb_snapshot (row_id, title, tmdb_id, poster_path, release_date, "
+                "vote_average, overview, synced_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            self._db.commit()
+
+    def outdated(self, titles, max_age=DEFAULT_MAX_AGE):
+        """Row IDs of `titles` (catalog order) that are missing, stale or synced under another title."""
+        with self._lock:
+            stored = dict(
+                (row_id, (title, synced_at))
+                for row_id, title, synced_at in self._db.execute("SELECT row_id, title, synced_at FROM tmdb_snapshot")
+            )
+        cutoff = time.time() - max_age
+        outdated = []
+        for row_id, title in enumerate(titles):
+            if not isinstance(title, str) or not title.strip():
+                continue
+            entry = stored.get(row_id)
+            if entry is None or entry[1] < cutoff or normalize_title(entry[0]) != normalize_title(title):
+                outdated.append(row_id)
+        return outdated
+
+    def export_jsonl(self, path):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT row_id, title, tmdb_id, poster_path, release_date, vote_average, overview "
+                "FROM tmdb_snapshot ORDER BY row_id"
+            ).fetchall()
+        with open(path, "w", encoding="utf-8") as f:
+            for row_id, title, *fields in rows:
+                f.write(json.dumps({"row_id": row_id, "title": title, **dict(zip(FIELDS, fields))}) + "\n")
+        return len(rows)
+
+    def import_jsonl(self, path):
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    result = {"id": row["tmdb_id"], **row} if row.get("tmdb_id") is not None else None
+                    entries.append((row["row_id"], row["title"], result))
+        self.put_many(entries)
+        return len(entries)
+
+
+def sync_rows(snapshot, client, titles, row_ids, workers=8, batch_size=256, progress=None, background=False):
+    """Resolve `row_ids` through TMDB search and store the results; returns (stored, failed_row_ids).
+
+    The pool only bounds concurrency; the request rate is set by the client's
+    token bucket. With `background`, the lookups yield to the app's own
+    requests there. Rows whose lookup fails (TMDB unreachable after retries,
+    or an error raised by the client) are not written, so the next sync picks
+    them up again.
+    """
+    def search(row_id):
+        if not background:
+            return client.search_movie(titles[row_id])
+        with client.background():
+            return client.search_movie(titles[row_id])
+
+    stored, failed = 0, []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tmdb-snapshot") as executor:
+        for start in range(0, len(row_ids), batch_size):
+            batch = row_ids[start:start + batch_size]
+            results = fetch_many(batch, search, timeout=None, executor=executor)
+            entries = [
+                (row_id, titles[row_id], found[0] if found else None)
+                for row_id, found in zip(batch, results)
+                if found is not None
+            ]
+            snapshot.put_many(entries)
+            stored += len(entries)
+            failed.extend(row_id for row_id, found in zip(batch, results) if found is None)
+            if progress is not None:
+                progress(start + len(batch), len(row_ids))
+    return stored, failed
+
+
+class SnapshotRefresher:
+    """Read side of a snapshot for the apps: local lookups, background refresh of outdated rows."""
+
+    def __init__(self, snapshot, client, titles, title_index, max_age=DEFAULT_MAX_AGE,
+                 retry_after=DEFAULT_RETRY_AFTER, workers=4, batch_size=32):
+        self.snapshot = snapshot
+        self.client = client
+        self.titles = list(titles)
+        self.title_index = title_index
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self.workers = workers
+        self.batch_size = batch_size
+        self._pending = []
+        self._queued = set()
+        self._failed_at = {}  # row_id -> time of the last failed refresh
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name="tmdb-snapshot-refresh", daemon=True).start()
+
+    def _wanted(self, row_id, entry, now):
+        if entry is not None and entry["synced_at"] >= now - self.max_age \
+                and normalize_title(entry["title"]) == normalize_title(self.titles[row_id]):
+            return False
+        return now - self._failed_at.get(row_id, 0.0) >= self.retry_after
+
+    def lookup_rows(self, row_ids):
+        """TMDB details per row ID (None when unknown), without touching the network.
+
+        Missing or stale rows are queued for the background refresh; stale
+        rows are still returned until then.
+        """
+        with metrics.span("snapshot_lookup"):
+            stored = self.snapshot.get_many(row_id for row_id in row_ids if row_id is not None)
+        now = time.time()
+        details, refresh = [], []
+        stale = 0
+        for row_id in row_ids:
+            entry = stored.get(row_id) if row_id is not None else None
+            wanted = row_id is not None and self._wanted(row_id, entry, now)
+            if wanted:
+                refresh.append(row_id)
+            if entry is not None and entry["tmdb_id"] is not None \
+                    and normalize_title(entry["title"]) == normalize_title(self.titles[row_id]):
+                details.append({"id": entry["tmdb_id"], **{field: entry[field] for field in FIELDS[1:]}})
+                stale += wanted
+            else:
+                details.append(None)
+        if refresh:
+            self.request(refresh)
+        if metrics.ENABLED:
+            misses = details.count(None)
+            metrics.inc("cache_lookups_total", len(details) - misses - stale, cache="snapshot", result="hit")
+            metrics.inc("cache_lookups_total", stale, cache="snapshot", result="stale")
+            metrics.inc("cache_lookups_total", misses, cache="snapshot", result="miss")
+        return details
+
+    def lookup(self, titles):
+        """lookup_rows() for titles, each resolved to its first catalog row."""
+        return self.lookup_rows([self.title_index.first(title) for title in titles])
+
+    def request(self, row_ids):
+        with self._cond:
+            for row_id in row_ids:
+                if row_id not in self._queued:
+                    self._queued.add(row_id)
+                    self._pending.append(row_id)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            try:
+                _, failed = sync_rows(self.snapshot, self.client, self.titles, batch, workers=self.workers,
+                                      background=True)
+            except Exception:  # a refresh must never take the app down; the rows are retried later
+                failed = batch
+            now = time.time()
+            for row_id in failed:
+                self._failed_at[row_id] = now
+            with self._cond:
+                self._queued.difference_update(batch)
+
+
+def read_titles(catalog, column="names"):
+    import pandas as pd
+
+    if catalog.endswith(".parquet"):
+        movies = pd.read_parquet(catalog, columns=[column])
+    elif catalog.endswith(".pkl"):
+        movies = pd.read_pickle(catalog)
+    else:
+        movies = pd.read_csv(catalog, usecols=[column])
+    return movies[column].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync a catalog's TMDB metadata into a local snapshot.")
+    parser.add_argument("--catalog", help="catalog with one row per movie (csv, parquet or pickled frame)")
+    parser.add_argument("--column", default="names", help="title column of the catalog")
+    parser.add_argument("--out", default=SNAPSHOT_FILE, help="snapshot SQLite file")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE / 86400, help="re-fetch rows older than this many days")
+    parser.add_argument("--limit", type=int, help="sync at most this many rows")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent TMDB requests")
+    parser.add_argument("--rate-limit", type=int, default=40, help="TMDB requests per 10 seconds")
+    parser.add_argument("--import", dest="import_path", help="load a JSON-lines fixture instead of syncing")
+    parser.add_argument("--export", help="write the snapshot as JSON lines after syncing")
+    args = parser.parse_args()
+
+    snapshot = TMDBSnapshot(args.out)
+    if args.import_path:
+        print(f"✅ Imported {snapshot.import_jsonl(args.import_path)} rows into {args.out}")
+    elif args.catalog:
+        from common.tmdb_client import TMDBClient
+
+        api_key = os.environ.get("TMDB_API_KEY", "")
+        client = TMDBClient(headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+                            rate_limit=args.rate_limit, pool_size=args.workers)
+        titles = read_titles(args.catalog, args.column)
+        row_ids = snapshot.outdated(titles, max_age=args.max_age * 86400)[:args.limit]
+        print(f"Syncing {len(row_ids)} of {len(titles)} catalog rows")
+
+        def progress(done, total):
+            print(f"\r{done}/{total}", end="", flush=True)
+
+        started = time.perf_counter()
+        stored, failed = sync_rows(snapshot, client, titles, row_ids, workers=args.workers, progress=progress)
+        print(f"\n✅ {stored} rows stored, {len(failed)} failed (retried on the next run) "
+              f"in {time.perf_counter() - started:.1f}s; {len(snapshot)} rows in {args.out}")
+    if args.export:
+        print(f"✅ Exported {snapshot.export_jsonl(args.export)} rows to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Headless recommender service; see service/app.py.
@@ -0,0 +1,158 @@
+# app.py (recommender service)
+#
+# Headless HTTP API over the recommendation engines, so the expensive part
+# can be scaled and benchmarked apart from Streamlit's script reruns.
+# Models are loaded once per worker process, on a background thread started
+# at startup: the worker answers /health at once, and /ready and the
+# recommendation endpoints return 503 until the engines are in memory.
+#
+#   GET  /health   (liveness, with the loading stage)
+#   GET  /ready    (200 once the engines are loaded, 503 before)
+#   GET  /recommend?title=...&k=15&engine=embedding[&row_id=...]
+#   POST /recommend/batch   {"titles": [...], "k": 15, "engine": "tfidf"}
+#   POST /recommend/seeds   {"titles": [...], "weights": [...], "exclude": [...], "aggregate": "centroid"}
+#   GET  /search?q=...&k=15&engine=embedding  (free text; embedding or tfidf)
+#   GET  /metrics  (Prometheus text, with METRICS_ENABLED=1; per worker process)
+#
+# Run from the repo root:
+#     uvicorn service.app:app --host 0.0.0.0 --port 8000 --workers 4
+
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from common import metrics
+from common.model_loader import BackgroundLoader
+from common.seeds import AGGREGATIONS
+from service.engines import load_engines, recommend_results, recommend_results_many, search_results, seed_results
+
+DEFAULT_ENGINE = "embedding"
+engines = {}
+loader = None  # BackgroundLoader filling `engines`
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global loader
+    loader = BackgroundLoader(lambda progress: engines.update(load_engines(progress=progress)))
+    yield
+    engines.clear()
+
+
+app = FastAPI(title="Movie Recommender", lifespan=lifespan)
+
+if metrics.ENABLED:
+    @app.middleware("http")
+    async def trace_requests(request, call_next):
+        # Total time per route, with the spans run inside it (profiled when METRICS_PROFILE_DIR is set)
+        with metrics.request("http", method=request.method) as labels:
+            response = await call_next(request)
+            labels.update(route=getattr(request.scope.get("route"), "path", "unmatched"), status=response.status_code)
+        return response
+
+
+class BatchRequest(BaseModel):
+    titles: List[str]
+    k: int = Field(15, ge=1, le=100)
+    engine: str = DEFAULT_ENGINE
+
+
+class SeedRequest(BaseModel):
+    titles: List[str] = Field(..., min_length=1)
+    weights: Optional[List[float]] = None
+    exclude: List[str] = []
+    k: int = Field(15, ge=1, le=100)
+    engine: str = DEFAULT_ENGINE
+    aggregate: str = "centroid"
+
+
+def readiness():
+    if loader is None or not loader.wait(0):
+        return "loading"
+    return "ready" if loader.ready else "failed"
+
+
+def get_engine(name):
+    status = readiness()
+    if status != "ready":
+        detail = f"Engines are still loading ({loader.stage})" if status == "loading" \
+            else f"Engines failed to load: {loader.error}"
+        raise HTTPException(status_code=503, detail=detail)
+    if name not in engines:
+        raise HTTPException(status_code=400, detail=f"Engine '{name}' is not loaded; available: {sorted(engines)}")
+    return engines[name]
+
+
+@app.get("/health")
+async def health():
+    status = readiness()
+    health = {"status": "ok" if status == "ready" else status, "engines": sorted(engines)}
+    if loader is not None:
+        health.update(stage=loader.stage, load_seconds=round(loader.elapsed, 3))
+    return health
+
+
+@app.get("/ready")
+async def ready():
+    status = readiness()
+    if status != "ready":
+        raise HTTPException(status_code=503, detail=status)
+    return {"status": status, "engines": sorted(engines)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled; start the service with METRICS_ENABLED=1")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/recommend")
+async def recommend(
+    title: str,
+    k: int = Query(15, ge=1, le=100),
+    engine: str = DEFAULT_ENGINE,
+    row_id: Optional[int] = None,
+):
+    # Scoring is CPU-bound NumPy/BLAS work; keep it off the event loop
+    results = await run_in_threadpool(recommend_results, get_engine(engine), title, k, row_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"Movie '{title}' not found")
+    return {"title": title, "engine": engine, "k": k, "results": results}
+
+
+@app.post("/recommend/batch")
+async def recommend_batch(request: BatchRequest):
+    # All titles are scored together: one GEMM / sparse product instead of one scan per title
+    results = await run_in_threadpool(recommend_results_many, get_engine(request.engine), request.titles, request.k)
+    return {"engine": request.engine, "k": request.k, "results": results}
+
+
+@app.post("/recommend/seeds")
+async def recommend_seeds(request: SeedRequest):
+    backend = get_engine(request.engine)
+    if not hasattr(backend, "seed_neighbors"):
+        raise HTTPException(status_code=400, detail=f"Engine '{request.engine}' does not support multi-seed requests")
+    if request.aggregate not in AGGREGATIONS:
+        raise HTTPException(status_code=400, detail=f"aggregate must be one of {list(AGGREGATIONS)}")
+    if request.weights is not None and (len(request.weights) != len(request.titles) or min(request.weights) <= 0):
+        raise HTTPException(status_code=400, detail="weights must be positive, one per title")
+    results = await run_in_threadpool(
+        seed_results, backend, request.titles, request.weights, request.exclude, request.k, request.aggregate
+    )
+    if results is None:
+        raise HTTPException(status_code=404, detail="None of the seed titles were found")
+    return {"engine": request.engine, "k": request.k, "aggregate": request.aggregate, "results": results}
+
+
+@app.get("/search")
+async def search(q: str, k: int = Query(15, ge=1, le=100), engine: str = DEFAULT_ENGINE):
+    backend = get_engine(engine)
+    if not hasattr(backend, "search_vectors"):
+        raise HTTPException(status_code=400, detail=f"Engine '{engine}' does not support free-text search")
+    results = await run_in_threadpool(search_results, backend, q, k)
+    return {"query": q, "engine": engine, "k": k, "results": results}
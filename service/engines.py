@@ -0,0 +1,166 @@
+# engines.py
+#
+# Loads the recommendation engines once per service worker and turns their
+# output into JSON-ready result dicts.
+#
+#   tfidf      TFIDF-KNN/tfidf_recommender.TfidfRecommender
+#   embedding  Sentence-Transformer/embedding_recommender.EmbeddingRecommender
+#   tmdb       TMDB's own /movie/{id}/recommendations, through the shared
+#              client and cache in common/
+#   hybrid     service/hybrid.HybridRecommender: the loaded local engines
+#              fused, with TMDB as deadline-bounded enrichment
+
+import os
+import sys
+from functools import partial
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+for path in (REPO_ROOT, REPO_ROOT / "TFIDF-KNN", REPO_ROOT / "Sentence-Transformer"):
+    if str(path) not in sys.path:
+        sys.path.append(str(path))
+
+from common import metrics  # noqa: E402
+from common.seeds import resolve_seeds  # noqa: E402
+from common.tmdb_cache import TMDBCache  # noqa: E402
+from common.tmdb_client import TMDBClient  # noqa: E402
+
+from artifacts import default_model_dir  # noqa: E402
+from service.hybrid import HybridRecommender  # noqa: E402
+
+TFIDF_MODEL_DIR = os.environ.get("RECOMMENDER_TFIDF_DIR", default_model_dir(str(REPO_ROOT / "TFIDF-KNN")))
+EMBEDDING_STORE_DIR = os.environ.get("RECOMMENDER_STORE_DIR", str(REPO_ROOT / "Sentence-Transformer" / "movie_store"))
+EMBEDDING_MODEL_PATH = os.environ.get("RECOMMENDER_MODEL_PATH", str(REPO_ROOT / "Sentence-Transformer" / "saved_model"))
+# tmdb is served whenever a key is set, so every engine the TMDB-API app may ask for is loaded by default
+DEFAULT_ENGINES = "tfidf,embedding,tmdb,hybrid" if os.environ.get("TMDB_API_KEY") else "tfidf,embedding,hybrid"
+ENGINES = os.environ.get("RECOMMENDER_ENGINES", DEFAULT_ENGINES).split(",")
+HYBRID_FUSION = os.environ.get("RECOMMENDER_HYBRID_FUSION", "rrf")  # or "weighted"
+HYBRID_WEIGHTS = os.environ.get("RECOMMENDER_HYBRID_WEIGHTS", "tfidf=1,embedding=1,tmdb=0.5")
+TMDB_DEADLINE = float(os.environ.get("RECOMMENDER_TMDB_DEADLINE", "0.5"))  # seconds the hybrid waits for TMDB
+
+
+class TMDBRecommender:
+    def __init__(self, client, cache):
+        self.client = client
+        self.cache = cache
+
+    def recommend_results(self, movie_title, k=15):
+        hits = self.cache.get_or_fetch(f"search:{movie_title}", lambda: self.client.search_movie(movie_title))
+        if not hits:
+            return None
+        movie_id = hits[0]["id"]
+        recs = self.cache.get_or_fetch(f"recommendations:{movie_id}", lambda: self.client.recommendations(movie_id)) or []
+        return [
+            {
+                "title": rec["title"],
+                "tmdb_id": rec["id"],
+                "poster_path": rec.get("poster_path"),
+                "vote_average": rec.get("vote_average"),
+            }
+            for rec in recs[:k]
+        ]
+
+
+def load_engine(name):
+    if name == "tfidf":
+        from tfidf_recommender import TfidfRecommender
+
+        return TfidfRecommender.load(TFIDF_MODEL_DIR)
+    if name == "embedding":
+        from embedding_recommender import EmbeddingRecommender
+
+        return EmbeddingRecommender.load(EMBEDDING_STORE_DIR, model_path=EMBEDDING_MODEL_PATH)
+    if name == "tmdb":
+        api_key = os.environ.get("TMDB_API_KEY", "")
+        return TMDBRecommender(TMDBClient(headers={"Authorization": f"Bearer {api_key}"}), TMDBCache())
+    raise ValueError(f"Unknown engine: {name}")
+
+
+def parse_weights(spec):
+    """{"tfidf": 1.0, ...} from "tfidf=1,embedding=1,tmdb=0.5"."""
+    pairs = (item.split("=") for item in spec.split(",") if item.strip())
+    return {name.strip(): float(weight) for name, weight in pairs}
+
+
+def build_hybrid(engines):
+    """Hybrid over the already loaded local engines; TMDB joins if loaded or TMDB_API_KEY is set."""
+    local = {name: engine for name, engine in engines.items() if hasattr(engine, "neighbors")}
+    if not local:
+        raise ValueError("The hybrid engine needs at least one of tfidf or embedding")
+    tmdb = engines.get("tmdb")
+    if tmdb is None and os.environ.get("TMDB_API_KEY"):
+        tmdb = load_engine("tmdb")
+    return HybridRecommender(
+        {name: partial(recommend_results, engine) for name, engine in local.items()},
+        enrichment=tmdb.recommend_results if tmdb is not None else None,
+        fusion=HYBRID_FUSION,
+        weights=parse_weights(HYBRID_WEIGHTS),
+        deadline=TMDB_DEADLINE,
+    )
+
+
+def load_engines(names=ENGINES, progress=None):
+    """{name: engine}; `progress(stage)`, if given, is called before each engine loads."""
+    names = [name.strip() for name in names if name.strip()]
+    engines = {}
+    for name in names:
+        if name != "hybrid":
+            if progress is not None:
+                progress(f"Loading the {name} engine...")
+            with metrics.span("load_engine", engine=name):
+                engines[name] = load_engine(name)
+    if "hybrid" in names:
+        engines["hybrid"] = build_hybrid(engines)
+    return engines
+
+
+def scored_results(recommender, ids, scores):
+    names = recommender.movies["names"]
+    return [
+        {"title": names.iat[int(row)], "row_id": int(row), "score": float(score)}
+        for row, score in zip(ids, scores)
+        if row >= 0
+    ]
+
+
+@metrics.timed()
+def recommend_results(engine, movie_title, k=15, row_id=None):
+    """Result dicts for `movie_title`, or None if the engine does not know it."""
+    if isinstance(engine, (TMDBRecommender, HybridRecommender)):
+        return engine.recommend_results(movie_title, k)
+    idx = engine.title_index.first(movie_title) if row_id is None else row_id
+    if idx is None or not 0 <= idx < len(engine.movies):
+        return None
+    ids, scores = engine.neighbors(idx, k)
+    return scored_results(engine, ids, scores)
+
+
+@metrics.timed()
+def recommend_results_many(engine, titles, k=15):
+    """recommend_results() for several titles; local engines score all seeds in one batch."""
+    if isinstance(engine, (TMDBRecommender, HybridRecommender)):
+        return {title: engine.recommend_results(title, k) for title in titles}
+    row_ids = [engine.title_index.first(title) for title in titles]
+    known = [i for i, row_id in enumerate(row_ids) if row_id is not None]
+    results = {title: None for title in titles}
+    if known:
+        ids, scores = engine.neighbors_many([row_ids[i] for i in known], k)
+        for i, row_ids_k, row_scores in zip(known, ids, scores):
+            results[titles[i]] = scored_results(engine, row_ids_k, row_scores)
+    return results
+
+
+@metrics.timed()
+def seed_results(engine, titles, weights=None, exclude=(), k=15, aggregate="centroid"):
+    """Result dicts for the movies most like all of `titles`, or None if no seed is known."""
+    seed_ids, weights, masked = resolve_seeds(engine.title_index, titles, weights, exclude)
+    if len(seed_ids) == 0:
+        return None
+    ids, scores = engine.seed_neighbors(seed_ids, weights, masked, k, aggregate)
+    return scored_results(engine, ids, scores)
+
+
+@metrics.timed()
+def search_results(engine, query, k=15):
+    ids, scores = engine.search_vectors(query, k)
+    return scored_results(engine, ids, scores)
@@ -0,0 +1,138 @@
+# hybrid.py
+#
+# One recommendation list from several engines.
+#
+#   * The local engines (TF-IDF kNN, embedding cosine) run in parallel on
+#     their own thread pool and each returns its top candidates.
+#   * Their ranked lists are fused by title, either with reciprocal-rank
+#     fusion (sum of weight / (rrf_k + rank)) or with a weighted sum of
+#     min-max normalized scores.
+#   * TMDB's /movie/{id}/recommendations is requested at the same time but
+#     is only an optional enrichment: if it answers before the deadline its
+#     list joins the fusion and its poster/rating fields are attached to
+#     matching titles; otherwise the local answer is returned as is and the
+#     late TMDB response still lands in the shared cache for next time.
+#     TMDB calls run on a separate pool, so a slow TMDB (retries and backoff
+#     can take many seconds) never holds up the local engines of this or any
+#     other request.
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from common.title_index import normalize_title
+
+DEFAULT_MAX_WORKERS = 8
+ENRICHMENT_FIELDS = ("tmdb_id", "poster_path", "vote_average")
+
+_local_executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="hybrid")
+_enrichment_executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="hybrid-tmdb")
+
+
+def reciprocal_rank_fusion(ranked, weights, rrf_k=60):
+    """{key: fused score} from {source: [key, ...] best first}."""
+    fused = {}
+    for source, keys in ranked.items():
+        weight = weights.get(source, 1.0)
+        for rank, key in enumerate(keys, start=1):
+            fused[key] = fused.get(key, 0.0) + weight / (rrf_k + rank)
+    return fused
+
+
+def weighted_score_fusion(scored, weights):
+    """{key: fused score} from {source: [(key, score), ...]}, min-max normalizing each source."""
+    fused = {}
+    for source, pairs in scored.items():
+        if not pairs:
+            continue
+        scores = [score for _, score in pairs]
+        low, high = min(scores), max(scores)
+        weight = weights.get(source, 1.0)
+        for key, score in pairs:
+            normalized = (score - low) / (high - low) if high > low else 1.0
+            fused[key] = fused.get(key, 0.0) + weight * normalized
+    return fused
+
+
+class HybridRecommender:
+    def __init__(self, sources, enrichment=None, fusion="rrf", weights=None, rrf_k=60,
+                 candidates=50, deadline=0.5, executor=None, enrichment_executor=None):
+        """`sources` maps an engine name to fn(title, k) -> result dicts or None.
+
+        `enrichment` is the optional TMDB lookup with the same signature,
+        given `deadline` seconds (from the start of the request) to answer;
+        the local sources are always waited for.
+        Sources run on `executor` and the enrichment on `enrichment_executor`,
+        which must not be the same pool.
+        """
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"Unknown fusion method: {fusion}")
+        self.sources = sources
+        self.enrichment = enrichment
+        self.fusion = fusion
+        self.weights = weights or {}
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.deadline = deadline
+        self.executor = executor or _local_executor
+        self.enrichment_executor = enrichment_executor or _enrichment_executor
+
+    def _fuse(self, lists):
+        if self.fusion == "rrf":
+            ranked = {source: [normalize_title(r["title"]) for r in results] for source, results in lists.items()}
+            return reciprocal_rank_fusion(ranked, self.weights, self.rrf_k)
+        scored = {}
+        for source, results in lists.items():
+            # TMDB lists carry no similarity score; fall back to a linear rank score
+            scored[source] = [
+                (normalize_title(r["title"]), r["score"] if "score" in r else 1 - rank / len(results))
+                for rank, r in enumerate(results)
+            ]
+        return weighted_score_fusion(scored, self.weights)
+
+    @staticmethod
+    def _collect(futures, timeout):
+        """{name: results} of the futures that finished within `timeout` with a non-empty list."""
+        wait(futures.values(), timeout=timeout)
+        lists = {}
+        for name, future in futures.items():
+            # a late enrichment or a broken engine must not take the others down
+            if future.done() and future.exception() is None and future.result():
+                lists[name] = future.result()
+        return lists
+
+    def recommend_results(self, movie_title, k=15):
+        """Fused result dicts for `movie_title`, or None if no engine knows it."""
+        deadline_at = time.monotonic() + self.deadline
+        enrichment = {}
+        if self.enrichment:
+            enrichment["tmdb"] = self.enrichment_executor.submit(self.enrichment, movie_title, self.candidates)
+        local = {name: self.executor.submit(fn, movie_title, self.candidates) for name, fn in self.sources.items()}
+
+        # Every local engine is part of the answer, so they are all waited for; the deadline is TMDB's alone
+        lists = self._collect(local, None)
+        tmdb = self._collect(enrichment, max(0.0, deadline_at - time.monotonic()))
+        tmdb_results = tmdb.get("tmdb")
+        lists.update(tmdb)
+        if not lists:
+            return None
+
+        display = {}  # normalized title -> title as first seen, preferring local engines' spelling
+        for results in lists.values():
+            for r in results:
+                display.setdefault(normalize_title(r["title"]), r["title"])
+        sources = {}
+        for source, results in lists.items():
+            for r in results:
+                sources.setdefault(normalize_title(r["title"]), []).append(source)
+        extra = {normalize_title(r["title"]): r for r in tmdb_results or []}
+
+        fused = self._fuse(lists)
+        seed = normalize_title(movie_title)
+        ranked = sorted((key for key in fused if key != seed), key=lambda key: -fused[key])[:k]
+        results = []
+        for key in ranked:
+            result = {"title": display[key], "score": fused[key], "sources": sources[key]}
+            if key in extra:
+                result.update({field: extra[key].get(field) for field in ENRICHMENT_FIELDS})
+            results.append(result)
+        return results
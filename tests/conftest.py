@@ -0,0 +1,12 @@
+# conftest.py
+#
+# Tests for the shared helpers in common/, run from the repo root:
+#     python -m pytest tests
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+for path in (REPO_ROOT, REPO_ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
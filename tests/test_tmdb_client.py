@@ -0,0 +1,56 @@
+# test_tmdb_client.py
+#
+# common/tmdb_client.TMDBClient against local servers: decoded JSON on
+# success, None (counted as a failure) when no JSON comes back.
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from common.tmdb_client import TMDBClient
+from stub_tmdb import fake_movie, start_stub_server
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    """Answers every request with 200 and an HTML page, as captive portals and some proxies do."""
+
+    def do_GET(self):
+        payload = b"<html><body>Please sign in to the network</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def portal():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PortalHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_search_returns_decoded_results():
+    server, url = start_stub_server()
+    try:
+        client = TMDBClient(base_url=url)
+        assert client.search_movie("Tom & Jerry") == [fake_movie("Tom & Jerry")]
+        assert client.stats().get("failures", 0) == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_non_json_success_is_a_failure(portal):
+    client = TMDBClient(base_url=portal, backoff=0)
+    assert client.get("search/movie", params={"query": "The Matrix"}) is None
+    assert client.search_movie("The Matrix") is None
+    stats = client.stats()
+    assert stats["failures"] == 2
+    assert stats["requests"] == 2  # not retried
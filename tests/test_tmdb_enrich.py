@@ -0,0 +1,84 @@
+# test_tmdb_enrich.py
+#
+# common/tmdb_enrich.fetch_many() against benchmarks/stub_tmdb.py: results
+# come back in key order, and lookups past the deadline map to `default`.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from common.tmdb_client import TMDBClient
+from common.tmdb_enrich import fetch_many
+from stub_tmdb import fake_movie, start_stub_server
+
+TITLES = ["The Matrix", "Tom & Jerry", "What's Up, Doc?", "Inception", "3 Idiots", "Money Heist"]
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(latency=0.0):
+        server, url = start_stub_server(latency=latency)
+        servers.append(server)
+        return server, TMDBClient(base_url=url, max_retries=0, rate_limit=1000)
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_results_follow_key_order(stub):
+    _, client = stub(latency=0.02)
+    results = fetch_many(TITLES, client.search_movie)
+    assert [found[0]["title"] for found in results] == TITLES
+    assert [found[0]["id"] for found in results] == [fake_movie(title)["id"] for title in TITLES]
+
+
+def test_order_does_not_depend_on_completion_order():
+    delays = {title: 0.01 * (len(TITLES) - i) for i, title in enumerate(TITLES)}  # first key finishes last
+
+    def fetch(title):
+        time.sleep(delays[title])
+        return title
+
+    assert fetch_many(TITLES, fetch) == TITLES
+
+
+def test_lookups_run_concurrently(stub):
+    server, client = stub()
+    # Every lookup waits at the barrier until all of them have started; run one at a time, none would get through
+    barrier = threading.Barrier(len(TITLES), timeout=5)
+
+    def fetch(title):
+        barrier.wait()
+        return client.search_movie(title)
+
+    with ThreadPoolExecutor(max_workers=len(TITLES)) as executor:  # not shared with other tests' late lookups
+        results = fetch_many(TITLES, fetch, timeout=10, executor=executor)
+    assert [found[0]["title"] for found in results] == TITLES
+    assert server.requests_served == len(TITLES)
+
+
+def test_late_lookups_map_to_default(stub):
+    _, client = stub(latency=0.5)
+    assert fetch_many(TITLES[:2], client.search_movie, timeout=0.05) == [None, None]
+    assert fetch_many(TITLES[:2], client.search_movie, timeout=0.05, default=[]) == [[], []]
+
+
+def test_failed_lookups_map_to_default():
+    def fetch(title):
+        if title == "Inception":
+            raise RuntimeError("TMDB unreachable")
+        return title
+
+    assert fetch_many(TITLES, fetch, default="?") == [title if title != "Inception" else "?" for title in TITLES]
+
+
+def test_custom_executor_is_used():
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="custom") as executor:
+        names = fetch_many(TITLES, lambda _: threading.current_thread().name, executor=executor)
+    assert all(name.startswith("custom") for name in names)
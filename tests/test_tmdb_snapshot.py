@@ -0,0 +1,127 @@
+# test_tmdb_snapshot.py
+#
+# common/tmdb_snapshot.py against the checked-in fixture, without network:
+# lookups, outdated-row detection and sync_rows() bookkeeping.
+
+import json
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+
+import pytest
+
+from common.title_index import TitleIndex
+from common.tmdb_snapshot import SnapshotRefresher, TMDBSnapshot, sync_rows
+
+FIXTURE = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "tmdb_snapshot.jsonl"
+
+
+class FakeClient:
+    """search_movie() answers from `results` ({title: list or None}); unknown titles fail (None)."""
+
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def search_movie(self, query):
+        with self._lock:
+            self.queries.append(query)
+        return self.results.get(query)
+
+    def background(self):
+        return nullcontext()
+
+
+@pytest.fixture
+def rows():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.fixture
+def titles(rows):
+    return [row["title"] for row in sorted(rows, key=lambda row: row["row_id"])]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    snapshot = TMDBSnapshot(str(tmp_path / "snapshot.sqlite3"))
+    snapshot.import_jsonl(FIXTURE)
+    return snapshot
+
+
+def refresher(snapshot, titles, client=None):
+    return SnapshotRefresher(snapshot, client or FakeClient(), titles, TitleIndex(titles))
+
+
+def test_import_stores_every_fixture_row(snapshot, rows):
+    assert len(snapshot) == len(rows)
+    stored = snapshot.get_many([row["row_id"] for row in rows])
+    for row in rows:
+        assert stored[row["row_id"]]["tmdb_id"] == row["tmdb_id"]
+        assert stored[row["row_id"]]["poster_path"] == row["poster_path"]
+
+
+def test_lookup_keeps_the_order_of_the_titles(snapshot, rows, titles):
+    by_title = {row["title"]: row for row in rows}
+    wanted = [titles[5], titles[0], titles[42], titles[5]]
+    details = refresher(snapshot, titles).lookup(wanted)
+    assert [d["id"] for d in details] == [by_title[title]["tmdb_id"] for title in wanted]
+    assert [d["poster_path"] for d in details] == [by_title[title]["poster_path"] for title in wanted]
+
+
+def test_lookup_returns_none_for_missing_rows(snapshot, titles):
+    catalog = titles + ["A Movie Added After The Sync"]
+    details = refresher(snapshot, catalog).lookup([titles[1], "A Movie Added After The Sync", "Not In The Catalog"])
+    assert details[0] is not None
+    assert details[1:] == [None, None]
+
+
+def test_lookup_ignores_rows_synced_under_another_title(snapshot, titles):
+    catalog = list(titles)
+    catalog[3] = "A Different Movie"
+    assert refresher(snapshot, catalog).lookup_rows([3, 4])[0] is None
+
+
+def test_outdated_lists_missing_stale_and_renamed_rows(snapshot, titles):
+    catalog = titles + ["A Movie Added After The Sync"]
+    catalog[7] = "A Different Movie"
+    with snapshot._lock:
+        snapshot._db.execute("UPDATE tmdb_snapshot SET synced_at = 0 WHERE row_id = 3")
+        snapshot._db.commit()
+    assert snapshot.outdated(titles) == [3]
+    assert snapshot.outdated(catalog) == [3, 7, len(titles)]
+
+
+def test_sync_rows_stores_answers_and_returns_failed_rows(snapshot, titles):
+    catalog = titles + ["New Movie", "Unknown To TMDB", "TMDB Unreachable"]
+    new, unknown, unreachable = range(len(titles), len(catalog))
+    client = FakeClient({
+        "New Movie": [{"id": 1, "title": "New Movie", "poster_path": "/new.jpg"}],
+        "Unknown To TMDB": [],  # searched fine, no match
+    })
+    assert snapshot.outdated(catalog) == [new, unknown, unreachable]
+
+    stored, failed = sync_rows(snapshot, client, catalog, [new, unknown, unreachable], workers=2, batch_size=2)
+    assert (stored, failed) == (2, [unreachable])
+    assert sorted(client.queries) == sorted(["New Movie", "Unknown To TMDB", "TMDB Unreachable"])
+    # Rows without a TMDB match are stored (not retried); failed lookups stay outdated
+    assert snapshot.outdated(catalog) == [unreachable]
+    details = refresher(snapshot, catalog).lookup_rows([new, unknown, unreachable])
+    assert details[0]["id"] == 1 and details[0]["poster_path"] == "/new.jpg"
+    assert details[1:] == [None, None]
+
+
+def test_sync_rows_counts_client_errors_as_failed(snapshot, titles):
+    class RaisingClient(FakeClient):
+        def search_movie(self, query):
+            if query == "Broken Response":
+                raise ValueError("not JSON")
+            return super().search_movie(query)
+
+    catalog = titles + ["New Movie", "Broken Response"]
+    new, broken = len(titles), len(titles) + 1
+    client = RaisingClient({"New Movie": [{"id": 1, "title": "New Movie"}]})
+    assert sync_rows(snapshot, client, catalog, [new, broken], workers=2) == (1, [broken])
+    assert snapshot.outdated(catalog) == [broken]